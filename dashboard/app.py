@@ -6,6 +6,7 @@ HWPX 파일을 업로드하여 마크다운으로 변환하고 편집한 뒤,
 """
 import streamlit as st
 import os
+import time
 import tempfile
 from pathlib import Path
 
@@ -18,6 +19,10 @@ st.set_page_config(
 
 # 서비스 import
 from services.pipeline_service import PipelineService
+from services.jobs import JobQueueFull, ACTIVE, DONE, FAILED
+
+POLL_INTERVAL = 0.5  # 백그라운드 작업 진행률 갱신 주기 (초)
+ANALYZE_DEBOUNCE = 1.0  # 마지막 편집 후 변경사항을 다시 분석하기까지 기다리는 시간 (초)
 
 
 def format_file_size(size_bytes):
@@ -45,10 +50,161 @@ def init_session_state():
         st.session_state.temp_hwpx_path = None
     if 'conversion_done' not in st.session_state:
         st.session_state.conversion_done = False
+    if 'convert_job' not in st.session_state:
+        st.session_state.convert_job = None   # 마크다운 변환 작업 ID
+    if 'build_job' not in st.session_state:
+        st.session_state.build_job = None     # HWPX 생성 작업 ID (다운로드 전까지 유지)
+    if 'changes' not in st.session_state:
+        st.session_state.changes = None       # 마지막 변경사항 분석 결과
+        st.session_state.changes_for = None   # 그 결과를 계산한 편집본 텍스트
+        st.session_state.edited_at = 0.0      # 마지막 편집 시각 (분석 디바운스용)
+
+
+def current_changes():
+    """변경사항 분석 결과와 갱신 대기 여부.
+
+    편집 직후 ANALYZE_DEBOUNCE초 동안은 이전 결과를 그대로 보여 주고 (True 반환 —
+    잠시 후 다시 실행 필요), 그 뒤에 한 번만 분석합니다. 분석 자체도 서비스에서
+    내용 해시로 캐시되므로 다른 위젯 조작으로 다시 실행될 때는 비용이 거의 없습니다.
+    """
+    state = st.session_state
+    if state.changes is not None and state.changes_for == state.edited_md:
+        return state.changes, False
+    if state.changes is not None and time.time() - state.edited_at < ANALYZE_DEBOUNCE:
+        return state.changes, True
+    state.changes = state.service.analyze_changes(state.original_md, state.edited_md)
+    state.changes_for = state.edited_md
+    return state.changes, False
+
+
+def render_job_progress(job, label, key):
+    """실행 중/대기 중 작업의 진행률 막대와 취소 버튼"""
+    if job['status'] == 'queued':
+        text = f"{label} — 대기 중"
+    elif job['total']:
+        text = f"{label} — {job['done']}/{job['total']} {job['message']}"
+    else:
+        text = label
+    st.progress(job['progress'], text=text)
+    if st.button("⏹ 취소", key=key, use_container_width=True):
+        st.session_state.service.cancel_job(job['id'])
+
+
+def poll_convert_job():
+    """마크다운 변환 작업 상태 반영. 아직 진행 중이면 True (다시 폴링 필요)"""
+    service = st.session_state.service
+    job_id = st.session_state.convert_job
+    if job_id is None:
+        return False
+    job = service.job_status(job_id)
+    if job is not None and job['status'] in ACTIVE:
+        render_job_progress(job, "변환 중", key="cancel_convert")
+        return True
+
+    st.session_state.convert_job = None
+    if job is None:
+        st.warning("변환 작업 결과가 만료되었습니다. 다시 변환하세요.")
+        return False
+    service.release_job(job_id)
+    if job['status'] == DONE:
+        result = job['result']
+        st.session_state.original_md = result['md_content']
+        st.session_state.edited_md = result['md_content']
+        st.session_state.changes = None
+        st.session_state.conversion_done = True
+        st.rerun()
+    elif job['status'] == FAILED:
+        st.error(f"❌ 변환 실패: {job['error']}")
+    else:
+        st.info("변환을 취소했습니다.")
+    return False
+
+
+def release_build_job(job_id):
+    """다운로드 버튼 콜백 — 결과를 가져갔으므로 작업과 임시 파일 삭제"""
+    st.session_state.service.release_job(job_id)
+    st.session_state.build_job = None
+
+
+def poll_build_job():
+    """HWPX 생성 작업 상태 반영 (완료 시 다운로드 버튼). 아직 진행 중이면 True"""
+    service = st.session_state.service
+    job_id = st.session_state.build_job
+    if job_id is None:
+        return False
+    job = service.job_status(job_id)
+    if job is None:
+        st.session_state.build_job = None
+        st.warning("생성한 HWPX가 만료되었습니다. 다시 생성하세요.")
+        return False
+    if job['status'] in ACTIVE:
+        render_job_progress(job, "HWPX 파일 생성 중", key="cancel_build")
+        return True
+
+    result = job['result']
+    if job['status'] == DONE and result['success']:
+        st.success("✅ HWPX 생성 완료!")
+
+        # 파일 읽기
+        with open(result['output_path'], 'rb') as f:
+            hwpx_bytes = f.read()
+
+        # 다운로드 버튼 (누르면 작업과 임시 파일 삭제, 누르지 않으면 만료 시 삭제)
+        original_name = Path(st.session_state.uploaded_file).stem
+        st.download_button(
+            label="📥 HWPX 다운로드",
+            data=hwpx_bytes,
+            file_name=f"{original_name}_edited.hwpx",
+            mime="application/octet-stream",
+            use_container_width=True,
+            on_click=release_build_job,
+            args=(job_id,)
+        )
+        return False
+
+    release_build_job(job_id)
+    if job['status'] == DONE:
+        st.error(f"❌ {result['message']}")
+    elif job['status'] == FAILED:
+        st.error(f"❌ 생성 실패: {job['error']}")
+    else:
+        st.info("HWPX 생성을 취소했습니다.")
+    return False
+
+
+def submit_build_job():
+    """편집본을 임시 마크다운으로 저장하고 HWPX 생성 작업 등록"""
+    service = st.session_state.service
+    if st.session_state.build_job is not None:
+        service.release_job(st.session_state.build_job)  # 이전 결과는 버림
+        st.session_state.build_job = None
+
+    # 임시 마크다운 파일 저장, 출력 HWPX 경로 — 작업을 release/만료할 때 함께 삭제
+    with tempfile.NamedTemporaryFile(mode='w', encoding='utf-8',
+                                     suffix='.md', delete=False) as tmp_md:
+        tmp_md.write(st.session_state.edited_md)
+        tmp_md_path = tmp_md.name
+    output_hwpx = tempfile.NamedTemporaryFile(delete=False, suffix='.hwpx').name
+
+    try:
+        st.session_state.build_job = service.submit_smart_replace(
+            st.session_state.temp_hwpx_path,
+            tmp_md_path,
+            output_hwpx,
+            temp_files=(tmp_md_path, output_hwpx)
+        )
+    except JobQueueFull as e:
+        for path in (tmp_md_path, output_hwpx):
+            try:
+                os.unlink(path)
+            except OSError:
+                pass
+        st.warning(f"⏳ {e} 잠시 후 다시 시도하세요.")
 
 
 def main():
     init_session_state()
+    polling = False  # 진행 중인 작업이 있으면 끝에서 잠시 후 다시 실행
 
     st.title("📝 HWPX 편집 대시보드")
     st.markdown("HWPX 파일을 마크다운으로 변환하여 편집하고, 다시 HWPX로 저장합니다.")
@@ -77,6 +233,13 @@ def main():
                 st.session_state.conversion_done = False
                 st.session_state.original_md = None
                 st.session_state.edited_md = None
+                st.session_state.changes = None
+
+                # 이전 파일의 작업은 취소/삭제
+                for key in ('convert_job', 'build_job'):
+                    if st.session_state[key] is not None:
+                        st.session_state.service.release_job(st.session_state[key])
+                        st.session_state[key] = None
 
                 # 임시 파일로 저장
                 with tempfile.NamedTemporaryFile(delete=False, suffix='.hwpx') as tmp:
@@ -95,20 +258,16 @@ def main():
                     st.session_state.temp_hwpx_path
                 )
 
-            # 변환 버튼
-            if st.button("🔄 마크다운으로 변환", type="primary", use_container_width=True):
-                with st.spinner("변환 중..."):
-                    try:
-                        result = st.session_state.service.convert_to_markdown(
-                            st.session_state.temp_hwpx_path
-                        )
-                        st.session_state.original_md = result['md_content']
-                        st.session_state.edited_md = result['md_content']
-                        st.session_state.conversion_done = True
-                        st.success("✅ 변환 완료!")
-                        st.rerun()
-                    except Exception as e:
-                        st.error(f"❌ 변환 실패: {str(e)}")
+            # 변환 버튼 — 백그라운드 작업으로 등록하고 진행률은 폴링으로 표시
+            if st.button("🔄 마크다운으로 변환", type="primary", use_container_width=True,
+                         disabled=st.session_state.convert_job is not None):
+                try:
+                    st.session_state.convert_job = st.session_state.service.submit_conversion(
+                        st.session_state.temp_hwpx_path
+                    )
+                except JobQueueFull as e:
+                    st.warning(f"⏳ {e} 잠시 후 다시 시도하세요.")
+            polling |= poll_convert_job()
 
             # 파일 정보 표시
             if st.session_state.hwpx_info:
@@ -166,6 +325,7 @@ def main():
                 # 편집 내용 저장
                 if edited_text != st.session_state.edited_md:
                     st.session_state.edited_md = edited_text
+                    st.session_state.edited_at = time.time()
 
             with col2:
                 st.subheader("미리보기")
@@ -176,12 +336,10 @@ def main():
         with tab2:
             st.header("변경사항 및 다운로드")
 
-            # 변경사항 분석
+            # 변경사항 분석 (편집 중에는 디바운스, 결과는 내용 해시로 캐시)
             if st.session_state.original_md and st.session_state.edited_md:
-                changes = st.session_state.service.analyze_changes(
-                    st.session_state.original_md,
-                    st.session_state.edited_md
-                )
+                changes, stale = current_changes()
+                polling |= stale
 
                 # 변경사항 표시
                 col1, col2, col3, col4 = st.columns(4)
@@ -193,59 +351,23 @@ def main():
                     st.metric("전체 문단", f"{changes['total_paragraphs']}개")
                 with col4:
                     st.metric("변경된 문단", f"{changes['paragraph_changes']}개")
+                if stale:
+                    st.caption("편집 중 — 잠시 후 변경사항을 다시 계산합니다")
 
                 st.divider()
 
-                # HWPX 생성 버튼
-                if st.button("🔨 HWPX 생성", type="primary", use_container_width=True):
-                    with st.spinner("HWPX 파일 생성 중..."):
-                        try:
-                            # 임시 마크다운 파일 저장
-                            with tempfile.NamedTemporaryFile(mode='w', encoding='utf-8',
-                                                            suffix='.md', delete=False) as tmp_md:
-                                tmp_md.write(st.session_state.edited_md)
-                                tmp_md_path = tmp_md.name
-
-                            # 출력 HWPX 경로
-                            output_hwpx = tempfile.NamedTemporaryFile(delete=False, suffix='.hwpx').name
-
-                            # smart_replace 실행
-                            result = st.session_state.service.smart_replace(
-                                st.session_state.temp_hwpx_path,
-                                tmp_md_path,
-                                output_hwpx
-                            )
-
-                            if result['success']:
-                                st.success("✅ HWPX 생성 완료!")
-
-                                # 파일 읽기
-                                with open(result['output_path'], 'rb') as f:
-                                    hwpx_bytes = f.read()
-
-                                # 다운로드 버튼
-                                original_name = Path(st.session_state.uploaded_file).stem
-                                st.download_button(
-                                    label="📥 HWPX 다운로드",
-                                    data=hwpx_bytes,
-                                    file_name=f"{original_name}_edited.hwpx",
-                                    mime="application/octet-stream",
-                                    use_container_width=True
-                                )
-
-                                # 임시 파일 정리
-                                try:
-                                    os.unlink(tmp_md_path)
-                                except:
-                                    pass
-                            else:
-                                st.error(f"❌ {result['message']}")
-
-                        except Exception as e:
-                            st.error(f"❌ 생성 실패: {str(e)}")
-                            import traceback
-                            with st.expander("오류 상세 정보"):
-                                st.code(traceback.format_exc())
+                # HWPX 생성 버튼 — 백그라운드 작업, 결과는 다운로드하거나 만료될 때까지 보관
+                build_job = st.session_state.build_job
+                build_status = (st.session_state.service.job_status(build_job)
+                                if build_job is not None else None)
+                if st.button("🔨 HWPX 생성", type="primary", use_container_width=True,
+                             disabled=build_status is not None and build_status['status'] in ACTIVE):
+                    submit_build_job()
+                polling |= poll_build_job()
+
+    if polling:
+        time.sleep(POLL_INTERVAL)
+        st.rerun()
 
 
 if __name__ == "__main__":
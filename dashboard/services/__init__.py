@@ -2,5 +2,6 @@
 services package - Pipeline 래퍼 서비스
 """
 from .pipeline_service import PipelineService
+from .jobs import JobManager, JobQueueFull, get_job_manager
 
-__all__ = ['PipelineService']
+__all__ = ['PipelineService', 'JobManager', 'JobQueueFull', 'get_job_manager']
@@ -0,0 +1,240 @@
+"""
+jobs.py - 백그라운드 작업 큐 (변환/스마트 교체를 Streamlit 스크립트 스레드 밖에서 실행)
+
+Streamlit은 세션마다 스크립트 스레드에서 위젯 코드를 실행하므로, 큰 HWPX 변환을
+그 자리에서 돌리면 해당 세션 화면이 멈추고 동시 사용자 수만큼 변환이 겹칩니다.
+여기서는 서버 전체가 공유하는 스레드 풀(get_job_manager)에 작업을 넣고 작업 ID를
+돌려주며, 앱은 ID로 상태를 폴링해 진행률을 그립니다.
+
+  - 동시 실행은 max_workers개, 대기는 max_pending개까지 (넘치면 JobQueueFull)
+  - 작업 함수는 첫 인자로 Job을 받아 job.report(done, total, message)로 진행률을 알림.
+    취소가 요청되면 report()가 JobCancelled를 던져 다음 보고 지점에서 멈춤
+  - 끝난 작업의 결과는 release()(다운로드 완료)하거나 result_ttl초가 지나면 삭제.
+    files에 등록한 임시 파일도 함께 지움
+
+사용 예:
+    manager = get_job_manager()
+    job_id = manager.submit('to-md', lambda job, path: ..., 'a.hwpx')
+    manager.status(job_id)  # {'status': 'running', 'done': 1, 'total': 3, ...}
+"""
+import os
+import time
+import uuid
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+QUEUED = 'queued'
+RUNNING = 'running'
+DONE = 'done'
+FAILED = 'failed'
+CANCELLED = 'cancelled'
+ACTIVE = (QUEUED, RUNNING)
+
+DEFAULT_WORKERS = 2
+DEFAULT_PENDING = 8
+RESULT_TTL = 30 * 60  # 끝난 작업 결과 보관 시간 (초)
+
+
+class JobCancelled(Exception):
+    """취소 요청된 작업이 진행률 보고 지점에서 던지는 예외"""
+
+
+class JobQueueFull(RuntimeError):
+    """실행 중 + 대기 중 작업이 한도를 넘어 새 작업을 받을 수 없음"""
+
+
+class Job:
+    """작업 하나의 상태 (작업 스레드가 갱신, 앱은 snapshot()으로 읽음)"""
+
+    def __init__(self, kind, owner=None, files=()):
+        self.id = uuid.uuid4().hex[:12]
+        self.kind = kind
+        self.owner = owner      # 작업을 넣은 쪽 식별자 (PipelineService가 세션별 정리에 사용)
+        self.status = QUEUED
+        self.done = 0
+        self.total = 0
+        self.message = ''
+        self.result = None
+        self.error = None
+        self.created = time.time()
+        self.finished = None
+        self.files = list(files)  # release/만료 시 지울 임시 파일
+        self._cancel = threading.Event()
+
+    @property
+    def cancel_requested(self):
+        return self._cancel.is_set()
+
+    def report(self, done, total=None, message=None):
+        """진행률 갱신. 취소가 요청되었으면 JobCancelled.
+
+        Args:
+            done: 끝난 단위 수 (예: 섹션 수)
+            total: 전체 단위 수 (None이면 이전 값 유지)
+            message: 진행 중인 단계 설명 (예: 섹션 파일 이름)
+        """
+        if self._cancel.is_set():
+            raise JobCancelled(self.id)
+        self.done = done
+        if total is not None:
+            self.total = total
+        if message is not None:
+            self.message = message
+
+    def snapshot(self):
+        """상태 dict (result 포함 — 앱 스레드에서 읽기만 함)"""
+        return {
+            'id': self.id,
+            'kind': self.kind,
+            'status': self.status,
+            'done': self.done,
+            'total': self.total,
+            'progress': min(1.0, self.done / self.total) if self.total else 0.0,
+            'message': self.message,
+            'result': self.result,
+            'error': self.error,
+            'created': self.created,
+            'finished': self.finished,
+        }
+
+
+class JobManager:
+    """제한된 스레드 풀에서 작업을 실행하고 결과를 만료 시각까지 보관"""
+
+    def __init__(self, max_workers=DEFAULT_WORKERS, max_pending=DEFAULT_PENDING,
+                 result_ttl=RESULT_TTL):
+        """
+        Args:
+            max_workers: 동시에 실행할 작업 수
+            max_pending: 실행을 기다릴 수 있는 작업 수 (넘치면 submit이 JobQueueFull)
+            result_ttl: 끝난 작업 결과를 보관할 시간 (초)
+        """
+        self.max_workers = max(1, max_workers)
+        self.max_pending = max(0, max_pending)
+        self.result_ttl = result_ttl
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers,
+                                            thread_name_prefix='hwpx-job')
+        self._jobs = {}
+        self._lock = threading.Lock()
+
+    def submit(self, kind, fn, *args, owner=None, files=(), **kwargs):
+        """작업 등록 후 ID 반환. fn(job, *args, **kwargs)의 반환값이 결과가 됨.
+
+        Raises:
+            JobQueueFull: 실행 중 + 대기 중 작업이 max_workers + max_pending개
+        """
+        self.expire()
+        with self._lock:
+            active = sum(1 for job in self._jobs.values() if job.status in ACTIVE)
+            if active >= self.max_workers + self.max_pending:
+                raise JobQueueFull(f"작업 대기열이 가득 찼습니다 ({active}개 진행/대기 중)")
+            job = Job(kind, owner=owner, files=files)
+            self._jobs[job.id] = job
+        self._executor.submit(self._run, job, fn, args, kwargs)
+        return job.id
+
+    @staticmethod
+    def _run(job, fn, args, kwargs):
+        if job.cancel_requested:
+            job.status = CANCELLED
+            job.finished = time.time()
+            return
+        job.status = RUNNING
+        try:
+            result = fn(job, *args, **kwargs)
+        except JobCancelled:
+            job.status = CANCELLED
+            job.message = '취소됨'
+        except (Exception, SystemExit) as e:
+            job.error = f"{type(e).__name__}: {e}"
+            job.status = FAILED
+        else:
+            job.result = result
+            job.done = job.total = max(job.total, 1)
+            job.status = DONE
+        finally:
+            job.finished = time.time()
+
+    def get(self, job_id):
+        """Job 객체 (없거나 만료되었으면 None)"""
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def status(self, job_id):
+        """작업 상태 dict (없거나 만료되었으면 None)"""
+        self.expire()
+        job = self.get(job_id)
+        return job.snapshot() if job is not None else None
+
+    def jobs(self, owner=None):
+        """보관 중인 작업 ID 목록 (owner를 주면 그 owner의 작업만)"""
+        with self._lock:
+            return [job.id for job in self._jobs.values()
+                    if owner is None or job.owner == owner]
+
+    def cancel(self, job_id):
+        """취소 요청. 대기 중이면 바로 취소, 실행 중이면 다음 진행률 보고에서 멈춤.
+
+        Returns:
+            bool: 취소를 요청했으면 True (없거나 이미 끝났으면 False)
+        """
+        job = self.get(job_id)
+        if job is None or job.status not in ACTIVE:
+            return False
+        job._cancel.set()
+        if job.status == QUEUED:
+            job.status = CANCELLED
+            job.finished = time.time()
+        return True
+
+    def release(self, job_id):
+        """결과를 가져간 작업 삭제 (아직 실행 중이면 취소 요청). 임시 파일도 지움."""
+        with self._lock:
+            job = self._jobs.pop(job_id, None)
+        if job is None:
+            return False
+        job._cancel.set()
+        self._remove_files(job)
+        return True
+
+    def expire(self, now=None):
+        """끝난 지 result_ttl초가 지난 작업 삭제. 삭제한 수 반환."""
+        now = time.time() if now is None else now
+        with self._lock:
+            expired = [job for job in self._jobs.values()
+                       if job.finished is not None and job.status not in ACTIVE
+                       and now - job.finished >= self.result_ttl]
+            for job in expired:
+                del self._jobs[job.id]
+        for job in expired:
+            self._remove_files(job)
+        return len(expired)
+
+    @staticmethod
+    def _remove_files(job):
+        for path in job.files:
+            try:
+                os.unlink(path)
+            except OSError:
+                pass
+
+    def shutdown(self, wait=False):
+        """모든 작업 취소 요청 후 스레드 풀 종료"""
+        with self._lock:
+            jobs = list(self._jobs.values())
+        for job in jobs:
+            self.cancel(job.id)
+        self._executor.shutdown(wait=wait)
+
+
+_manager = None
+_manager_lock = threading.Lock()
+
+
+def get_job_manager():
+    """서버 프로세스 전체가 공유하는 JobManager (세션이 많아도 동시 실행 수 제한 유지)"""
+    global _manager
+    with _manager_lock:
+        if _manager is None:
+            _manager = JobManager()
+        return _manager
@@ -6,7 +6,10 @@ Streamlit 앱에서 pipeline 모듈을 사용하기 위한 서비스 레이어
 import os
 import sys
 import tempfile
+import threading
 import zipfile
+from collections import OrderedDict, namedtuple
+from contextlib import contextmanager
 from pathlib import Path
 
 # pipeline 모듈을 import하기 위해 상위 디렉토리를 sys.path에 추가
@@ -17,62 +20,157 @@ PIPELINE_DIR = PROJECT_ROOT / "pipeline"
 if str(PIPELINE_DIR) not in sys.path:
     sys.path.insert(0, str(PIPELINE_DIR))
 
-from hwpx_to_md import convert_hwpx_to_md, HwpxToMarkdown
-from smart_replace import smart_replace, parse_markdown_tables, parse_markdown_paragraphs
+from hwpx_to_md import convert_hwpx_to_md, convert_with_cache
+from conversion_cache import ConversionCache
+from hwpx_document import HwpxDocument
+from section_transforms import transform_hwpx, strip_linesegarray
+from md_blocks import tokenize_markdown, retokenize_markdown
+from smart_replace import smart_replace
+from source_map import md_digest
+
+from .jobs import JobCancelled, get_job_manager
+
+
+class _NamespaceGate:
+    """같은 OWPML 네임스페이스 버전의 작업만 동시에 실행되도록 막는 문
+
+    hwpx_to_md.NS / smart_replace.NS는 모듈 전역이라, 2011 문서와 2024 문서를
+    서로 다른 스레드에서 동시에 변환하면 한쪽이 다른 쪽의 NS로 XPath를 찾게 됩니다.
+    같은 버전끼리는 몇 개든 함께 들어가고, 다른 버전은 앞 작업이 모두 나갈 때까지 기다립니다.
+    """
+
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._version = None
+        self._holders = 0
+
+    @contextmanager
+    def hold(self, ns_version):
+        with self._cond:
+            self._cond.wait_for(lambda: self._holders == 0 or self._version == ns_version)
+            self._version = ns_version
+            self._holders += 1
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._holders -= 1
+                if self._holders == 0:
+                    self._version = None
+                    self._cond.notify_all()
+
+
+_NS_GATE = _NamespaceGate()
+
+CHANGE_CACHE_SIZE = 32  # analyze_changes 결과를 보관할 (원본, 편집본) 쌍 수
+
+# 토크나이즈한 마크다운 하나 (text: 원문, lines: 줄 목록, blocks: MdBlock 목록, digest: 내용 해시,
+# tables/paragraphs: 테이블 셀 목록 / 문단 텍스트 — markdown_tables/markdown_paragraphs 순번)
+_MdModel = namedtuple('_MdModel', ['text', 'lines', 'blocks', 'digest', 'tables', 'paragraphs'])
+
+
+def _md_model(text, lines, blocks, digest):
+    """블록 목록에서 테이블/문단 뷰를 한 번 만들어 _MdModel로 묶음"""
+    return _MdModel(text, lines, blocks, digest,
+                    [b.cells for b in blocks if b.cells is not None],
+                    [b.text for b in blocks if b.kind == 'paragraph'])
 
 
 class PipelineService:
     """Pipeline 기능을 Streamlit 앱에서 사용하기 위한 서비스 클래스"""
 
-    def __init__(self):
+    def __init__(self, jobs=None):
         self.temp_dir = None
-
-    def convert_to_markdown(self, hwpx_path, output_dir=None):
+        self._document = None       # 마지막으로 파싱한 HwpxDocument
+        self._document_key = None   # (경로, 크기, 수정 시각) — 파일이 바뀌면 다시 파싱
+        self.cache = ConversionCache()  # 변환 결과 디스크 캐시 (같은 양식 재업로드 시 재사용)
+        self._source_md = {}        # 파일 키 -> (convert_to_markdown이 쓴 마크다운 경로, 소스 맵)
+        self.jobs = jobs or get_job_manager()  # 백그라운드 작업 큐 (기본: 서버 전체 공유)
+        self._lock = threading.RLock()  # 작업 스레드와 스크립트 스레드가 문서/소스 맵 공유
+        self._original_model = None  # 원본 마크다운 블록 (업로드마다 한 번 토크나이즈)
+        self._edited_model = None    # 마지막으로 토크나이즈한 편집본 (다음 편집의 증분 기준)
+        self._edited_digest = None   # (편집본 텍스트, 내용 해시) — 같은 텍스트면 다시 해시하지 않음
+        self._change_cache = OrderedDict()  # (원본 해시, 편집본 해시) -> analyze_changes 결과
+
+    @staticmethod
+    def _file_key(path):
+        """(절대 경로, 크기, 수정 시각) — 파일이 바뀌면 달라지는 키"""
+        stat = os.stat(path)
+        return (os.path.abspath(path), stat.st_size, stat.st_mtime_ns)
+
+    def get_document(self, hwpx_path):
+        """HWPX 문서 모델 반환 (같은 파일이면 이전에 파싱한 결과 재사용)
+
+        마크다운 변환과 반복되는 스마트 교체가 섹션을 매번 다시 파싱하지 않도록
+        마지막 문서 하나를 보관합니다. strip_lineseg 등으로 파일이 바뀌면
+        크기/수정 시각이 달라지므로 새로 파싱합니다.
+        """
+        key = self._file_key(hwpx_path)
+        with self._lock:
+            if self._document is None or self._document_key != key:
+                self._document = HwpxDocument(hwpx_path)
+                self._document_key = key
+            return self._document
+
+    def convert_to_markdown(self, hwpx_path, output_dir=None, use_cache=True, progress=None):
         """HWPX 파일을 마크다운으로 변환
 
         Args:
             hwpx_path: 입력 HWPX 파일 경로
             output_dir: 출력 디렉토리 (None이면 임시 디렉토리 사용)
+            use_cache: 같은 내용의 HWPX를 이전에 변환했으면 캐시 결과 재사용
+            progress: progress(끝난 섹션 수, 전체 섹션 수, 섹션 파일) — 캐시 적중 시 호출 안 됨
 
         Returns:
             dict: {
                 'md_path': 마크다운 파일 경로,
                 'md_content': 마크다운 텍스트,
                 'image_count': 추출된 이미지 수,
-                'images_dir': 이미지 디렉토리 경로
+                'images_dir': 이미지 디렉토리 경로,
+                'cached': 캐시 적중 여부
             }
         """
         if output_dir is None:
-            if self.temp_dir is None:
-                self.temp_dir = tempfile.mkdtemp(prefix="hwpx_edit_")
-            output_dir = self.temp_dir
+            with self._lock:
+                if self.temp_dir is None:
+                    self.temp_dir = tempfile.mkdtemp(prefix="hwpx_edit_")
+                output_dir = self.temp_dir
 
         # 출력 경로 생성
         base_name = Path(hwpx_path).stem
         output_path = os.path.join(output_dir, f"{base_name}.md")
 
-        # 변환 실행
-        converter = HwpxToMarkdown(hwpx_path, output_dir=output_dir, extract_images=True)
-        md_content = converter.convert()
+        # 변환 실행 (캐시 적중 시 변환 생략)
+        document = self.get_document(hwpx_path)
+        with _NS_GATE.hold(document.ns_version):
+            result = convert_with_cache(hwpx_path, output_dir,
+                                        cache=self.cache if use_cache else None,
+                                        extract_images=True, document=document,
+                                        source_map=True, progress=progress)
+        md_content = result['md_content']
 
         # 파일로 저장
         with open(output_path, 'w', encoding='utf-8') as f:
             f.write(md_content)
+        with self._lock:
+            self._source_md[self._file_key(hwpx_path)] = (output_path, result['source_map'])
 
         return {
             'md_path': output_path,
             'md_content': md_content,
-            'image_count': len(converter.image_map),
-            'images_dir': converter.images_dir if converter.image_map else None
+            'image_count': len(result['image_map']),
+            'images_dir': result['images_dir'] if result['image_map'] else None,
+            'cached': result['cached']
         }
 
-    def smart_replace(self, original_hwpx, edited_md_path, output_hwpx):
+    def smart_replace(self, original_hwpx, edited_md_path, output_hwpx, progress=None):
         """편집된 마크다운을 원본 HWPX에 반영
 
         Args:
             original_hwpx: 원본 HWPX 파일 경로
             edited_md_path: 편집된 마크다운 파일 경로
             output_hwpx: 출력 HWPX 파일 경로
+            progress: progress(done, total, message) — 섹션 치환마다 호출 (total = 섹션 수 + 1)
 
         Returns:
             dict: {
@@ -82,12 +180,25 @@ class PipelineService:
             }
         """
         try:
-            result_path = smart_replace(original_hwpx, edited_md_path, output_hwpx)
+            # 이 HWPX를 변환했으면 소스 맵으로 줄 범위 대조, 맵이 맞지 않으면
+            # 변환한 마크다운과 블록 단위로 비교해 바뀐 블록만 대조 (증분 비교)
+            with self._lock:
+                original_md, source_map = self._source_md.get(self._file_key(original_hwpx),
+                                                              (None, None))
+            if original_md is not None and not os.path.exists(original_md):
+                original_md = None
+            document = self.get_document(original_hwpx)
+            with _NS_GATE.hold(document.ns_version):
+                result_path = smart_replace(original_hwpx, edited_md_path, output_hwpx,
+                                            document=document, original_md=original_md,
+                                            source_map=source_map, progress=progress)
             return {
                 'success': True,
                 'output_path': result_path,
                 'message': '변환 완료'
             }
+        except JobCancelled:
+            raise
         except Exception as e:
             return {
                 'success': False,
@@ -95,9 +206,66 @@ class PipelineService:
                 'message': f'변환 실패: {str(e)}'
             }
 
+    # ------------------------------------------------------------
+    # 백그라운드 작업 (jobs.JobManager) — 앱은 ID로 상태를 폴링
+    # ------------------------------------------------------------
+
+    def submit_conversion(self, hwpx_path, output_dir=None, use_cache=True):
+        """convert_to_markdown을 백그라운드 작업으로 등록하고 작업 ID 반환.
+
+        결과(job_result)는 convert_to_markdown의 반환 dict와 같습니다.
+
+        Raises:
+            jobs.JobQueueFull: 서버 작업 대기열이 가득 참
+        """
+        return self.jobs.submit('to-md', self._conversion_job, hwpx_path, output_dir, use_cache,
+                                owner=id(self))
+
+    def _conversion_job(self, job, hwpx_path, output_dir, use_cache):
+        return self.convert_to_markdown(hwpx_path, output_dir, use_cache, progress=job.report)
+
+    def submit_smart_replace(self, original_hwpx, edited_md_path, output_hwpx, temp_files=()):
+        """smart_replace를 백그라운드 작업으로 등록하고 작업 ID 반환.
+
+        결과(job_result)는 smart_replace의 반환 dict와 같습니다.
+
+        Args:
+            temp_files: 작업을 release하거나 결과가 만료될 때 지울 파일
+                (예: 편집본 임시 마크다운, 다운로드가 끝난 출력 HWPX)
+
+        Raises:
+            jobs.JobQueueFull: 서버 작업 대기열이 가득 참
+        """
+        return self.jobs.submit('smart-replace', self._smart_replace_job, original_hwpx,
+                                edited_md_path, output_hwpx, owner=id(self), files=temp_files)
+
+    def _smart_replace_job(self, job, original_hwpx, edited_md_path, output_hwpx):
+        return self.smart_replace(original_hwpx, edited_md_path, output_hwpx,
+                                  progress=job.report)
+
+    def job_status(self, job_id):
+        """작업 상태 dict (jobs.Job.snapshot) — 없거나 만료되었으면 None
+
+        status는 'queued' | 'running' | 'done' | 'failed' | 'cancelled',
+        progress는 0.0~1.0, 끝나면 result에 결과 dict가 들어 있습니다.
+        """
+        return self.jobs.status(job_id)
+
+    def cancel_job(self, job_id):
+        """작업 취소 요청 (실행 중이면 다음 섹션 경계에서 멈춤)"""
+        return self.jobs.cancel(job_id)
+
+    def release_job(self, job_id):
+        """결과를 다 쓴 작업 삭제 (등록한 임시 파일도 삭제)"""
+        return self.jobs.release(job_id)
+
     def analyze_changes(self, original_md, edited_md):
         """원본과 편집본 마크다운의 변경사항 분석
 
+        Streamlit은 위젯을 건드릴 때마다 다시 실행되므로 결과를 (원본, 편집본) 내용 해시로
+        보관합니다. 원본 블록은 업로드마다 한 번만 토크나이즈하고, 편집본은 직전에
+        토크나이즈한 편집본(처음에는 원본)과 달라진 줄 범위만 다시 토크나이즈합니다.
+
         Args:
             original_md: 원본 마크다운 텍스트
             edited_md: 편집된 마크다운 텍스트
@@ -110,37 +278,59 @@ class PipelineService:
                 'total_paragraphs': 전체 문단 수
             }
         """
-        # 테이블 분석
-        orig_tables = parse_markdown_tables(original_md)
-        edited_tables = parse_markdown_tables(edited_md)
-
+        original = self._original_model
+        if original is None or original.text != original_md:
+            original = _md_model(original_md, original_md.split('\n'),
+                                 tokenize_markdown(original_md), md_digest(original_md))
+            self._original_model = original
+            self._edited_model = None
+
+        if self._edited_digest is None or self._edited_digest[0] != edited_md:
+            self._edited_digest = (edited_md, md_digest(edited_md))
+        key = (original.digest, self._edited_digest[1])
+        changes = self._change_cache.get(key)
+        if changes is not None:
+            self._change_cache.move_to_end(key)
+            return dict(changes)
+
+        # 편집본 — 직전 편집본(없으면 원본)에서 바뀐 줄 범위만 다시 토크나이즈
+        base = self._edited_model or original
+        if base.text == edited_md:
+            edited = base
+        else:
+            lines = edited_md.split('\n')
+            edited = _md_model(edited_md, lines, retokenize_markdown(base.lines, base.blocks, lines),
+                               self._edited_digest[1])
+        self._edited_model = edited
+
+        changes = self._compare_models(original, edited)
+        self._change_cache[key] = changes
+        if len(self._change_cache) > CHANGE_CACHE_SIZE:
+            self._change_cache.popitem(last=False)
+        return dict(changes)
+
+    @staticmethod
+    def _compare_models(original, edited):
+        """테이블 셀/문단을 순번대로 비교해 analyze_changes 결과 dict 생성"""
+        # 테이블 분석 — 증분 토크나이즈로 재사용한 블록은 같은 셀 리스트라 바로 건너뜀
         table_changes = 0
-        for i in range(min(len(orig_tables), len(edited_tables))):
-            orig = orig_tables[i]
-            edited = edited_tables[i]
-
-            # 셀 비교
-            for row_idx in range(min(len(orig['cells']), len(edited['cells']))):
-                for col_idx in range(min(len(orig['cells'][row_idx]), len(edited['cells'][row_idx]))):
-                    orig_cell = orig['cells'][row_idx][col_idx]
-                    edited_cell = edited['cells'][row_idx][col_idx]
+        for orig_rows, edited_rows in zip(original.tables, edited.tables):
+            if orig_rows == edited_rows:
+                continue
+            for orig_row, edited_row in zip(orig_rows, edited_rows):
+                for orig_cell, edited_cell in zip(orig_row, edited_row):
                     if orig_cell.strip() != edited_cell.strip():
                         table_changes += 1
 
         # 문단 분석
-        orig_paras = parse_markdown_paragraphs(original_md)
-        edited_paras = parse_markdown_paragraphs(edited_md)
-
-        para_changes = 0
-        for i in range(min(len(orig_paras), len(edited_paras))):
-            if orig_paras[i].strip() != edited_paras[i].strip():
-                para_changes += 1
+        para_changes = sum(1 for orig, edited in zip(original.paragraphs, edited.paragraphs)
+                           if orig != edited and orig.strip() != edited.strip())
 
         return {
             'table_changes': table_changes,
             'paragraph_changes': para_changes,
-            'total_tables': len(orig_tables),
-            'total_paragraphs': len(orig_paras)
+            'total_tables': len(original.tables),
+            'total_paragraphs': len(original.paragraphs)
         }
 
     def strip_lineseg(self, hwpx_path, output_path=None):
@@ -157,32 +347,9 @@ class PipelineService:
             if output_path is None:
                 output_path = hwpx_path
 
-            # ZIP 파일로 읽기
-            with zipfile.ZipFile(hwpx_path, 'r') as zip_in:
-                # 새로운 ZIP 파일로 쓰기
-                temp_path = output_path + '.tmp'
-                with zipfile.ZipFile(temp_path, 'w', zipfile.ZIP_DEFLATED) as zip_out:
-                    for item in zip_in.infolist():
-                        data = zip_in.read(item.filename)
-
-                        # section*.xml 파일에서 linesegarray 제거
-                        if item.filename.startswith('Contents/section') and item.filename.endswith('.xml'):
-                            data_str = data.decode('utf-8')
-                            # linesegarray 태그 제거 (간단한 정규식 사용)
-                            import re
-                            data_str = re.sub(r'<hp:linesegarray[^>]*>.*?</hp:linesegarray>', '', data_str, flags=re.DOTALL)
-                            data = data_str.encode('utf-8')
-
-                        # mimetype은 압축하지 않음
-                        if item.filename == 'mimetype':
-                            zip_out.writestr(item, data, compress_type=zipfile.ZIP_STORED)
-                        else:
-                            zip_out.writestr(item, data)
-
-            # 임시 파일을 원본으로 교체
-            if os.path.exists(output_path):
-                os.remove(output_path)
-            os.rename(temp_path, output_path)
+            # section*.xml 파일에서 linesegarray 제거 (모든 네임스페이스 접두사)
+            # 바뀐 섹션만 재압축, 이미지 등은 압축 스트림 그대로 복사 — 임시 파일 → 원자적 교체
+            transform_hwpx(hwpx_path, output_path, (strip_linesegarray,))
 
             return {
                 'success': True,
@@ -242,7 +409,9 @@ class PipelineService:
             }
 
     def cleanup(self):
-        """임시 파일 정리"""
+        """임시 파일 정리 (이 서비스가 등록한 작업은 취소 후 삭제)"""
+        for job_id in self.jobs.jobs(owner=id(self)):
+            self.jobs.release(job_id)
         if self.temp_dir and os.path.exists(self.temp_dir):
             import shutil
             try:
@@ -0,0 +1,410 @@
+"""
+batch.py - 다수 파일 일괄 변환 (프로세스 풀)
+
+CLI를 파일마다 호출하면 인터프리터/lxml 로딩 비용을 매번 치르므로,
+워커 프로세스를 한 번 띄워 convert_hwpx_to_md / smart_replace를 반복 호출합니다.
+to-hwpx는 문서마다 엔진을 먼저 정해 native 문서는 같은 프로세스 풀로, pypandoc-hwpx가
+필요한 문서는 상주 워커 풀(pandoc_pool.PandocWorkerPool)로 나눠 두 풀을 동시에 돌립니다.
+
+  - 출력이 입력보다 새로우면 건너뜀 (--force로 강제 재변환)
+  - 진행 상황과 처리량(files/s, MB/s) 출력
+  - 실패 목록을 JSON 요약 파일로 저장
+
+사용법:
+    python convert.py batch to-md 입력폴더 [-o 출력폴더] [--jobs N]
+    python convert.py batch smart manifest.tsv [--jobs N]
+    python convert.py batch to-hwpx 마크다운폴더 [-o 출력폴더] [-r 양식.hwpx] [--jobs N]
+
+to-md 출력 구조 (문서마다 폴더를 나눠 images/, template_info.json 충돌 방지):
+    출력폴더/하위경로/문서명/문서명.md
+
+to-hwpx 출력 구조: 출력폴더/하위경로/문서명.hwpx
+
+smart 매니페스트 형식:
+    - .json: [{"hwpx": "원본.hwpx", "md": "편집.md", "output": "결과.hwpx"}, ...]
+    - 그 외: 한 줄에 '원본.hwpx<TAB>편집.md[<TAB>결과.hwpx]' ('#' 주석, 빈 줄 무시)
+    상대 경로는 매니페스트 파일 위치 기준. output 생략 시 smart_replace 기본값(편집_smart.hwpx).
+"""
+import os
+import io
+import sys
+import json
+import time
+import threading
+import traceback
+import contextlib
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from hwpx_to_md import convert_hwpx_to_md
+from smart_replace import smart_replace
+from md_blocks import tokenize_markdown
+from md_to_hwpx import convert_md_to_hwpx, select_engine
+from pandoc_pool import PandocWorkerPool
+
+
+# ============================================================
+# 작업 목록
+# ============================================================
+
+def _is_up_to_date(output_path, input_paths):
+    """출력 파일이 존재하고 모든 입력보다 새로우면 True"""
+    if not os.path.exists(output_path):
+        return False
+    out_mtime = os.path.getmtime(output_path)
+    return all(os.path.getmtime(p) <= out_mtime for p in input_paths)
+
+
+def collect_to_md_tasks(input_dir, output_dir):
+    """input_dir 아래 모든 .hwpx → [{'inputs': [hwpx], 'output': md_path}, ...] (경로 순)"""
+    tasks = []
+    for root, dirs, files in os.walk(input_dir):
+        dirs.sort()
+        for name in sorted(files):
+            if not name.lower().endswith('.hwpx'):
+                continue
+            hwpx_path = os.path.join(root, name)
+            rel_dir = os.path.relpath(root, input_dir)
+            stem = os.path.splitext(name)[0]
+            md_path = os.path.normpath(os.path.join(output_dir, rel_dir, stem, stem + '.md'))
+            tasks.append({'inputs': [hwpx_path], 'output': md_path})
+    return tasks
+
+
+def collect_to_hwpx_tasks(input_dir, output_dir, reference_doc=None):
+    """input_dir 아래 모든 .md → [{'inputs': [md(, 양식)], 'output': hwpx_path}, ...] (경로 순)
+
+    양식 HWPX도 입력으로 넣어 양식이 바뀌면 최신 출력도 다시 변환합니다.
+    """
+    tasks = []
+    for root, dirs, files in os.walk(input_dir):
+        dirs.sort()
+        for name in sorted(files):
+            if not name.lower().endswith('.md'):
+                continue
+            rel_dir = os.path.relpath(root, input_dir)
+            stem = os.path.splitext(name)[0]
+            hwpx_path = os.path.normpath(os.path.join(output_dir, rel_dir, stem + '.hwpx'))
+            inputs = [os.path.join(root, name)] + ([reference_doc] if reference_doc else [])
+            tasks.append({'inputs': inputs, 'output': hwpx_path})
+    return tasks
+
+
+def load_manifest(manifest_path):
+    """smart 매니페스트 → [{'inputs': [hwpx, md], 'output': hwpx_out}, ...]"""
+    base_dir = os.path.dirname(os.path.abspath(manifest_path))
+
+    def resolve(path):
+        return path if os.path.isabs(path) else os.path.join(base_dir, path)
+
+    with open(manifest_path, 'r', encoding='utf-8') as f:
+        if manifest_path.lower().endswith('.json'):
+            rows = [(e['hwpx'], e['md'], e.get('output')) for e in json.load(f)]
+        else:
+            rows = []
+            for line_no, line in enumerate(f, 1):
+                line = line.rstrip('\r\n')
+                if not line.strip() or line.lstrip().startswith('#'):
+                    continue
+                cols = line.split('\t')
+                if len(cols) not in (2, 3):
+                    raise ValueError(f"{manifest_path}:{line_no}: '원본.hwpx<TAB>편집.md[<TAB>결과.hwpx]' 형식이 아닙니다")
+                rows.append((cols[0], cols[1], cols[2] if len(cols) == 3 else None))
+
+    tasks = []
+    for hwpx_path, md_path, output in rows:
+        hwpx_path, md_path = resolve(hwpx_path), resolve(md_path)
+        if output:
+            output = resolve(output)
+        else:
+            output = os.path.splitext(md_path)[0] + '_smart.hwpx'
+        tasks.append({'inputs': [hwpx_path, md_path], 'output': output})
+    return tasks
+
+
+# ============================================================
+# 워커 (프로세스 풀에서 실행 — 모듈 최상위 함수여야 pickle 가능)
+# ============================================================
+
+def _run_task(kind, task, options):
+    """작업 하나 실행. 개별 변환 로그는 삼키고 실패 시에만 반환.
+
+    Returns:
+        dict: {'ok': bool} — 실패 시 'error', 'traceback', 'log' 포함
+    """
+    log = io.StringIO()
+    try:
+        with contextlib.redirect_stdout(log):
+            if kind == 'to-md':
+                os.makedirs(os.path.dirname(task['output']), exist_ok=True)
+                convert_hwpx_to_md(task['inputs'][0], task['output'],
+                                   extract_images=options.get('extract_images', True),
+                                   streaming=options.get('streaming', False),
+                                   convert_bmp=options.get('convert_bmp', True),
+                                   use_cache=options.get('use_cache', True))
+            elif kind == 'to-hwpx':
+                os.makedirs(os.path.dirname(task['output']), exist_ok=True)
+                convert_md_to_hwpx(task['inputs'][0], task['output'], options.get('reference_doc'),
+                                   engine=task.get('engine', options.get('engine', 'auto')))
+            else:
+                smart_replace(task['inputs'][0], task['inputs'][1], task['output'])
+        return {'ok': True}
+    except (Exception, SystemExit) as e:
+        # smart_replace는 섹션이 없으면 sys.exit(1) — 배치 전체를 멈추지 않도록 실패로 기록
+        return {
+            'ok': False,
+            'error': f"{type(e).__name__}: {e}",
+            'traceback': traceback.format_exc(),
+            'log': log.getvalue(),
+        }
+
+
+def _pool_result(result):
+    """PandocWorkerPool 결과 → _run_task 결과 형식"""
+    if result['ok']:
+        return {'ok': True}
+    return {'ok': False, 'error': result['error'], 'traceback': '', 'log': result['log']}
+
+
+# ============================================================
+# 실행기
+# ============================================================
+
+def _run_tasks(kind, indexed, jobs, options, report, started=None):
+    """[(번호, 작업), ...]을 프로세스 풀(jobs > 1) 또는 현재 프로세스에서 실행.
+
+    Args:
+        started: 작업을 모두 넣은 직후 (워커 fork 뒤, 결과를 기다리기 전) 호출할 함수
+    """
+    if jobs > 1 and len(indexed) > 1:
+        with ProcessPoolExecutor(max_workers=min(jobs, len(indexed))) as pool:
+            futures = {pool.submit(_run_task, kind, task, options): i for i, task in indexed}
+            if started is not None:
+                started()
+            for future in as_completed(futures):
+                report(futures[future], future.result())
+    else:
+        if started is not None:
+            started()
+        for i, task in indexed:
+            report(i, _run_task(kind, task, options))
+
+
+def _route_to_hwpx(pending, options):
+    """작업마다 엔진 결정 (task['engine']). 'auto'일 때만 마크다운을 토크나이즈하고,
+    정해진 엔진을 작업에 넣어 convert_md_to_hwpx가 다시 고르지 않게 함"""
+    engine = options.get('engine', 'auto')
+    reference_doc = options.get('reference_doc')
+    for task in pending:
+        task['engine'] = engine
+        if engine != 'auto':
+            continue
+        if not reference_doc:
+            task['engine'] = 'pandoc'  # 양식이 없으면 native는 고를 수 없음
+            continue
+        try:
+            with open(task['inputs'][0], 'r', encoding='utf-8') as f:
+                blocks = tokenize_markdown(f.read())
+        except OSError:
+            continue  # 'auto' 그대로 — 읽기 실패는 _run_task가 실패로 기록
+        task['engine'] = select_engine(blocks, reference_doc, engine)
+
+
+def _run_to_hwpx(pending, jobs, options, report):
+    """to-hwpx 작업 실행: 엔진별로 먼저 나눈 뒤 pypandoc-hwpx 문서는 상주 워커 풀에
+    (_patch_hwpx는 풀에서), native 문서는 to-md/smart와 같은 프로세스 풀에 동시에 보냄.
+
+    두 풀이 함께 돌면 jobs를 나눠 씀 (pandoc 워커는 최대 jobs // 2개, 최소 1개).
+    """
+    _route_to_hwpx(pending, options)
+    pandoc_tasks = [(i, task) for i, task in enumerate(pending) if task['engine'] == 'pandoc']
+    native_tasks = [(i, task) for i, task in enumerate(pending) if task['engine'] != 'pandoc']
+
+    lock = threading.Lock()  # 풀 디스패처 스레드와 현재 스레드가 함께 보고
+
+    def locked_report(i, result):
+        with lock:
+            report(i, result)
+
+    pandoc_workers = 0
+    pandoc_error = []
+    thread = None
+    if pandoc_tasks:
+        pandoc_workers = min(len(pandoc_tasks), max(1, jobs // 2) if native_tasks else jobs)
+        for _, task in pandoc_tasks:
+            os.makedirs(os.path.dirname(task['output']), exist_ok=True)
+
+        def run_pandoc():
+            try:
+                with PandocWorkerPool(workers=pandoc_workers,
+                                      command=options.get('worker_command')) as pool:
+                    pool.run([{'input': task['inputs'][0], 'output': task['output'],
+                               'reference_doc': options.get('reference_doc')}
+                              for _, task in pandoc_tasks],
+                             callback=lambda j, result: locked_report(pandoc_tasks[j][0],
+                                                                      _pool_result(result)))
+            except Exception as e:
+                pandoc_error.append(e)
+
+        thread = threading.Thread(target=run_pandoc, name='pandoc-pool', daemon=True)
+
+    # pandoc 풀 스레드는 native 워커를 fork한 뒤 바로 시작 (결과를 기다리기 전)
+    _run_tasks('to-hwpx', native_tasks, max(1, jobs - pandoc_workers), options, locked_report,
+               started=thread.start if thread is not None else None)
+
+    if thread is not None:
+        thread.join()
+    if pandoc_error:
+        raise pandoc_error[0]
+
+
+def run_batch(kind, tasks, jobs=None, force=False, options=None, summary_path=None):
+    """작업 목록을 프로세스 풀로 실행하고 요약을 반환 (summary_path가 있으면 JSON 저장).
+
+    Args:
+        kind: 'to-md', 'smart' 또는 'to-hwpx'
+        tasks: collect_to_md_tasks() / load_manifest() / collect_to_hwpx_tasks() 결과
+        jobs: 워커 프로세스 수 (None이면 CPU 수, 1이면 현재 프로세스에서 직렬 실행 —
+              to-hwpx의 pypandoc-hwpx 상주 워커는 1이어도 별도 프로세스이고,
+              native/pandoc 문서가 섞이면 두 풀이 jobs를 나눠 씀)
+        force: True면 최신 출력도 다시 변환
+        options: to-md 옵션 {'extract_images': bool, 'streaming': bool, 'convert_bmp': bool,
+                 'use_cache': bool}, to-hwpx 옵션 {'reference_doc': str, 'engine': str,
+                 'worker_command': list}
+
+    Returns:
+        dict: {'total', 'converted', 'skipped', 'failed', 'elapsed', 'files_per_sec',
+               'mb_per_sec', 'failures': [{'input', 'output', 'error', 'traceback', 'log'}]}
+    """
+    options = options or {}
+    jobs = jobs or os.cpu_count() or 1
+
+    pending = []
+    skipped = 0
+    for task in tasks:
+        if not force and _is_up_to_date(task['output'], task['inputs']):
+            skipped += 1
+        else:
+            pending.append(task)
+
+    total_bytes = sum(os.path.getsize(p) for task in pending for p in task['inputs']
+                      if os.path.exists(p))
+    print(f"일괄 {kind}: 전체 {len(tasks)}개, 최신 상태 건너뜀 {skipped}개, "
+          f"처리 {len(pending)}개 ({total_bytes / 1e6:.1f}MB), 워커 {jobs}개")
+
+    results = [None] * len(pending)
+    start = time.perf_counter()
+    done = 0
+    done_bytes = 0
+
+    def report(i, result):
+        nonlocal done, done_bytes
+        results[i] = result
+        done += 1
+        done_bytes += sum(os.path.getsize(p) for p in pending[i]['inputs'] if os.path.exists(p))
+        elapsed = max(time.perf_counter() - start, 1e-9)
+        status = 'OK ' if result['ok'] else 'ERR'
+        print(f"  [{done}/{len(pending)}] {status} {pending[i]['inputs'][0]} "
+              f"({done / elapsed:.1f} files/s, {done_bytes / 1e6 / elapsed:.1f} MB/s)")
+
+    if kind == 'to-hwpx':
+        _run_to_hwpx(pending, jobs, options, report)
+    else:
+        _run_tasks(kind, list(enumerate(pending)), jobs, options, report)
+
+    elapsed = time.perf_counter() - start
+    failures = [
+        {'input': task['inputs'], 'output': task['output'], 'error': result['error'],
+         'traceback': result['traceback'], 'log': result['log']}
+        for task, result in zip(pending, results) if not result['ok']
+    ]
+    summary = {
+        'command': kind,
+        'total': len(tasks),
+        'converted': len(pending) - len(failures),
+        'skipped': skipped,
+        'failed': len(failures),
+        'elapsed': round(elapsed, 3),
+        'files_per_sec': round(len(pending) / elapsed, 2) if elapsed > 0 else 0.0,
+        'mb_per_sec': round(total_bytes / 1e6 / elapsed, 2) if elapsed > 0 else 0.0,
+        'failures': failures,
+    }
+
+    print(f"일괄 {kind} 완료: 성공 {summary['converted']}개, 건너뜀 {skipped}개, "
+          f"실패 {len(failures)}개 — {elapsed:.1f}초, "
+          f"{summary['files_per_sec']} files/s, {summary['mb_per_sec']} MB/s")
+
+    if summary_path:
+        summary_dir = os.path.dirname(summary_path)
+        if summary_dir:
+            os.makedirs(summary_dir, exist_ok=True)
+        with open(summary_path, 'w', encoding='utf-8') as f:
+            json.dump(summary, f, ensure_ascii=False, indent=2)
+        print(f"요약 저장: {summary_path}")
+
+    return summary
+
+
+def batch_to_md(input_dir, output_dir=None, jobs=None, force=False,
+                extract_images=True, streaming=False, convert_bmp=True, use_cache=True,
+                summary_path=None):
+    """input_dir 아래 모든 HWPX를 마크다운으로 일괄 변환.
+
+    Args:
+        output_dir: 출력 루트 (None이면 '<input_dir>_md')
+        summary_path: 요약 JSON 경로 (None이면 '<output_dir>/batch_summary.json')
+    """
+    input_dir = os.path.normpath(input_dir)
+    if not os.path.isdir(input_dir):
+        print(f"오류: 폴더를 찾을 수 없습니다: {input_dir}", file=sys.stderr)
+        sys.exit(1)
+    if output_dir is None:
+        output_dir = input_dir + '_md'
+    if summary_path is None:
+        summary_path = os.path.join(output_dir, 'batch_summary.json')
+
+    tasks = collect_to_md_tasks(input_dir, output_dir)
+    options = {'extract_images': extract_images, 'streaming': streaming,
+               'convert_bmp': convert_bmp, 'use_cache': use_cache}
+    return run_batch('to-md', tasks, jobs=jobs, force=force, options=options,
+                     summary_path=summary_path)
+
+
+def batch_smart(manifest_path, jobs=None, force=False, summary_path=None):
+    """매니페스트의 (원본 HWPX, 편집 MD) 쌍마다 smart_replace 실행.
+
+    Args:
+        summary_path: 요약 JSON 경로 (None이면 '<매니페스트>_summary.json')
+    """
+    if summary_path is None:
+        summary_path = os.path.splitext(manifest_path)[0] + '_summary.json'
+
+    tasks = load_manifest(manifest_path)
+    return run_batch('smart', tasks, jobs=jobs, force=force, summary_path=summary_path)
+
+
+def batch_to_hwpx(input_dir, output_dir=None, reference_doc=None, engine='auto', jobs=None,
+                  force=False, summary_path=None, worker_command=None):
+    """input_dir 아래 모든 마크다운을 HWPX로 일괄 변환.
+
+    Args:
+        output_dir: 출력 루트 (None이면 '<input_dir>_hwpx')
+        engine: convert_md_to_hwpx와 동일 ('auto' / 'native' / 'pandoc')
+        summary_path: 요약 JSON 경로 (None이면 '<output_dir>/batch_summary.json')
+        worker_command: pypandoc-hwpx 워커 실행 명령 (None이면 pandoc_worker.py)
+    """
+    input_dir = os.path.normpath(input_dir)
+    if not os.path.isdir(input_dir):
+        print(f"오류: 폴더를 찾을 수 없습니다: {input_dir}", file=sys.stderr)
+        sys.exit(1)
+    if engine == 'native' and not reference_doc:
+        print("native 엔진에는 --reference-doc 양식 HWPX가 필요합니다", file=sys.stderr)
+        sys.exit(1)
+    if output_dir is None:
+        output_dir = input_dir + '_hwpx'
+    if summary_path is None:
+        summary_path = os.path.join(output_dir, 'batch_summary.json')
+
+    tasks = collect_to_hwpx_tasks(input_dir, output_dir, reference_doc)
+    options = {'reference_doc': reference_doc, 'engine': engine, 'worker_command': worker_command}
+    return run_batch('to-hwpx', tasks, jobs=jobs, force=force, options=options,
+                     summary_path=summary_path)
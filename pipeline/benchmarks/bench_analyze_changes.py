@@ -0,0 +1,129 @@
+"""
+bench_analyze_changes.py - 대시보드 변경사항 분석 벤치마크 (편집 한 번 = Streamlit 재실행 한 번)
+
+--mb 크기의 합성 마크다운에서 문서 중간의 셀 하나를 --edits번 차례로 고칠 때:
+  - before: 매번 원본/편집본 전체를 tokenize_markdown 후 순번 비교 (기존 analyze_changes)
+  - after:  PipelineService.analyze_changes — 원본 블록 재사용, 바뀐 줄 범위만 다시 토크나이즈
+  - rerun:  같은 편집본으로 다시 호출 (다른 위젯 조작으로 재실행) — 내용 해시 캐시 적중
+결과가 같은지도 확인합니다. 시간은 편집 한 번당 평균, --repeat회 중 최솟값입니다.
+
+사용법:
+    python benchmarks/bench_analyze_changes.py [--mb 2] [--edits 20]
+"""
+import argparse
+import os
+import sys
+import time
+
+import synth
+from md_blocks import tokenize_markdown, markdown_tables, markdown_paragraphs
+
+sys.path.insert(0, os.path.join(os.path.dirname(synth.PIPELINE_DIR), 'dashboard'))
+from services.jobs import JobManager  # noqa: E402
+from services.pipeline_service import PipelineService  # noqa: E402
+
+CHUNK = """# 1. 사업 개요
+
+본문 문단입니다. 사업의 추진 배경과 필요성을 설명합니다.
+두 번째 줄은 같은 문단으로 합쳐집니다.
+
+| 구분 | 내용 | 비고 |
+| --- | --- | --- |
+| 기업명 | 주식회사 예시 | 해당없음 |
+| 대표자 | 홍길동 | - |
+
+> 인용 상자 내용
+
+"""
+
+
+def best_of(n, fn):
+    """fn을 n번 실행해 (가장 빠른 시간, 마지막 결과) 반환"""
+    best = float('inf')
+    result = None
+    for _ in range(n):
+        t0 = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - t0)
+    return best, result
+
+
+def legacy_analyze(original_md, edited_md):
+    """기존 방식: 호출마다 두 문서를 처음부터 토크나이즈 후 모든 셀/문단 비교"""
+    orig_blocks = tokenize_markdown(original_md)
+    edited_blocks = tokenize_markdown(edited_md)
+    orig_tables = markdown_tables(orig_blocks)
+    edited_tables = markdown_tables(edited_blocks)
+    table_changes = 0
+    for i in range(min(len(orig_tables), len(edited_tables))):
+        orig = orig_tables[i]['cells']
+        edited = edited_tables[i]['cells']
+        for row_idx in range(min(len(orig), len(edited))):
+            for col_idx in range(min(len(orig[row_idx]), len(edited[row_idx]))):
+                if orig[row_idx][col_idx].strip() != edited[row_idx][col_idx].strip():
+                    table_changes += 1
+    orig_paras = markdown_paragraphs(orig_blocks)
+    edited_paras = markdown_paragraphs(edited_blocks)
+    para_changes = 0
+    for i in range(min(len(orig_paras), len(edited_paras))):
+        if orig_paras[i].strip() != edited_paras[i].strip():
+            para_changes += 1
+    return {
+        'table_changes': table_changes,
+        'paragraph_changes': para_changes,
+        'total_tables': len(orig_tables),
+        'total_paragraphs': len(orig_paras)
+    }
+
+
+def make_edits(original_md, count):
+    """문서 가운데 '홍길동' 셀을 한 글자씩 늘려 가는 편집본 목록 (키 입력 흉내)"""
+    at = original_md.index('홍길동', len(original_md) // 2)
+    return [original_md[:at] + '홍길동' + '가' * (i + 1) + original_md[at + 3:]
+            for i in range(count)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--mb', type=float, default=2)
+    parser.add_argument('--edits', type=int, default=20)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    copies = int(args.mb * 1e6 / len(CHUNK.encode('utf-8'))) + 1
+    original_md = CHUNK * copies
+    edits = make_edits(original_md, args.edits)
+    print(f"markdown: {len(original_md.encode('utf-8')) / 1e6:.1f}MB, edits: {args.edits}")
+
+    manager = JobManager(max_workers=1)
+
+    def run_service():
+        service = PipelineService(jobs=manager)
+        service.analyze_changes(original_md, original_md)  # 변환 직후 첫 분석 (원본 토크나이즈)
+        t0 = time.perf_counter()
+        results = [service.analyze_changes(original_md, edited) for edited in edits]
+        edit_time = time.perf_counter() - t0
+        t0 = time.perf_counter()
+        for _ in range(args.edits):
+            service.analyze_changes(original_md, edits[-1])
+        return edit_time, time.perf_counter() - t0, results
+
+    before, expected = best_of(args.repeat,
+                               lambda: [legacy_analyze(original_md, e) for e in edits])
+    after = rerun = float('inf')
+    results = None
+    for _ in range(args.repeat):
+        edit_time, rerun_time, results = run_service()
+        after = min(after, edit_time)
+        rerun = min(rerun, rerun_time)
+    manager.shutdown()
+
+    per = 1000 / args.edits
+    print(f"before: {before * per:8.2f}ms/edit")
+    print(f"after:  {after * per:8.2f}ms/edit  speedup: {before / after:.1f}x")
+    print(f"rerun:  {rerun * per:8.3f}ms/rerun  identical: {results == expected}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,69 @@
+"""
+bench_border_fill.py - 표 borderFill 통일(pypandoc-hwpx 후처리) 벤치마크
+
+pypandoc-hwpx 출력처럼 hp:tbl borderFillIDRef="3", 셀은 다른 값인 표 --tables개짜리 섹션에서:
+  - before: 표마다 섹션 나머지를 잘라(rest = xml[end:]) 첫 셀 검색 + 전체 문자열 replace
+  - after:  section_transforms.unify_table_border_fill — 표/셀 태그를 한 번 훑어 짝짓기
+출력이 같은지도 확인합니다. 시간은 --repeat회 중 최솟값입니다.
+
+사용법:
+    python benchmarks/bench_border_fill.py [--tables 3000] [--rows 4] [--cols 3]
+"""
+import argparse
+import re
+import time
+
+import synth
+from section_transforms import unify_table_border_fill
+
+TBL_BORDER_FILL_RE = re.compile(r'(<hp:tbl[^>]*?)borderFillIDRef="(\d+)"([^>]*>)')
+TC_BORDER_FILL_RE = re.compile(r'<hp:tc[^>]*borderFillIDRef="(\d+)"')
+
+
+def legacy_unify_table_border_fill(raw_xml):
+    """기존 방식: 표마다 나머지 섹션 복사 + 검색 + 전체 replace (표 수에 대해 제곱)"""
+    for tbl_match in TBL_BORDER_FILL_RE.finditer(raw_xml):
+        tbl_bf_id = tbl_match.group(2)
+        rest = raw_xml[tbl_match.end():]
+        tc_match = TC_BORDER_FILL_RE.search(rest)
+        if tc_match and tc_match.group(1) != tbl_bf_id:
+            cell_bf_id = tc_match.group(1)
+            old = tbl_match.group(0)
+            new = old.replace(f'borderFillIDRef="{tbl_bf_id}"',
+                              f'borderFillIDRef="{cell_bf_id}"')
+            raw_xml = raw_xml.replace(old, new, 1)
+    return raw_xml
+
+
+def best_of(n, fn):
+    """fn을 n번 실행해 (가장 빠른 시간, 마지막 결과) 반환"""
+    best = float('inf')
+    result = None
+    for _ in range(n):
+        t0 = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - t0)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--tables', type=int, default=3000)
+    parser.add_argument('--rows', type=int, default=4)
+    parser.add_argument('--cols', type=int, default=3)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    # synth 표는 tbl="3", tc="4" — pypandoc-hwpx의 하드코딩된 값과 같은 형태
+    section = synth.section_xml(tables=args.tables, rows=args.rows, cols=args.cols,
+                                paragraphs=args.tables)
+    print(f"section: {len(section) / 1e6:.1f}MB, tables: {args.tables}")
+    before, expected = best_of(args.repeat, lambda: legacy_unify_table_border_fill(section))
+    after, result = best_of(args.repeat, lambda: unify_table_border_fill(section))
+    print(f"before: {before * 1000:8.1f}ms  after: {after * 1000:8.1f}ms  "
+          f"speedup: {before / after:.1f}x  identical: {result == expected}")
+
+
+if __name__ == '__main__':
+    main()
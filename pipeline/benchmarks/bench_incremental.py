@@ -0,0 +1,89 @@
+"""
+bench_incremental.py - smart_replace 반복 저장 벤치마크 (셀 하나 수정)
+
+표 위주 합성 문서를 to-md로 변환하고 셀 하나만 고친 뒤, 같은 HwpxDocument로
+smart_replace를 반복 실행합니다 (대시보드의 "HWPX 생성" 반복 클릭).
+  - full:        모든 테이블 셀/문단을 XML과 정규화 비교
+  - incremental: original_md로 바뀐 블록만 비교 (md_blocks.changed_blocks)
+  - source_map:  to-md 소스 맵의 줄 범위로 바로 대조 (전체 토크나이즈/섹션 분석 생략)
+세 출력 HWPX가 같은지도 확인합니다. 시간은 --repeat회 중 최솟값입니다.
+
+사용법:
+    python benchmarks/bench_incremental.py [--tables 1000] [--rows 10] [--cols 5] [--repeat 3]
+"""
+import argparse
+import contextlib
+import io
+import os
+import tempfile
+import time
+
+import synth
+from hwpx_document import HwpxDocument
+from hwpx_to_md import HwpxToMarkdown
+from smart_replace import smart_replace
+
+
+def best_of(n, fn):
+    """fn을 n번 실행해 가장 빠른 시간(초)을 반환"""
+    best = float('inf')
+    for _ in range(n):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--tables', type=int, default=1000)
+    parser.add_argument('--rows', type=int, default=10)
+    parser.add_argument('--cols', type=int, default=5)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        section = synth.section_xml(tables=args.tables, rows=args.rows, cols=args.cols,
+                                    paragraphs=args.tables)
+        hwpx = synth.write_hwpx(os.path.join(tmp, 'doc.hwpx'), [section])
+        converter = HwpxToMarkdown(hwpx, output_dir=tmp, extract_images=False, source_map=True)
+        md = converter.convert()
+        orig_md = os.path.join(tmp, 'doc.md')
+        edited_md = os.path.join(tmp, 'edited.md')
+        with open(orig_md, 'w', encoding='utf-8') as f:
+            f.write(md)
+        target = f'T{args.tables // 2} 셀 1-1 내용'
+        with open(edited_md, 'w', encoding='utf-8') as f:
+            f.write(md.replace(target, target + ' 수정', 1))
+
+        document = HwpxDocument(hwpx)
+        outputs = {}
+
+        def run(name, **kwargs):
+            out = os.path.join(tmp, f'{name}.hwpx')
+            with contextlib.redirect_stdout(io.StringIO()):
+                smart_replace(hwpx, edited_md, out, document=document, **kwargs)
+            outputs[name] = out
+
+        run('full')  # 섹션 분석/텍스트 노드 인덱스 캐시 채우기
+        full = best_of(args.repeat, lambda: run('full'))
+        incremental = best_of(args.repeat, lambda: run('incremental', original_md=orig_md))
+        mapped = best_of(args.repeat, lambda: run('source_map', source_map=converter.source_map))
+
+        contents = set()
+        for out in outputs.values():
+            with open(out, 'rb') as f:
+                contents.add(f.read())
+        identical = len(contents) == 1
+
+    print(f"section: {len(section.encode('utf-8')) / 1e6:.1f}MB, "
+          f"tables: {args.tables}, cells: {args.tables * args.rows * args.cols}")
+    print(f"full:        {full * 1000:.1f}ms")
+    print(f"incremental: {incremental * 1000:.1f}ms")
+    print(f"source_map:  {mapped * 1000:.1f}ms")
+    print(f"speedup: {full / incremental:.1f}x / {full / mapped:.1f}x, identical: {identical}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,92 @@
+"""
+bench_lineseg.py - linesegarray 제거 벤치마크 (대형 섹션 1개)
+
+  - before: 기존 convert._strip_linesegarray의 정규식 2회
+            (<..:linesegarray[^>]*>.*?</..:linesegarray> DOTALL + 자기 닫힘형)
+  - after:  section_transforms.strip_linesegarray (접두사별 리터럴 패턴 1회 스캔, 되추적 없음)
+  - stream: section_transforms.strip_linesegarray_stream (1MB 청크, bytes)
+세 결과가 같은지도 확인합니다. 시간은 --repeat회 중 최솟값입니다.
+
+--unclosed N: 닫히지 않은 linesegarray N개(손상된 섹션)에서 before/after 비교
+  (before는 여는 태그마다 닫는 태그를 찾아 섹션 끝까지 다시 훑으므로 N²에 비례)
+
+사용법:
+    python benchmarks/bench_lineseg.py [--mb 50] [--elements 500000] [--repeat 3] [--unclosed 2000]
+"""
+import argparse
+import io
+import re
+import time
+
+import synth
+from section_transforms import strip_linesegarray, strip_linesegarray_stream
+
+LINESEG = '<hp:linesegarray><hp:lineseg textpos="0"/></hp:linesegarray>'
+
+
+def legacy_strip_linesegarray(raw_xml):
+    """기존 방식: DOTALL 지연 매칭 + 자기 닫힘형, 정규식 2회"""
+    modified_xml = re.sub(r'<[\w]+:linesegarray[^>]*>.*?</[\w]+:linesegarray>', '', raw_xml, flags=re.DOTALL)
+    return re.sub(r'<[\w]+:linesegarray[^>]*?/>', '', modified_xml)
+
+
+def section_with_linesegs(mb, elements):
+    """linesegarray를 elements개 가진 약 mb MB 섹션 XML"""
+    unit = '<hp:p><hp:run><hp:t>{}</hp:t></hp:run>' + LINESEG + '</hp:p>'
+    pad = max(0, int(mb * 1e6 / elements) - len(unit.format('')))
+    para = unit.format('x' * pad)
+    return ('<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+            '<hs:sec xmlns:hs="http://www.hancom.co.kr/hwpml/2011/section"'
+            f' xmlns:hp="{synth.HP_NS}">' + para * elements + '</hs:sec>')
+
+
+def best_of(n, fn):
+    """fn을 n번 실행해 (가장 빠른 시간, 마지막 결과) 반환"""
+    best = float('inf')
+    result = None
+    for _ in range(n):
+        t0 = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - t0)
+    return best, result
+
+
+def stream_strip(raw_bytes):
+    dst = io.BytesIO()
+    strip_linesegarray_stream(io.BytesIO(raw_bytes), dst)
+    return dst.getvalue()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--mb', type=float, default=50)
+    parser.add_argument('--elements', type=int, default=500000)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--unclosed', type=int, default=0)
+    args = parser.parse_args()
+
+    xml = section_with_linesegs(args.mb, args.elements)
+    raw_bytes = xml.encode('utf-8')
+    size_mb = len(raw_bytes) / 1e6
+
+    before, before_xml = best_of(args.repeat, lambda: legacy_strip_linesegarray(xml))
+    after, after_xml = best_of(args.repeat, lambda: strip_linesegarray(xml))
+    stream, stream_bytes = best_of(args.repeat, lambda: stream_strip(raw_bytes))
+
+    print(f"section: {size_mb:.1f}MB, linesegarray: {xml.count('<hp:linesegarray>')}")
+    print(f"before: {before * 1000:.1f}ms ({size_mb / before:.1f} MB/s)")
+    print(f"after:  {after * 1000:.1f}ms ({size_mb / after:.1f} MB/s)")
+    print(f"stream: {stream * 1000:.1f}ms ({size_mb / stream:.1f} MB/s)")
+    print(f"speedup: {before / after:.1f}x, identical: "
+          f"{before_xml == after_xml and stream_bytes == after_xml.encode('utf-8')}")
+
+    if args.unclosed:
+        broken = '<hp:linesegarray>' * args.unclosed + '<hp:t>본문</hp:t>' * args.unclosed
+        before, _ = best_of(1, lambda: legacy_strip_linesegarray(broken))
+        after, _ = best_of(1, lambda: strip_linesegarray(broken))
+        print(f"unclosed x{args.unclosed}: before {before * 1000:.1f}ms, after {after * 1000:.1f}ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,271 @@
+"""
+bench_md_blocks.py - 마크다운 파싱 벤치마크 (10MB 합성 마크다운)
+
+  - before: parse_markdown_tables + parse_markdown_paragraphs 기존 구현
+            (각자 전체를 split/재스캔, 줄마다 컴파일되지 않은 re.match 반복)
+  - after:  md_blocks.tokenize_markdown() 한 번 + 테이블/문단 뷰
+두 결과가 같은지도 확인합니다. 시간은 --repeat회 중 최솟값입니다.
+
+사용법:
+    python benchmarks/bench_md_blocks.py [--mb 10] [--repeat 3]
+"""
+import argparse
+import re
+import time
+
+import synth  # noqa: F401  (pipeline 경로 등록)
+from md_blocks import tokenize_markdown, markdown_tables, markdown_paragraphs
+
+CHUNK = """# 1. 사업 개요
+
+본문 문단입니다. 사업의 추진 배경과 필요성을 설명합니다.
+두 번째 줄은 같은 문단으로 합쳐집니다.
+
+| 구분 | 내용 | 비고 |
+| --- | --- | --- |
+| 기업명 | 주식회사 예시 | 해당없음 |
+| 대표자 | 홍길동 | - |
+
+> 인용 상자 내용
+
+![image1](images/image1.png)
+
+$$
+E = mc^2
+$$
+
+[x] 개인정보 수집에 동의합니다.
+
+[^1]: 각주 내용입니다.
+
+---
+
+<!-- 머리글: 2026년 창업성공패키지 -->
+
+"""
+
+
+# ------------------------------------------------------------
+# 기존 구현 (비교용)
+# ------------------------------------------------------------
+
+def legacy_parse_markdown_tables(md_text):
+    """마크다운에서 테이블만 순서대로 추출 (인용문 포함).
+
+    Returns:
+        list of dict: {'type': 'table'|'quote', 'cells': 2D list}
+    """
+    tables = []
+    lines = md_text.split('\n')
+    i = 0
+
+    while i < len(lines):
+        line = lines[i]
+
+        # 인용문 (hwpx_to_md에서 1×1 테이블을 인용문으로 변환)
+        if line.startswith('> '):
+            tables.append({
+                'type': 'quote',
+                'cells': [[line[2:].strip()]],
+            })
+            i += 1
+            continue
+
+        # 테이블 감지
+        if '|' in line:
+            next_i = i + 1
+            if next_i < len(lines) and re.match(r'^\|[\s\-:|]+\|$', lines[next_i].strip()):
+                table_lines = []
+                while i < len(lines) and lines[i].strip() and '|' in lines[i]:
+                    table_lines.append(lines[i])
+                    i += 1
+                cells = _parse_table_lines(table_lines)
+                tables.append({
+                    'type': 'table',
+                    'cells': cells,
+                })
+                continue
+
+        i += 1
+
+    return tables
+
+
+def _parse_table_lines(table_lines):
+    """마크다운 테이블 행들을 2D 리스트로 변환"""
+    cells = []
+    for idx, line in enumerate(table_lines):
+        if idx == 1 and re.match(r'^\|[\s\-:|]+\|$', line.strip()):
+            continue
+        stripped = line.strip()
+        if stripped.startswith('|'):
+            stripped = stripped[1:]
+        if stripped.endswith('|'):
+            stripped = stripped[:-1]
+        row = [c.strip() for c in stripped.split('|')]
+        cells.append(row)
+    return cells
+
+
+def legacy_parse_markdown_paragraphs(md_text):
+    """마크다운에서 일반 텍스트 문단만 순서대로 추출.
+
+    테이블 행, 제목, 이미지, 인용문, 빈 줄, 구분선, HTML 주석 등을 제외하고
+    연속된 일반 텍스트 줄을 하나의 문단으로 합칩니다.
+
+    Returns:
+        list of str: 문단 텍스트 목록
+    """
+    paragraphs = []
+    lines = md_text.split('\n')
+    i = 0
+    in_table = False
+
+    while i < len(lines):
+        line = lines[i]
+        stripped = line.strip()
+
+        # 빈 줄 — 현재 문단 종료
+        if not stripped:
+            in_table = False
+            i += 1
+            continue
+
+        # 테이블 행 (|로 시작하거나 구분선 |---|)
+        if stripped.startswith('|') or (in_table and '|' in stripped):
+            in_table = True
+            i += 1
+            continue
+
+        # 테이블 시작 감지 (다음 줄이 구분선)
+        if '|' in stripped and i + 1 < len(lines):
+            next_stripped = lines[i + 1].strip()
+            if re.match(r'^\|[\s\-:|]+\|$', next_stripped):
+                in_table = True
+                i += 1
+                continue
+
+        in_table = False
+
+        # 제목 (#으로 시작)
+        if stripped.startswith('#'):
+            i += 1
+            continue
+
+        # 인용문 (>로 시작)
+        if stripped.startswith('>'):
+            i += 1
+            continue
+
+        # 이미지 (![으로 시작)
+        if stripped.startswith('!['):
+            i += 1
+            continue
+
+        # 구분선 (---, ***, ___)
+        if re.match(r'^[-*_]{3,}\s*$', stripped):
+            i += 1
+            continue
+
+        # HTML 주석 (<!-- -->)
+        if stripped.startswith('<!--'):
+            i += 1
+            continue
+
+        # 수식 블록 ($$ ... $$) — 시작~끝 모두 건너뜀
+        if stripped.startswith('$$'):
+            i += 1
+            # $$ 내부 줄도 건너뛰기
+            while i < len(lines) and not lines[i].strip().startswith('$$'):
+                i += 1
+            if i < len(lines):
+                i += 1  # 닫는 $$ 줄도 건너뜀
+            continue
+
+        # 각주/미주 정의 ([^N]: ...)
+        if re.match(r'^\[\^.+?\]:', stripped):
+            i += 1
+            continue
+
+        # 양식 개체 패턴 ([x], [ ], (o), ( ), [콤보:, [버튼:, [입력란:)
+        if re.match(r'^\[[ x]\]\s', stripped) or re.match(r'^\([ o]\)\s', stripped):
+            i += 1
+            continue
+        if re.match(r'^\[(콤보|버튼|입력란):', stripped):
+            i += 1
+            continue
+
+        # 일반 텍스트 줄 — 연속된 줄을 하나의 문단으로 합침
+        para_lines = []
+        while i < len(lines):
+            line = lines[i]
+            stripped = line.strip()
+            if not stripped:
+                break
+            if stripped.startswith('|') or stripped.startswith('#') or \
+               stripped.startswith('>') or stripped.startswith('![') or \
+               stripped.startswith('<!--') or stripped.startswith('$$'):
+                break
+            if re.match(r'^\[\^.+?\]:', stripped):
+                break
+            if re.match(r'^[-*_]{3,}\s*$', stripped):
+                break
+            # 다음 줄이 테이블 구분선이면 현재 줄은 테이블 헤더
+            if '|' in stripped and i + 1 < len(lines):
+                next_stripped = lines[i + 1].strip()
+                if re.match(r'^\|[\s\-:|]+\|$', next_stripped):
+                    break
+            para_lines.append(stripped)
+            i += 1
+
+        if para_lines:
+            paragraphs.append(' '.join(para_lines))
+
+    return paragraphs
+
+
+def best_of(n, fn):
+    """fn을 n번 실행해 가장 빠른 시간(초)을 반환"""
+    best = float('inf')
+    for _ in range(n):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def tokenize_views(md_text):
+    """토큰화 1회 + 테이블/문단 뷰"""
+    blocks = tokenize_markdown(md_text)
+    return markdown_tables(blocks), markdown_paragraphs(blocks)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--mb', type=float, default=10)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    copies = int(args.mb * 1e6 / len(CHUNK.encode('utf-8'))) + 1
+    md_text = CHUNK * copies
+
+    before_tables = legacy_parse_markdown_tables(md_text)
+    before_paras = legacy_parse_markdown_paragraphs(md_text)
+    before = best_of(args.repeat, lambda: (legacy_parse_markdown_tables(md_text),
+                                          legacy_parse_markdown_paragraphs(md_text)))
+
+    blocks = tokenize_markdown(md_text)
+    after_tables, after_paras = tokenize_views(md_text)
+    after = best_of(args.repeat, lambda: tokenize_views(md_text))
+
+    size_mb = len(md_text.encode('utf-8')) / 1e6
+    print(f"markdown: {size_mb:.1f}MB, blocks: {len(blocks)}")
+    print(f"before: {before * 1000:.1f}ms ({size_mb / before:.1f} MB/s)")
+    print(f"after:  {after * 1000:.1f}ms ({size_mb / after:.1f} MB/s)")
+    print(f"speedup: {before / after:.1f}x, identical: "
+          f"{before_tables == after_tables and before_paras == after_paras}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,82 @@
+"""
+bench_md_to_hwpx.py - Markdown → HWPX 처리량 벤치마크 (docs/s)
+
+합성 양식 HWPX를 hwpx_to_md로 변환한 마크다운(표 --tables개, 문단 --paragraphs개)을
+같은 양식을 reference-doc으로 하여 --docs번 HWPX로 변환합니다.
+  - native: md_to_hwpx.convert_md_to_hwpx(engine='native') — 프로세스 내 작성기
+  - pandoc: engine='pandoc' — pypandoc-hwpx 외부 명령 + _patch_hwpx
+            (pypandoc-hwpx가 PATH에 있을 때만, --pandoc-docs번)
+시간은 --repeat회 중 최솟값입니다.
+
+사용법:
+    python benchmarks/bench_md_to_hwpx.py [--docs 200] [--tables 20] [--paragraphs 100]
+"""
+import argparse
+import contextlib
+import io
+import os
+import shutil
+import tempfile
+import time
+
+import synth
+from hwpx_to_md import HwpxToMarkdown
+from md_to_hwpx import convert_md_to_hwpx
+
+
+def best_of(n, fn):
+    """fn을 n번 실행해 (가장 빠른 시간, 마지막 결과) 반환"""
+    best = float('inf')
+    result = None
+    for _ in range(n):
+        t0 = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - t0)
+    return best, result
+
+
+def convert_many(md_path, reference, out_dir, docs, engine):
+    """같은 마크다운을 docs번 변환 (진행 메시지는 버림)"""
+    with contextlib.redirect_stdout(io.StringIO()):
+        for i in range(docs):
+            convert_md_to_hwpx(md_path, os.path.join(out_dir, f'out{i}.hwpx'), reference,
+                               engine=engine)
+    return docs
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--docs', type=int, default=200)
+    parser.add_argument('--pandoc-docs', type=int, default=5)
+    parser.add_argument('--tables', type=int, default=20)
+    parser.add_argument('--rows', type=int, default=10)
+    parser.add_argument('--paragraphs', type=int, default=100)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        reference = os.path.join(tmp, 'form.hwpx')
+        synth.write_hwpx(reference, [synth.section_xml(tables=args.tables, rows=args.rows,
+                                                       paragraphs=args.paragraphs)])
+        md_text = HwpxToMarkdown(reference, output_dir=tmp, extract_images=False).convert()
+        md_path = os.path.join(tmp, 'doc.md')
+        with open(md_path, 'w', encoding='utf-8') as f:
+            f.write(md_text)
+        print(f"markdown: {len(md_text) / 1024:.0f}KB, tables: {args.tables}, "
+              f"paragraphs: {args.paragraphs}")
+
+        cases = [('native', args.docs)]
+        if shutil.which('pypandoc-hwpx'):
+            cases.append(('pandoc', args.pandoc_docs))
+        else:
+            print("pandoc: pypandoc-hwpx 없음 — 건너뜀")
+        for engine, docs in cases:
+            elapsed, _ = best_of(args.repeat,
+                                 lambda: convert_many(md_path, reference, tmp, docs, engine))
+            print(f"{engine:7s} {docs:4d} docs  {elapsed * 1000:8.1f}ms  "
+                  f"{docs / elapsed:7.1f} docs/s")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,112 @@
+"""
+bench_pandoc_pool.py - pypandoc-hwpx 상주 워커 풀 벤치마크 (일괄 to-hwpx)
+
+마크다운 --docs개를 pandoc 경로로 변환할 때:
+  - spawn: 문서마다 워커 프로세스를 새로 띄움 (기존 subprocess.run 방식과 같은 시작 비용)
+  - pool:  PandocWorkerPool — 워커 --workers개를 한 번 띄워 파이프로 작업 전달
+두 경우 모두 _patch_hwpx 후처리를 포함합니다.
+
+pypandoc-hwpx가 설치되어 있으면 실제 워커(pandoc_worker.py)를, 없으면 대역 워커
+(lxml/파이프라인 모듈 import 후 작은 HWPX 작성 — 인터프리터 시작/모듈 로딩 비용만 재현)를
+사용합니다. 시간은 --repeat회 중 최솟값입니다.
+
+사용법:
+    python benchmarks/bench_pandoc_pool.py [--docs 40] [--workers 2]
+"""
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+import synth
+from pandoc_pool import PandocWorkerPool, WORKER_SCRIPT
+
+STAND_IN = """
+import os, sys, zipfile
+sys.path.insert(0, {pipeline!r})
+import lxml.etree  # noqa: F401 — pypandoc-hwpx 수준의 import 비용
+import hwpx_to_md  # noqa: F401
+from pandoc_worker import serve
+
+SECTION = {section!r}
+
+
+def convert(input_path, output_path, reference_doc):
+    with zipfile.ZipFile(output_path, 'w', zipfile.ZIP_DEFLATED) as z:
+        z.writestr('mimetype', 'application/hwp+zip', compress_type=zipfile.ZIP_STORED)
+        z.writestr('Contents/section0.xml', SECTION)
+
+
+serve(convert)
+"""
+
+
+def best_of(n, fn):
+    """fn을 n번 실행해 (가장 빠른 시간, 마지막 결과) 반환"""
+    best = float('inf')
+    result = None
+    for _ in range(n):
+        t0 = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - t0)
+    return best, result
+
+
+def run_spawn(command, jobs):
+    """문서마다 새 워커 프로세스 (작업 하나 후 종료)"""
+    results = []
+    for job in jobs:
+        with PandocWorkerPool(workers=1, command=command) as pool:
+            results.extend(pool.run([job]))
+    return results
+
+
+def run_pool(command, jobs, workers):
+    with PandocWorkerPool(workers=workers, command=command) as pool:
+        return pool.run(jobs)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--docs', type=int, default=40)
+    parser.add_argument('--workers', type=int, default=2)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        if shutil.which('pypandoc-hwpx'):
+            command = [sys.executable, WORKER_SCRIPT]
+            print("worker: pandoc_worker.py (pypandoc-hwpx)")
+        else:
+            script = os.path.join(tmp, 'stand_in_worker.py')
+            # 빈 subList + borderFillIDRef="3" 표 — 후처리 패치가 실제로 적용되는 출력
+            section = synth.section_xml(tables=5, paragraphs=20).replace(
+                '<hp:subList>', '<hp:subList></hp:subList><hp:subList>', 1)
+            with open(script, 'w', encoding='utf-8') as f:
+                f.write(STAND_IN.format(pipeline=synth.PIPELINE_DIR, section=section))
+            command = [sys.executable, script]
+            print("worker: 대역 워커 (pypandoc-hwpx 없음 — 프로세스 시작/import 비용만 측정)")
+
+        jobs = []
+        for i in range(args.docs):
+            md_path = os.path.join(tmp, f'doc{i}.md')
+            with open(md_path, 'w', encoding='utf-8') as f:
+                f.write(f'# 문서 {i}\n\n본문\n')
+            jobs.append({'input': md_path, 'output': os.path.join(tmp, f'doc{i}.hwpx')})
+
+        cases = [
+            ('spawn', lambda: run_spawn(command, jobs)),
+            (f'pool x{args.workers}', lambda: run_pool(command, jobs, args.workers)),
+        ]
+        for name, fn in cases:
+            elapsed, results = best_of(args.repeat, fn)
+            ok = sum(1 for r in results if r['ok'])
+            print(f"{name:8s} {elapsed * 1000:8.1f}ms  {args.docs / elapsed:6.1f} docs/s  "
+                  f"ok: {ok}/{args.docs}")
+
+
+if __name__ == '__main__':
+    main()
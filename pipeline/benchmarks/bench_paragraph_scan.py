@@ -0,0 +1,73 @@
+"""
+bench_paragraph_scan.py - _process_paragraph 하위 요소 탐색 벤치마크
+
+표 위주 합성 문서에서 섹션별로 다음을 측정합니다:
+  - before: 문단마다 findall('.//hp:xxx')를 종류별로 반복하던 기존 방식
+  - after:  classify_descendants() 한 번의 순회
+  - 전체 _process_section() 시간 (after 적용 상태)
+
+사용법:
+    python benchmarks/bench_paragraph_scan.py [--sections 3] [--tables 60] [--rows 30]
+"""
+import argparse
+import time
+
+from lxml import etree
+
+import synth
+import hwpx_to_md
+from hwpx_to_md import HwpxToMarkdown, classify_descendants, NS_2011
+
+LEGACY_PATTERNS = (
+    ['.//hp:footnote', './/hp:endnote', './/hp:tbl', './/hp:pic', './/hp:equation']
+    + [f'.//hp:{tag}' for tag in hwpx_to_md.FORM_TAGS]
+    + ['.//hp:textart', './/hp:ole', './/hp:colPr']
+    + [f'.//hp:{tag}' for tag in hwpx_to_md.SHAPE_TAGS]
+)
+
+
+def legacy_scan(para):
+    """기존 방식: 종류마다 서브트리 전체를 다시 탐색"""
+    return [para.findall(pattern, NS_2011) for pattern in LEGACY_PATTERNS]
+
+
+def best_of(repeat, fn):
+    """repeat회 실행 중 최소 소요 시간 (초)"""
+    best = None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        elapsed = time.perf_counter() - t0
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sections', type=int, default=3)
+    parser.add_argument('--tables', type=int, default=60)
+    parser.add_argument('--rows', type=int, default=30)
+    parser.add_argument('--cols', type=int, default=6)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    hwpx_to_md.NS = dict(NS_2011)
+    converter = HwpxToMarkdown('bench.hwpx', output_dir='.', extract_images=False)
+
+    print(f"{'section':>8} {'size':>9} {'before':>9} {'after':>9} {'speedup':>8} {'total':>9}")
+    for idx in range(args.sections):
+        xml = synth.section_xml(tables=args.tables, rows=args.rows, cols=args.cols).encode('utf-8')
+        root = etree.fromstring(xml)
+        paras = root.findall('hp:p', NS_2011)
+
+        before = best_of(args.repeat, lambda: [legacy_scan(p) for p in paras])
+        after = best_of(args.repeat, lambda: [classify_descendants(p) for p in paras])
+        section = best_of(1, lambda: converter._process_section(root))
+
+        print(f"{idx:>8} {len(xml) / 1e6:>7.1f}MB {before * 1000:>7.1f}ms {after * 1000:>7.1f}ms "
+              f"{before / after:>7.1f}x {section * 1000:>7.1f}ms")
+
+
+if __name__ == '__main__':
+    main()
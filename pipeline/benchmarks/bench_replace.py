@@ -0,0 +1,62 @@
+"""
+bench_replace.py - 셀/문단 텍스트 치환 엔진 벤치마크
+
+표 위주 합성 섹션에서 N개 셀 교체를 적용하며 다음을 비교합니다:
+  - before: 교체마다 섹션 전체를 `in` / str.replace(..., 1)로 다시 훑던 기존 방식
+  - after:  text_nodes.TextEditor (텍스트 노드 인덱스 1회 + join 1회)
+두 결과가 바이트 단위로 같은지도 확인합니다.
+
+사용법:
+    python benchmarks/bench_replace.py [--tables 400] [--rows 20] [--cols 5] [--edits 2000]
+"""
+import argparse
+import time
+
+import synth
+from smart_replace import apply_cell_replacements
+
+
+def legacy_apply_cell_replacements(raw_xml, replacements, close_tag='</hp:t>'):
+    """기존 방식 (전략 1만): 교체마다 섹션 전체 검색 + 새 문자열 생성"""
+    applied = 0
+    for old_text, new_text in replacements:
+        old_pattern = f'>{old_text}{close_tag}'
+        if old_pattern in raw_xml:
+            raw_xml = raw_xml.replace(old_pattern, f'>{new_text}{close_tag}', 1)
+            applied += 1
+    return raw_xml, applied
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--tables', type=int, default=400)
+    parser.add_argument('--rows', type=int, default=20)
+    parser.add_argument('--cols', type=int, default=5)
+    parser.add_argument('--edits', type=int, default=2000)
+    args = parser.parse_args()
+
+    xml = synth.section_xml(tables=args.tables, rows=args.rows, cols=args.cols,
+                            paragraphs=args.tables)
+    cells = [(t, r, c) for t in range(args.tables)
+             for r in range(args.rows) for c in range(args.cols)]
+    step = max(1, len(cells) // args.edits)
+    replacements = [(f'T{t} 셀 {r}-{c} 내용', f'T{t} 셀 {r}-{c} 수정됨')
+                    for t, r, c in cells[::step][:args.edits]]
+
+    t0 = time.perf_counter()
+    before_xml, before_applied = legacy_apply_cell_replacements(xml, replacements)
+    before = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    after_xml, after_applied = apply_cell_replacements(xml, replacements)
+    after = time.perf_counter() - t0
+
+    print(f"section: {len(xml.encode('utf-8')) / 1e6:.1f}MB, edits: {len(replacements)}")
+    print(f"before: {before * 1000:.1f}ms ({before_applied} applied)")
+    print(f"after:  {after * 1000:.1f}ms ({after_applied} applied)")
+    print(f"speedup: {before / after:.1f}x, identical: {before_xml == after_xml}")
+
+
+if __name__ == '__main__':
+    main()
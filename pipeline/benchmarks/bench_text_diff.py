@@ -0,0 +1,80 @@
+"""
+bench_text_diff.py - 긴 서술형 셀 프래그먼트 diff 벤치마크
+
+같은 어구가 반복되는 한글 서술형 셀(--chars자)에서 2글자 편집 --edits개를 한 뒤
+smart_replace 전략 2의 조각 diff를 비교합니다.
+  - difflib:         SequenceMatcher(None, old, new) (기존 — autojunk 켜짐)
+  - difflib-nojunk:  autojunk=False (정렬은 정확하지만 제곱 시간)
+  - text_diff:       접두사/접미사 제거 + Myers O(ND) + 편집 수 상한
+replace 조각에 포함된 원본 글자 수(작을수록 편집 위치만 정확히 교체)도 출력합니다.
+시간은 --repeat회 중 최솟값입니다.
+
+사용법:
+    python benchmarks/bench_text_diff.py [--chars 10000] [--edits 30] [--repeat 3]
+"""
+import argparse
+import difflib
+import random
+import time
+
+import synth  # noqa: F401 — pipeline 폴더를 sys.path에 추가
+from text_diff import diff_opcodes
+
+PHRASES = ('본 사업은 ', '청년 창업자의 ', '시장 진입을 ', '지원하며 ', '매출 성장과 ',
+           '고용 창출을 ', '목표로 합니다. ', '이를 위해 ', '단계별 계획을 ', '수립하였습니다. ')
+
+
+def narrative_cell(chars, edits, seed=1):
+    """(원본, 편집본) — 반복 어구로 만든 서술형 텍스트와 2글자 편집 edits개"""
+    rng = random.Random(seed)
+    parts = []
+    length = 0
+    while length < chars:
+        phrase = rng.choice(PHRASES)
+        parts.append(phrase)
+        length += len(phrase)
+    old = ''.join(parts)
+    new = list(old)
+    for _ in range(edits):
+        i = rng.randrange(len(new) - 2)
+        new[i:i + 2] = '변경'
+    return old, ''.join(new)
+
+
+def best_of(n, fn):
+    """fn을 n번 실행해 (가장 빠른 시간, 마지막 결과) 반환"""
+    best = float('inf')
+    result = None
+    for _ in range(n):
+        t0 = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - t0)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--chars', type=int, default=10000)
+    parser.add_argument('--edits', type=int, default=30)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    old, new = narrative_cell(args.chars, args.edits)
+    cases = [
+        ('difflib', lambda: difflib.SequenceMatcher(None, old, new).get_opcodes()),
+        ('difflib-nojunk',
+         lambda: difflib.SequenceMatcher(None, old, new, autojunk=False).get_opcodes()),
+        ('text_diff', lambda: diff_opcodes(old, new)),
+    ]
+    print(f"cell: {len(old)} chars, edits: {args.edits}")
+    for name, fn in cases:
+        elapsed, ops = best_of(args.repeat, fn)
+        replaced = sum(i2 - i1 for tag, i1, i2, _, _ in ops if tag == 'replace')
+        fragments = sum(1 for op in ops if op[0] == 'replace')
+        print(f"{name:15s} {elapsed * 1000:8.1f}ms  replace fragments: {fragments:3d}, "
+              f"chars: {replaced}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,69 @@
+"""
+bench_zip_rewrite.py - HWPX 재작성 벤치마크 (이미지가 많은 문서)
+
+섹션 하나만 바꿔 다시 저장할 때:
+  - before: zipfile writestr(item, z_in.read(...))로 모든 멤버 압축 해제 → 재압축
+  - after:  hwpx_zip.write_hwpx() — 변경된 섹션만 재압축, 나머지는 압축 스트림 복사
+
+사용법:
+    python benchmarks/bench_zip_rewrite.py [--images 40] [--image-kb 2048]
+"""
+import argparse
+import io
+import os
+import tempfile
+import time
+import zipfile
+
+import synth
+from hwpx_zip import write_hwpx
+
+
+def legacy_rewrite(src_path, modified):
+    """기존 방식: 모든 멤버를 읽어 다시 압축"""
+    buf = io.BytesIO()
+    with zipfile.ZipFile(src_path, 'r') as z_in, \
+            zipfile.ZipFile(buf, 'w', zipfile.ZIP_DEFLATED) as z_out:
+        for item in z_in.infolist():
+            if item.filename in modified:
+                z_out.writestr(item.filename, modified[item.filename])
+            elif item.filename == 'mimetype':
+                z_out.writestr(item, z_in.read(item.filename), compress_type=zipfile.ZIP_STORED)
+            else:
+                z_out.writestr(item, z_in.read(item.filename))
+    return buf
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--images', type=int, default=40)
+    parser.add_argument('--image-kb', type=int, default=2048)
+    parser.add_argument('--tables', type=int, default=40)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        src = os.path.join(tmp, 'bench.hwpx')
+        # 이미지 바이트: 반쯤 압축되는 데이터 (실제 PNG/JPEG처럼 재압축 이득이 거의 없음)
+        images = {f'BinData/image{i}.png': os.urandom(args.image_kb * 512) * 2
+                  for i in range(args.images)}
+        section = synth.section_xml(tables=args.tables)
+        synth.write_hwpx(src, [section, section], extra_files=images)
+        modified = {'Contents/section1.xml': section.replace('내용', '수정').encode('utf-8')}
+
+        t0 = time.perf_counter()
+        legacy_rewrite(src, modified)
+        before = time.perf_counter() - t0
+
+        t0 = time.perf_counter()
+        write_hwpx(src, io.BytesIO(), modified)
+        after = time.perf_counter() - t0
+
+        print(f"input: {os.path.getsize(src) / 1e6:.1f}MB, images: {args.images}")
+        print(f"before: {before * 1000:.1f}ms")
+        print(f"after:  {after * 1000:.1f}ms")
+        print(f"speedup: {before / after:.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,77 @@
+"""
+synth.py - 벤치마크용 합성 HWPX/마크다운 생성기
+
+실제 양식 파일 없이도 대용량 입력을 재현하기 위한 도구입니다.
+생성 결과는 hwpx_to_md / smart_replace가 그대로 읽을 수 있는 구조입니다.
+"""
+import os
+import sys
+import zipfile
+
+PIPELINE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if PIPELINE_DIR not in sys.path:
+    sys.path.insert(0, PIPELINE_DIR)
+
+HP_NS = 'http://www.hancom.co.kr/hwpml/2011/paragraph'
+
+HEADER_XML = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<hh:head xmlns:hh="http://www.hancom.co.kr/hwpml/2011/head"><hh:refList>'
+    '<hh:charProperties itemCnt="2"><hh:charPr id="0"/><hh:charPr id="1"><hh:bold/></hh:charPr>'
+    '</hh:charProperties>'
+    '<hh:paraProperties itemCnt="2"><hh:paraPr id="0"/><hh:paraPr id="1">'
+    '<hh:heading type="OUTLINE" idRef="0" level="0"/></hh:paraPr></hh:paraProperties>'
+    '</hh:refList></hh:head>'
+)
+
+LINESEG = ('<hp:linesegarray><hp:lineseg textpos="0" vertpos="0" vertsize="1000" '
+           'textheight="1000" baseline="850" spacing="600" horzpos="0" horzsize="42520" '
+           'flags="393216"/></hp:linesegarray>')
+
+
+def para_xml(text, lineseg=False):
+    t = f'<hp:t>{text}</hp:t>' if text else '<hp:t/>'
+    seg = LINESEG if lineseg else ''
+    return (f'<hp:p paraPrIDRef="0" styleIDRef="0" pageBreak="0" columnBreak="0" merged="0">'
+            f'<hp:run charPrIDRef="0">{t}</hp:run>{seg}</hp:p>')
+
+
+def table_xml(rows, cols, label='', lineseg=False):
+    parts = [f'<hp:tbl rowCnt="{rows}" colCnt="{cols}" borderFillIDRef="3">']
+    for r in range(rows):
+        parts.append('<hp:tr>')
+        for c in range(cols):
+            parts.append(
+                '<hp:tc borderFillIDRef="4"><hp:subList>'
+                + para_xml(f'{label}셀 {r}-{c} 내용', lineseg) +
+                f'</hp:subList><hp:cellAddr colAddr="{c}" rowAddr="{r}"/>'
+                '<hp:cellSpan colSpan="1" rowSpan="1"/></hp:tc>')
+        parts.append('</hp:tr>')
+    parts.append('</hp:tbl>')
+    return ''.join(parts)
+
+
+def section_xml(tables=50, rows=20, cols=5, paragraphs=200, lineseg=False):
+    """표 위주 섹션 XML 문자열 생성"""
+    body = []
+    for i in range(paragraphs):
+        body.append(para_xml(f'본문 문단 {i} — 사업 추진 계획 및 기대 효과', lineseg))
+        if i < tables:
+            body.append('<hp:p paraPrIDRef="0" styleIDRef="0"><hp:run charPrIDRef="0">'
+                        + table_xml(rows, cols, f'T{i} ', lineseg) + '<hp:t/></hp:run></hp:p>')
+    return ('<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+            '<hs:sec xmlns:hs="http://www.hancom.co.kr/hwpml/2011/section"'
+            f' xmlns:hp="{HP_NS}" xmlns:hc="http://www.hancom.co.kr/hwpml/2011/core">'
+            + ''.join(body) + '</hs:sec>')
+
+
+def write_hwpx(path, sections, extra_files=None):
+    """섹션 XML 목록으로 HWPX(zip) 파일 작성"""
+    with zipfile.ZipFile(path, 'w', zipfile.ZIP_DEFLATED) as z:
+        z.writestr('mimetype', 'application/hwp+zip', compress_type=zipfile.ZIP_STORED)
+        z.writestr('Contents/header.xml', HEADER_XML)
+        for idx, sec in enumerate(sections):
+            z.writestr(f'Contents/section{idx}.xml', sec)
+        for name, data in (extra_files or {}).items():
+            z.writestr(name, data)
+    return path
@@ -0,0 +1,222 @@
+"""
+conversion_cache.py - HWPX → Markdown 변환 결과 디스크 캐시
+
+대시보드와 배치 작업이 같은 양식을 반복해서 변환하지 않도록 변환 결과
+(마크다운, 추출 이미지, template_info)를 캐시 폴더에 보관합니다.
+
+  - 키: HWPX 바이트의 SHA-256 + 변환기 버전 + 출력에 영향을 주는 옵션
+        변환기 버전은 hwpx_to_md.py / image_store.py / source_map.py / smart_replace.py
+        소스 해시라서 변환 코드가 바뀌면 이전 항목은 자동으로 쓰이지 않습니다.
+  - 항목: <캐시 폴더>/<키>/ 아래 document.md, manifest.json, images/
+        (소스 맵을 요청한 변환이면 document.srcmap.jsonl도)
+        임시 폴더에 모두 쓴 뒤 이름을 바꾸므로 반쪽 항목이 보이지 않습니다
+        (여러 프로세스가 동시에 저장해도 먼저 끝난 쪽만 남음).
+  - 제거: 전체 크기가 max_bytes를 넘으면 가장 오래 쓰지 않은 항목부터 삭제 (LRU —
+        적중할 때마다 manifest.json 수정 시각을 갱신)
+
+캐시 폴더: 환경 변수 HWPX_CACHE_DIR, 없으면 ~/.cache/hwpx-pipeline
+"""
+import os
+import json
+import shutil
+import hashlib
+import uuid
+
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+# source_map은 smart_replace의 문단/셀 텍스트 추출을 그대로 쓰므로 함께 해시
+CONVERTER_FILES = ('hwpx_to_md.py', 'image_store.py', 'source_map.py', 'smart_replace.py')
+HASH_CHUNK = 1 << 20
+MANIFEST_FILE = 'manifest.json'
+MARKDOWN_FILE = 'document.md'
+SOURCE_MAP_FILE = 'document.srcmap.jsonl'
+
+_converter_version = None
+
+
+def default_cache_dir():
+    """HWPX_CACHE_DIR 또는 ~/.cache/hwpx-pipeline"""
+    return (os.environ.get('HWPX_CACHE_DIR')
+            or os.path.join(os.path.expanduser('~'), '.cache', 'hwpx-pipeline'))
+
+
+def converter_version():
+    """변환기 소스(CONVERTER_FILES)의 해시 (프로세스당 한 번 계산)"""
+    global _converter_version
+    if _converter_version is None:
+        h = hashlib.sha256()
+        base_dir = os.path.dirname(os.path.abspath(__file__))
+        for name in CONVERTER_FILES:
+            with open(os.path.join(base_dir, name), 'rb') as f:
+                h.update(f.read())
+        _converter_version = h.hexdigest()[:16]
+    return _converter_version
+
+
+def file_digest(path):
+    """파일 내용의 SHA-256 (청크 단위로 읽음)"""
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK), b''):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+class ConversionCache:
+    """변환 결과 캐시 폴더 하나"""
+
+    def __init__(self, cache_dir=None, max_bytes=DEFAULT_MAX_BYTES):
+        """
+        Args:
+            cache_dir: 캐시 폴더 (None이면 default_cache_dir())
+            max_bytes: 전체 크기 상한 (넘으면 오래된 항목부터 삭제)
+        """
+        self.cache_dir = cache_dir or default_cache_dir()
+        self.max_bytes = max_bytes
+
+    def key(self, hwpx_path, **options):
+        """HWPX 내용 + 변환기 버전 + 옵션으로 만든 캐시 키"""
+        parts = [file_digest(hwpx_path), converter_version()]
+        parts.extend(f'{name}={options[name]!r}' for name in sorted(options))
+        return hashlib.sha256('\n'.join(parts).encode('utf-8')).hexdigest()[:32]
+
+    def load(self, key, output_dir, source_file=None):
+        """캐시 항목을 output_dir에 풀어 놓음 (images/, template_info.json).
+
+        Args:
+            key: key()의 결과
+            output_dir: 변환 출력 폴더
+            source_file: template_info의 'source_file'에 넣을 원본 파일명
+
+        Returns:
+            dict: {'md_content', 'image_map', 'template_info', 'source_map'} — 없거나 손상되면 None
+                (source_map은 저장할 때 넘긴 SourceMap, 없었으면 None)
+        """
+        from source_map import SourceMap
+        entry_dir = os.path.join(self.cache_dir, key)
+        manifest_path = os.path.join(entry_dir, MANIFEST_FILE)
+        try:
+            with open(manifest_path, 'r', encoding='utf-8') as f:
+                manifest = json.load(f)
+            with open(os.path.join(entry_dir, MARKDOWN_FILE), 'r', encoding='utf-8') as f:
+                md_content = f.read()
+
+            source_map = None
+            if manifest.get('source_map'):
+                source_map = SourceMap.load(os.path.join(entry_dir, SOURCE_MAP_FILE))
+
+            image_map = manifest['image_map']
+            if image_map:
+                images_dir = os.path.join(output_dir, 'images')
+                os.makedirs(images_dir, exist_ok=True)
+                for name in set(image_map.values()):
+                    out_path = os.path.join(images_dir, name)
+                    if not os.path.exists(out_path):  # 파일명이 내용 해시 — 있으면 같은 파일
+                        shutil.copyfile(os.path.join(entry_dir, 'images', name), out_path)
+        except (OSError, ValueError, KeyError):
+            return None
+
+        template_info = manifest.get('template_info') or {}
+        if template_info:
+            if source_file is not None:
+                template_info['source_file'] = source_file
+            os.makedirs(output_dir, exist_ok=True)
+            with open(os.path.join(output_dir, 'template_info.json'), 'w', encoding='utf-8') as f:
+                json.dump(template_info, f, ensure_ascii=False, indent=2)
+
+        try:
+            os.utime(manifest_path)  # LRU 순서 갱신
+        except OSError:
+            pass
+        return {
+            'md_content': md_content,
+            'image_map': image_map,
+            'template_info': template_info,
+            'source_map': source_map,
+        }
+
+    def store(self, key, md_content, image_map, images_dir, template_info, source_map=None):
+        """변환 결과를 캐시에 저장하고 크기 상한을 넘으면 오래된 항목 삭제
+
+        Args:
+            key: key()의 결과
+            md_content: 마크다운 텍스트
+            image_map: binaryItemIDRef -> 추출된 파일명
+            images_dir: 추출된 이미지가 있는 폴더
+            template_info: HwpxToMarkdown.template_info
+            source_map: HwpxToMarkdown.source_map (SourceMap, 없으면 None)
+        """
+        entry_dir = os.path.join(self.cache_dir, key)
+        if os.path.exists(entry_dir):
+            return
+        tmp_dir = os.path.join(self.cache_dir, f'.{key}.{uuid.uuid4().hex[:8]}.tmp')
+        try:
+            size = 0
+            if image_map:
+                os.makedirs(os.path.join(tmp_dir, 'images'))
+                for name in set(image_map.values()):
+                    dst = os.path.join(tmp_dir, 'images', name)
+                    shutil.copyfile(os.path.join(images_dir, name), dst)
+                    size += os.path.getsize(dst)
+            else:
+                os.makedirs(tmp_dir)
+
+            md_bytes = md_content.encode('utf-8')
+            with open(os.path.join(tmp_dir, MARKDOWN_FILE), 'wb') as f:
+                f.write(md_bytes)
+            size += len(md_bytes)
+
+            if source_map is not None:
+                map_path = os.path.join(tmp_dir, SOURCE_MAP_FILE)
+                source_map.save(map_path)
+                size += os.path.getsize(map_path)
+
+            manifest = {
+                'image_map': image_map,
+                'template_info': template_info,
+                'source_map': source_map is not None,
+                'size': size,
+            }
+            with open(os.path.join(tmp_dir, MANIFEST_FILE), 'w', encoding='utf-8') as f:
+                json.dump(manifest, f, ensure_ascii=False)
+
+            os.rename(tmp_dir, entry_dir)
+        except OSError:
+            # 다른 프로세스가 같은 항목을 먼저 저장했거나 디스크 오류 — 캐시는 건너뜀
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            return
+        self.evict()
+
+    def entries(self):
+        """(마지막 사용 시각, 크기, 항목 폴더) 목록"""
+        try:
+            names = os.listdir(self.cache_dir)
+        except OSError:
+            return []
+        result = []
+        for name in names:
+            if name.startswith('.'):
+                continue  # 저장 중인 임시 폴더
+            entry_dir = os.path.join(self.cache_dir, name)
+            manifest_path = os.path.join(entry_dir, MANIFEST_FILE)
+            try:
+                mtime = os.stat(manifest_path).st_mtime
+                with open(manifest_path, 'r', encoding='utf-8') as f:
+                    size = json.load(f).get('size', 0)
+            except (OSError, ValueError):
+                continue
+            result.append((mtime, size, entry_dir))
+        return result
+
+    def evict(self):
+        """전체 크기가 max_bytes 이하가 될 때까지 가장 오래 쓰지 않은 항목 삭제"""
+        entries = sorted(self.entries())
+        total = sum(size for _, size, _ in entries)
+        for _, size, entry_dir in entries:
+            if total <= self.max_bytes:
+                break
+            shutil.rmtree(entry_dir, ignore_errors=True)
+            total -= size
+
+    def clear(self):
+        """캐시 폴더 전체 삭제"""
+        shutil.rmtree(self.cache_dir, ignore_errors=True)
@@ -1,33 +1,28 @@
 """
 convert.py - HWPX ↔ Markdown 통합 변환 CLI
 사용법:
-    python convert.py to-md     input.hwpx [-o output.md]
-    python convert.py to-hwpx   input.md  [-o output.hwpx] [-r reference.hwpx]
+    python convert.py to-md     input.hwpx [-o output.md] [--stream] [--keep-bmp]
+    python convert.py to-hwpx   input.md  [-o output.hwpx] [-r reference.hwpx] [--engine auto]
     python convert.py smart     원본.hwpx 편집된.md [-o output.hwpx]
     python convert.py auto      원본.hwpx 편집된.md [-o output.hwpx] [--strip-lineseg]
+    python convert.py batch to-md 입력폴더 [-o 출력폴더] [--jobs N] [--force]
+    python convert.py batch smart manifest.tsv [--jobs N] [--force]
+    python convert.py batch to-hwpx 마크다운폴더 [-o 출력폴더] [-r 양식.hwpx] [--jobs N]
 """
 import os
 import sys
 import argparse
-import io
-import zipfile
-from lxml import etree
 from hwpx_to_md import convert_hwpx_to_md
 from md_to_hwpx import convert_md_to_hwpx
-from smart_replace import (
-    smart_replace,
-    parse_markdown_tables,
-    parse_markdown_paragraphs,
-    extract_xml_tables,
-    extract_xml_paragraphs,
-    detect_namespace_version,
-    _find_section_files,
-    NS_2011,
-    NS_2024,
-)
-
-
-def auto_detect_and_process(original_hwpx, edited_md, output_hwpx=None, strip_lineseg=False):
+from hwpx_document import HwpxDocument
+from section_transforms import strip_linesegarray
+from batch import batch_to_md, batch_smart, batch_to_hwpx
+from md_blocks import tokenize_markdown, markdown_tables, markdown_paragraphs
+from smart_replace import smart_replace
+
+
+def auto_detect_and_process(original_hwpx, edited_md, output_hwpx=None, strip_lineseg=False,
+                            jobs=1):
     """원본 HWPX와 편집된 마크다운을 비교하여 변경 유형 감지 및 자동 처리.
 
     변경 유형:
@@ -39,6 +34,7 @@ def auto_detect_and_process(original_hwpx, edited_md, output_hwpx=None, strip_li
         edited_md: 편집된 마크다운 파일 경로
         output_hwpx: 출력 HWPX 파일 경로 (None이면 자동 생성)
         strip_lineseg: linesegarray 제거 여부
+        jobs: 섹션 병렬 처리 프로세스 수 (1이면 직렬)
     """
     if output_hwpx is None:
         base = os.path.splitext(edited_md)[0]
@@ -53,40 +49,19 @@ def auto_detect_and_process(original_hwpx, edited_md, output_hwpx=None, strip_li
     # 1. 마크다운에서 테이블 + 문단 추출
     with open(edited_md, 'r', encoding='utf-8') as f:
         md_text = f.read()
-    md_tables = parse_markdown_tables(md_text)
-    md_paragraphs = parse_markdown_paragraphs(md_text)
-
-    # 2. 원본 HWPX에서 테이블 + 문단 추출
-    with open(original_hwpx, 'rb') as f:
-        hwpx_bytes = f.read()
-
-    z_in = zipfile.ZipFile(io.BytesIO(hwpx_bytes), 'r')
-    section_files = _find_section_files(z_in)
+    blocks = tokenize_markdown(md_text)
+    md_tables = markdown_tables(blocks)
+    md_paragraphs = markdown_paragraphs(blocks)
 
-    if not section_files:
+    # 2. 원본 HWPX에서 테이블 + 문단 추출 (섹션은 여기서 한 번만 파싱, smart_replace와 공유)
+    document = HwpxDocument(original_hwpx)
+    if not document.sections:
         print("오류: Contents/section*.xml을 찾을 수 없습니다.", file=sys.stderr)
-        z_in.close()
         sys.exit(1)
 
-    # 네임스페이스 감지
-    _, first_section = section_files[0]
-    sec_xml_bytes = z_in.read(first_section)
-    ns_ver = detect_namespace_version(sec_xml_bytes)
-    NS = NS_2024.copy() if ns_ver == '2024' else NS_2011.copy()
-
-    # 모든 섹션에서 테이블 + 문단 추출
-    all_xml_tables = []
-    all_xml_paragraphs = []
-
-    for _, sec_filename in section_files:
-        sec_xml_bytes = z_in.read(sec_filename)
-        section_root = etree.fromstring(sec_xml_bytes)
-        xml_tables = extract_xml_tables(section_root)
-        xml_paragraphs = extract_xml_paragraphs(section_root)
-        all_xml_tables.extend(xml_tables)
-        all_xml_paragraphs.extend(xml_paragraphs)
-
-    z_in.close()
+    document.analyze(jobs=jobs)
+    all_xml_tables = document.tables
+    all_xml_paragraphs = document.paragraphs
 
     # 3. 변경 유형 감지
     print("변경 사항 분석:")
@@ -149,65 +124,16 @@ def auto_detect_and_process(original_hwpx, edited_md, output_hwpx=None, strip_li
         print("스마트 교체 모드로 진행합니다.")
         print()
 
-    # 5. smart_replace 실행
-    result_path = smart_replace(original_hwpx, edited_md, output_hwpx)
-
-    # 6. linesegarray 제거 (옵션)
+    # 5. smart_replace 실행 (linesegarray 제거는 같은 섹션 재작성 단계에서 적용 — 아카이브 1회 쓰기)
+    transforms = (strip_linesegarray,) if strip_lineseg else ()
+    result_path = smart_replace(original_hwpx, edited_md, output_hwpx,
+                                document=document, jobs=jobs, transforms=transforms)
     if strip_lineseg:
-        print()
-        print("linesegarray 제거 중...")
-        _strip_linesegarray(result_path)
         print(f"linesegarray 제거 완료: {result_path}")
 
     return result_path
 
 
-def _strip_linesegarray(hwpx_path):
-    """HWPX 파일에서 모든 linesegarray 태그 제거.
-
-    linesegarray는 줄 나눔 정보를 담고 있으나, 텍스트 변경 시 무효화되어
-    한글에서 렌더링 오류를 유발할 수 있습니다. 제거 시 한글이 자동으로 재계산합니다.
-    """
-    with open(hwpx_path, 'rb') as f:
-        hwpx_bytes = f.read()
-
-    z_in = zipfile.ZipFile(io.BytesIO(hwpx_bytes), 'r')
-    section_files = _find_section_files(z_in)
-
-    modified_sections = {}
-
-    for _, sec_filename in section_files:
-        raw_xml = z_in.read(sec_filename).decode('utf-8')
-
-        # linesegarray 태그 제거 (내용 포함 형태 + 자기 닫힘 형태 모두)
-        import re
-        modified_xml = re.sub(r'<[\w]+:linesegarray[^>]*>.*?</[\w]+:linesegarray>', '', raw_xml, flags=re.DOTALL)
-        modified_xml = re.sub(r'<[\w]+:linesegarray[^>]*?/>', '', modified_xml)
-
-        if modified_xml != raw_xml:
-            modified_sections[sec_filename] = modified_xml.encode('utf-8')
-
-    # 수정된 섹션으로 HWPX 재구성
-    if modified_sections:
-        buf = io.BytesIO()
-        with zipfile.ZipFile(buf, 'w', zipfile.ZIP_DEFLATED) as z_out:
-            for item in z_in.infolist():
-                if item.filename in modified_sections:
-                    z_out.writestr(item.filename, modified_sections[item.filename])
-                elif item.filename == 'mimetype':
-                    z_out.writestr(item, z_in.read(item.filename),
-                                   compress_type=zipfile.ZIP_STORED)
-                else:
-                    z_out.writestr(item, z_in.read(item.filename))
-
-        z_in.close()
-
-        with open(hwpx_path, 'wb') as f:
-            f.write(buf.getvalue())
-    else:
-        z_in.close()
-
-
 def main():
     parser = argparse.ArgumentParser(
         description='HWPX ↔ Markdown 변환 파이프라인',
@@ -218,18 +144,24 @@ def main():
     python convert.py to-md  신청서.hwpx
     python convert.py to-md  신청서.hwpx -o output/신청서.md
 
-  markdown -> hwpx (pypandoc-hwpx 경유):
+  markdown -> hwpx (양식이 있으면 native 작성기, 없으면 pypandoc-hwpx 경유):
     python convert.py to-hwpx 사업계획서.md
     python convert.py to-hwpx 사업계획서.md -r 원본양식.hwpx -o 최종본.hwpx
 
   스마트 교체 (원본 구조 보존, 텍스트만 반영 - 권장):
     python convert.py smart 원본.hwpx 편집된.md
     python convert.py smart 원본.hwpx 편집된.md -o 최종본.hwpx
+    python convert.py smart 원본.hwpx 편집된.md --jobs 4   (다중 섹션 병렬 처리)
 
   자동 변경 감지 및 처리:
     python convert.py auto 원본.hwpx 편집된.md
     python convert.py auto 원본.hwpx 편집된.md -o 최종본.hwpx --strip-lineseg
 
+  폴더 일괄 변환 (프로세스 풀, 최신 출력은 건너뜀):
+    python convert.py batch to-md 양식폴더 -o 변환결과 --jobs 8
+    python convert.py batch smart manifest.tsv --jobs 8
+    python convert.py batch to-hwpx work -r 원본양식.hwpx -o 최종본 --jobs 4
+
   왕복 변환 워크플로:
     python convert.py to-md  원본.hwpx -o 작업폴더/문서.md
     # ... AI로 마크다운 편집 ...
@@ -244,12 +176,27 @@ def main():
     md_parser.add_argument('input', help='입력 HWPX 파일')
     md_parser.add_argument('-o', '--output', help='출력 마크다운 파일 경로')
     md_parser.add_argument('--no-images', action='store_true', help='이미지 추출 안 함')
+    md_parser.add_argument('--stream', action='store_true',
+                           help='섹션을 스트리밍 파싱 (대용량 문서 메모리 절약)')
+    md_parser.add_argument('--keep-bmp', action='store_true',
+                           help='BMP 이미지를 PNG로 변환하지 않고 그대로 저장')
+    md_parser.add_argument('--no-cache', action='store_true',
+                           help='변환 결과 캐시를 쓰지 않고 항상 다시 변환')
+    md_parser.add_argument('--image-workers', type=int, default=4,
+                           help='이미지 쓰기/재인코딩 스레드 수 (기본 4, 0 = 직렬)')
+    md_parser.add_argument('--max-image-mb', type=float, default=64,
+                           help='이보다 큰 이미지는 스트리밍 복사, 재인코딩 생략 (기본 64)')
+    md_parser.add_argument('--source-map', action='store_true',
+                           help='마크다운 옆에 소스 맵(<이름>.srcmap.jsonl) 저장 (smart용)')
 
     # to-hwpx 서브커맨드
-    hwpx_parser = subparsers.add_parser('to-hwpx', help='Markdown -> HWPX 변환 (pypandoc-hwpx)')
+    hwpx_parser = subparsers.add_parser('to-hwpx', help='Markdown -> HWPX 변환 (native / pypandoc-hwpx)')
     hwpx_parser.add_argument('input', help='입력 마크다운 파일')
     hwpx_parser.add_argument('-o', '--output', help='출력 HWPX 파일 경로')
     hwpx_parser.add_argument('-r', '--reference-doc', help='양식 템플릿 원본 HWPX')
+    hwpx_parser.add_argument('--engine', choices=('auto', 'native', 'pandoc'), default='auto',
+                             help='변환 엔진 (기본 auto: 양식이 있고 이미지/수식/각주가 없으면 '
+                                  'native, 아니면 pypandoc-hwpx)')
 
     # smart 서브커맨드
     smart_parser = subparsers.add_parser(
@@ -258,6 +205,12 @@ def main():
     smart_parser.add_argument('original', help='원본 HWPX 파일 경로')
     smart_parser.add_argument('markdown', help='편집된 마크다운 파일 경로')
     smart_parser.add_argument('-o', '--output', help='출력 HWPX 파일 경로')
+    smart_parser.add_argument('-j', '--jobs', type=int, default=1,
+                              help='섹션 병렬 처리 프로세스 수 (기본 1 = 직렬)')
+    smart_parser.add_argument('--original-md',
+                              help='to-md가 만든 편집 전 마크다운 (주면 바뀐 블록만 대조)')
+    smart_parser.add_argument('--source-map',
+                              help='to-md --source-map이 만든 소스 맵 (줄 범위로 XML 위치 대조)')
 
     # auto 서브커맨드
     auto_parser = subparsers.add_parser(
@@ -268,6 +221,41 @@ def main():
     auto_parser.add_argument('-o', '--output', help='출력 HWPX 파일 경로')
     auto_parser.add_argument('--strip-lineseg', action='store_true',
                              help='linesegarray 제거 (기본: 유지)')
+    auto_parser.add_argument('-j', '--jobs', type=int, default=1,
+                             help='섹션 병렬 처리 프로세스 수 (기본 1 = 직렬)')
+
+    # batch 서브커맨드 (batch to-md / batch smart)
+    batch_parser = subparsers.add_parser('batch', help='폴더/매니페스트 일괄 변환 (프로세스 풀)')
+    batch_sub = batch_parser.add_subparsers(dest='batch_command', help='일괄 작업 종류')
+
+    batch_md_parser = batch_sub.add_parser('to-md', help='폴더 안의 모든 HWPX -> Markdown')
+    batch_md_parser.add_argument('input_dir', help='입력 폴더 (하위 폴더 포함)')
+    batch_md_parser.add_argument('-o', '--output-dir', help='출력 폴더 (기본: <입력폴더>_md)')
+    batch_md_parser.add_argument('--no-images', action='store_true', help='이미지 추출 안 함')
+    batch_md_parser.add_argument('--stream', action='store_true',
+                                 help='섹션을 iterparse 스트리밍으로 처리')
+    batch_md_parser.add_argument('--keep-bmp', action='store_true',
+                                 help='BMP 이미지를 PNG로 변환하지 않고 그대로 저장')
+    batch_md_parser.add_argument('--no-cache', action='store_true',
+                                 help='변환 결과 캐시를 쓰지 않고 항상 다시 변환')
+
+    batch_smart_parser = batch_sub.add_parser(
+        'smart', help='매니페스트의 (원본 HWPX, 편집 MD) 쌍마다 스마트 교체')
+    batch_smart_parser.add_argument('manifest', help='매니페스트 (.json 또는 탭 구분 텍스트)')
+
+    batch_hwpx_parser = batch_sub.add_parser(
+        'to-hwpx', help='폴더 안의 모든 Markdown -> HWPX (pypandoc-hwpx는 상주 워커 풀)')
+    batch_hwpx_parser.add_argument('input_dir', help='입력 폴더 (하위 폴더 포함)')
+    batch_hwpx_parser.add_argument('-o', '--output-dir', help='출력 폴더 (기본: <입력폴더>_hwpx)')
+    batch_hwpx_parser.add_argument('-r', '--reference-doc', help='양식 템플릿 원본 HWPX')
+    batch_hwpx_parser.add_argument('--engine', choices=('auto', 'native', 'pandoc'),
+                                   default='auto', help='변환 엔진 (to-hwpx와 동일)')
+
+    for sub in (batch_md_parser, batch_smart_parser, batch_hwpx_parser):
+        sub.add_argument('-j', '--jobs', type=int, default=None,
+                         help='워커 프로세스 수 (기본: CPU 수)')
+        sub.add_argument('--force', action='store_true', help='최신 출력도 다시 변환')
+        sub.add_argument('--summary', help='실패 요약 JSON 경로')
 
     args = parser.parse_args()
 
@@ -276,14 +264,37 @@ def main():
         sys.exit(1)
 
     if args.command == 'to-md':
-        convert_hwpx_to_md(args.input, args.output, extract_images=not args.no_images)
+        convert_hwpx_to_md(args.input, args.output, extract_images=not args.no_images,
+                           streaming=args.stream, convert_bmp=not args.keep_bmp,
+                           image_workers=args.image_workers,
+                           max_image_bytes=int(args.max_image_mb * 1024 * 1024),
+                           use_cache=not args.no_cache, source_map=args.source_map)
     elif args.command == 'to-hwpx':
-        convert_md_to_hwpx(args.input, args.output, args.reference_doc)
+        convert_md_to_hwpx(args.input, args.output, args.reference_doc, engine=args.engine)
     elif args.command == 'smart':
-        smart_replace(args.original, args.markdown, args.output)
+        smart_replace(args.original, args.markdown, args.output, jobs=args.jobs,
+                      original_md=args.original_md, source_map=args.source_map)
     elif args.command == 'auto':
         auto_detect_and_process(args.original, args.markdown, args.output,
-                                strip_lineseg=args.strip_lineseg)
+                                strip_lineseg=args.strip_lineseg, jobs=args.jobs)
+    elif args.command == 'batch':
+        if args.batch_command is None:
+            batch_parser.print_help()
+            sys.exit(1)
+        if args.batch_command == 'to-md':
+            summary = batch_to_md(args.input_dir, args.output_dir, jobs=args.jobs, force=args.force,
+                                  extract_images=not args.no_images, streaming=args.stream,
+                                  convert_bmp=not args.keep_bmp, use_cache=not args.no_cache,
+                                  summary_path=args.summary)
+        elif args.batch_command == 'to-hwpx':
+            summary = batch_to_hwpx(args.input_dir, args.output_dir, args.reference_doc,
+                                    engine=args.engine, jobs=args.jobs, force=args.force,
+                                    summary_path=args.summary)
+        else:
+            summary = batch_smart(args.manifest, jobs=args.jobs, force=args.force,
+                                  summary_path=args.summary)
+        if summary['failed']:
+            sys.exit(1)
 
 
 if __name__ == '__main__':
@@ -0,0 +1,224 @@
+"""
+hwpx_document.py - 한 번만 파싱하는 HWPX 문서 모델
+
+convert.py auto, smart_replace(), hwpx_to_md가 같은 HWPX를 각자 열고
+섹션마다 etree.fromstring을 반복하지 않도록, ZIP과 섹션 XML을 한 번 읽어
+섹션 / 테이블 / 문단 / 스타일 맵을 공유합니다.
+
+lxml 트리는 읽기 전용으로만 사용합니다 (직렬화는 smart_replace가
+원본 문자열을 직접 치환하여 수행).
+
+섹션 분석 결과(테이블/문단/텍스트 노드 번호)와 텍스트 노드 인덱스는 섹션 내용
+해시로 프로세스 안에 캐시합니다 (최근 ANALYSIS_CACHE_SIZE개 섹션, LRU).
+대시보드에서 같은 양식으로 반복 저장하거나 같은 파일을 다시 올려 새 HwpxDocument를
+만들어도 파싱/추출을 다시 하지 않고 마크다운 비교와 치환만 수행합니다.
+캐시된 결과는 여러 문서가 공유하므로 읽기 전용으로만 사용합니다.
+대시보드 작업 스레드가 동시에 조회/저장하므로 캐시 갱신은 _cache_lock 안에서만 합니다.
+"""
+import hashlib
+import threading
+import zipfile
+from collections import OrderedDict
+from lxml import etree
+
+import hwpx_to_md
+import smart_replace
+from smart_replace import detect_namespace_version, detect_close_tag, _find_section_files
+from text_nodes import TextNodeIndex
+
+HEADER_FILE = 'Contents/header.xml'
+ANALYSIS_CACHE_SIZE = 32
+
+# (섹션 내용 해시, 네임스페이스 버전) -> _analyze_root() 결과
+_analysis_cache = OrderedDict()
+# (섹션 내용 해시, 닫기 태그) -> TextNodeIndex
+_index_cache = OrderedDict()
+# 두 캐시의 조회(move_to_end)/저장(popitem)이 스레드 사이에서 섞이지 않도록
+_cache_lock = threading.Lock()
+
+
+def _cache_get(cache, key):
+    """LRU 캐시 조회 (적중 시 가장 최근으로 이동)"""
+    with _cache_lock:
+        value = cache.get(key)
+        if value is not None:
+            cache.move_to_end(key)
+        return value
+
+
+def _cache_put(cache, key, value):
+    """LRU 캐시 저장 (ANALYSIS_CACHE_SIZE 초과분은 오래된 것부터 제거)"""
+    with _cache_lock:
+        cache[key] = value
+        cache.move_to_end(key)
+        while len(cache) > ANALYSIS_CACHE_SIZE:
+            cache.popitem(last=False)
+
+
+def clear_analysis_cache():
+    """섹션 분석/텍스트 노드 인덱스 캐시 비우기"""
+    with _cache_lock:
+        _analysis_cache.clear()
+        _index_cache.clear()
+
+
+def _analyze_root(root):
+    """섹션 루트에서 테이블/문단/텍스트 노드 번호 추출 (lxml 객체 없는 pickle 가능 dict)"""
+    ordinals = smart_replace.text_node_ordinals(root)
+    entries = smart_replace.extract_xml_paragraph_entries(root, ordinals)
+    return {
+        'tables': smart_replace.extract_xml_tables(root, ordinals),
+        'paragraphs': [entry['text'] for entry in entries],
+        'para_nodes': [entry['nodes'] for entry in entries],
+        'text_node_count': len(ordinals),
+    }
+
+
+def _analyze_section_job(job):
+    """프로세스 풀 작업: (raw_bytes, ns_version) → _analyze_root() 결과"""
+    raw_bytes, ns_version = job
+    smart_replace.NS = (smart_replace.NS_2024 if ns_version == '2024' else smart_replace.NS_2011).copy()
+    return _analyze_root(etree.fromstring(raw_bytes))
+
+
+class HwpxSection:
+    """섹션 하나 — 원본 바이트와 지연 생성되는 문자열/트리/분석 결과"""
+
+    def __init__(self, filename, raw_bytes):
+        self.filename = filename
+        self.raw_bytes = raw_bytes
+        self.tables = None       # extract_xml_tables() 결과 (HwpxDocument.analyze()에서 채움)
+        self.paragraphs = None   # extract_xml_paragraphs() 결과
+        self.para_nodes = None   # paragraphs와 같은 순서의 텍스트 노드 번호 tuple 목록
+        self.text_node_count = None  # 섹션 전체 <hp:t> 수 (TextNodeIndex와 대조용)
+        self._raw_xml = None
+        self._root = None
+        self._digest = None
+
+    @property
+    def digest(self):
+        """섹션 바이트의 SHA-256 (분석 캐시 키)"""
+        if self._digest is None:
+            self._digest = hashlib.sha256(self.raw_bytes).hexdigest()
+        return self._digest
+
+    @property
+    def raw_xml(self):
+        """UTF-8 디코딩된 섹션 XML 문자열"""
+        if self._raw_xml is None:
+            self._raw_xml = self.raw_bytes.decode('utf-8')
+        return self._raw_xml
+
+    @property
+    def root(self):
+        """lxml 루트 요소 (처음 접근 시 한 번만 파싱)"""
+        if self._root is None:
+            self._root = etree.fromstring(self.raw_bytes)
+        return self._root
+
+    def text_index(self, close_tag):
+        """이 섹션의 TextNodeIndex (같은 내용이면 캐시된 인덱스 재사용)"""
+        key = (self.digest, close_tag)
+        index = _cache_get(_index_cache, key)
+        if index is None:
+            index = TextNodeIndex(self.raw_xml, close_tag)
+            _cache_put(_index_cache, key, index)
+        return index
+
+
+class HwpxDocument:
+    """HWPX 파일을 한 번 열어 섹션/테이블/문단/스타일 정보를 공유하는 모델
+
+    사용 예:
+        doc = HwpxDocument('원본.hwpx')
+        doc.tables                      # 전체 섹션 테이블 (섹션 순서)
+        HwpxToMarkdown(path, document=doc).convert()
+        smart_replace(path, 'edited.md', document=doc)
+    """
+
+    def __init__(self, hwpx_path):
+        self.path = hwpx_path
+        with zipfile.ZipFile(hwpx_path, 'r') as z:
+            self.namelist = z.namelist()
+            self.sections = [HwpxSection(name, z.read(name))
+                             for _, name in _find_section_files(z)]
+            self.header_bytes = z.read(HEADER_FILE) if HEADER_FILE in self.namelist else None
+
+        self._by_name = {sec.filename: sec for sec in self.sections}
+        self._style_map = None
+
+        # 네임스페이스 버전과 텍스트 닫기 태그는 첫 섹션 기준 (smart_replace와 동일)
+        if self.sections:
+            self.ns_version = detect_namespace_version(self.sections[0].raw_bytes)
+            self.close_tag = detect_close_tag(self.sections[0].raw_xml)
+        else:
+            self.ns_version = '2011'
+            self.close_tag = '</hp:t>'
+
+    def use_namespace(self):
+        """hwpx_to_md / smart_replace 모듈 전역 NS를 이 문서의 버전으로 설정"""
+        is_2024 = self.ns_version == '2024'
+        hwpx_to_md.NS = (hwpx_to_md.NS_2024 if is_2024 else hwpx_to_md.NS_2011).copy()
+        smart_replace.NS = (smart_replace.NS_2024 if is_2024 else smart_replace.NS_2011).copy()
+
+    def section(self, filename):
+        """파일명(예: 'Contents/section0.xml')으로 섹션 조회. 없으면 None."""
+        return self._by_name.get(filename)
+
+    @property
+    def style_map(self):
+        """header.xml 기반 HwpxStyleMap (header.xml이 없으면 None)"""
+        if self._style_map is None and self.header_bytes is not None:
+            self.use_namespace()
+            self._style_map = hwpx_to_md.HwpxStyleMap(self.header_bytes)
+        return self._style_map
+
+    def analyze(self, jobs=1):
+        """모든 섹션의 테이블/문단을 추출 (이미 분석된 섹션은 건너뜀)
+
+        같은 내용의 섹션을 이전에 분석했으면 (다른 HwpxDocument에서라도)
+        캐시된 결과를 그대로 씁니다.
+
+        Args:
+            jobs: 2 이상이면 섹션 파싱/추출을 프로세스 풀에서 병렬 수행.
+                결과는 섹션 순서대로 모이므로 직렬 실행과 동일합니다.
+                (워커가 파싱한 트리는 부모로 오지 않으므로 sec.root는 필요 시 다시 파싱)
+        """
+        self.use_namespace()
+        pending = []
+        for sec in self.sections:
+            if sec.tables is not None:
+                continue
+            cached = _cache_get(_analysis_cache, (sec.digest, self.ns_version))
+            if cached is None:
+                pending.append(sec)
+            else:
+                self._apply_analysis(sec, cached)
+
+        if jobs > 1 and len(pending) > 1:
+            results = smart_replace._run_jobs(
+                _analyze_section_job, [(sec.raw_bytes, self.ns_version) for sec in pending], jobs)
+        else:
+            results = [_analyze_root(sec.root) for sec in pending]
+
+        for sec, result in zip(pending, results):
+            _cache_put(_analysis_cache, (sec.digest, self.ns_version), result)
+            self._apply_analysis(sec, result)
+        return self
+
+    @staticmethod
+    def _apply_analysis(sec, result):
+        for key, value in result.items():
+            setattr(sec, key, value)
+
+    @property
+    def tables(self):
+        """전체 섹션의 테이블 목록 (섹션 순서대로 이어붙임)"""
+        self.analyze()
+        return [tbl for sec in self.sections for tbl in sec.tables]
+
+    @property
+    def paragraphs(self):
+        """전체 섹션의 문단 텍스트 목록 (섹션 순서대로 이어붙임)"""
+        self.analyze()
+        return [para for sec in self.sections for para in sec.paragraphs]
@@ -4,11 +4,17 @@ HWPX 파일(ZIP 내부 XML)을 파싱하여 Markdown으로 변환합니다.
 """
 import os
 import sys
+import copy
 import zipfile
 import argparse
 import json
 from lxml import etree
 
+from image_store import ImageStore, DEFAULT_WORKERS, DEFAULT_MAX_IMAGE_BYTES, pillow_available
+from conversion_cache import ConversionCache
+from source_map import (SourceMap, SOURCE_MAP_VERSION, source_map_path, zip_member_digest,
+                        paragraph_entry, table_entry, finalize_entries)
+
 
 # HWPX XML 네임스페이스 — 2011 (한컴) / 2024 (OWPML 표준) 자동 감지
 NS_2011 = {
@@ -34,6 +40,42 @@ NS_2024 = {
 NS = dict(NS_2011)
 
 
+# _process_paragraph()가 문단 하위에서 찾는 요소 (hp 네임스페이스 localname)
+FORM_TAGS = ('checkBtn', 'radioBtn', 'comboBox', 'btn', 'edit')
+SHAPE_TAGS = ('rect', 'ellipse', 'arc', 'polygon', 'curve', 'connectLine', 'container')
+PARA_ELEMENT_KINDS = ('tbl', 'pic', 'equation', 'textart', 'ole', 'colPr',
+                      'footnote', 'endnote') + FORM_TAGS + SHAPE_TAGS
+
+_kind_tag_maps = {}  # hp 네임스페이스 URI -> {Clark 태그: localname}
+
+
+def _para_kind_tags(hp_ns):
+    """hp 네임스페이스별 {'{ns}tbl': 'tbl', ...} 매핑 (캐시)"""
+    tag_map = _kind_tag_maps.get(hp_ns)
+    if tag_map is None:
+        tag_map = {f'{{{hp_ns}}}{name}': name for name in PARA_ELEMENT_KINDS}
+        _kind_tag_maps[hp_ns] = tag_map
+    return tag_map
+
+
+def classify_descendants(para):
+    """문단 하위 요소를 한 번만 순회하여 종류별 버킷으로 분류.
+
+    findall('.//hp:xxx')를 종류마다 반복하면 문단 서브트리를 20번 가까이
+    다시 훑게 되므로, 문서 순서 순회 한 번으로 모든 버킷을 채웁니다.
+    각 버킷 내부 순서는 findall()과 같은 문서 순서입니다.
+
+    Returns:
+        dict: {localname: [요소, ...]} — PARA_ELEMENT_KINDS의 모든 키 포함
+    """
+    tag_map = _para_kind_tags(NS['hp'])
+    buckets = {name: [] for name in PARA_ELEMENT_KINDS}
+    # 태그 필터는 lxml(C) 쪽에서 처리되므로 관심 요소만 파이썬으로 넘어옴
+    for el in para.iterdescendants(*tag_map):
+        buckets[tag_map[el.tag]].append(el)
+    return buckets
+
+
 def detect_namespace_version(xml_bytes):
     """XML 바이트에서 네임스페이스 버전 감지 (2011 vs 2024)"""
     snippet = xml_bytes[:2000] if isinstance(xml_bytes, bytes) else xml_bytes.encode()[:2000]
@@ -45,35 +87,43 @@ def detect_namespace_version(xml_bytes):
 class HwpxStyleMap:
     """header.xml에서 스타일 정보를 추출하여 제목 레벨 등을 판별"""
 
-    def __init__(self, header_xml_bytes):
+    def __init__(self, header_xml_bytes, ns=None):
+        """
+        Args:
+            ns: 네임스페이스 맵 (None이면 모듈 NS — hwpx_writer는 전역을 건드리지 않도록
+                문서 버전의 맵을 직접 넘김)
+        """
         self.root = etree.fromstring(header_xml_bytes)
+        self.ns = ns or NS
         self.outline_levels = {}   # paraPrIDRef -> outline_level (0-based)
         self.char_props = {}       # charPrID -> {bold, italic, underline, ...}
         self._parse_outline_levels()
         self._parse_char_properties()
 
     def _parse_outline_levels(self):
-        for para_pr in self.root.findall('.//hh:paraPr', NS):
+        ns = self.ns
+        for para_pr in self.root.findall('.//hh:paraPr', ns):
             pr_id = para_pr.get('id')
-            heading = para_pr.find('.//hh:heading', NS)
+            heading = para_pr.find('.//hh:heading', ns)
             if heading is not None and heading.get('type') == 'OUTLINE':
                 level_str = heading.get('level')
                 if level_str is not None:
                     self.outline_levels[pr_id] = int(level_str)
 
     def _parse_char_properties(self):
-        for char_pr in self.root.findall('.//hh:charPr', NS):
+        ns = self.ns
+        for char_pr in self.root.findall('.//hh:charPr', ns):
             cp_id = char_pr.get('id')
             props = {
-                'bold': char_pr.find('hh:bold', NS) is not None,
-                'italic': char_pr.find('hh:italic', NS) is not None,
+                'bold': char_pr.find('hh:bold', ns) is not None,
+                'italic': char_pr.find('hh:italic', ns) is not None,
                 'underline': False,
                 'strikeout': False,
             }
-            ul = char_pr.find('hh:underline', NS)
+            ul = char_pr.find('hh:underline', ns)
             if ul is not None and ul.get('type', 'NONE') != 'NONE':
                 props['underline'] = True
-            st = char_pr.find('hh:strikeout', NS)
+            st = char_pr.find('hh:strikeout', ns)
             if st is not None and st.get('shape', 'NONE') != 'NONE':
                 props['strikeout'] = True
             self.char_props[cp_id] = props
@@ -92,13 +142,27 @@ class HwpxStyleMap:
 class HwpxToMarkdown:
     """HWPX 파일을 Markdown으로 변환"""
 
-    def __init__(self, hwpx_path, output_dir=None, extract_images=True):
+    def __init__(self, hwpx_path, output_dir=None, extract_images=True, streaming=False,
+                 document=None, convert_bmp=True, image_workers=DEFAULT_WORKERS,
+                 max_image_bytes=DEFAULT_MAX_IMAGE_BYTES, source_map=False, progress=None):
         self.hwpx_path = hwpx_path
         self.output_dir = output_dir or os.path.dirname(hwpx_path) or '.'
         self.extract_images = extract_images
+        self.convert_bmp = convert_bmp  # False면 BMP를 PNG로 재인코딩하지 않고 그대로 저장
+        self.image_workers = image_workers  # 이미지 쓰기/재인코딩 스레드 수 (0이면 직렬)
+        self.max_image_bytes = max_image_bytes  # 이보다 큰 이미지는 스트리밍 복사, 재인코딩 생략
+        self.streaming = streaming  # True면 섹션을 iterparse로 스트리밍 처리
+        self.document = document  # 이미 파싱한 HwpxDocument (있으면 섹션/스타일 재사용)
+        self.build_source_map = source_map  # True면 convert() 후 self.source_map에 소스 맵
+        self.progress = progress  # progress(끝난 섹션 수, 전체 섹션 수, 섹션 파일) — 예외를 던지면 중단
+        self.source_map = None  # SourceMap — 마크다운 줄 범위 ↔ 섹션/요소/텍스트 노드
+        self._sources = None  # convert() 중의 소스 맵 항목 (줄 목록 원소 범위 '_range')
+        self._source_sections = None  # 소스 맵 헤더 — 섹션 파일 -> {'sha256', 'text_nodes'}
         self.images_dir = os.path.join(self.output_dir, 'images')
         self.style_map = None
-        self.image_map = {}  # binaryItemIDRef -> extracted_filename
+        self.image_map = {}  # binaryItemIDRef -> extracted_filename (본문에서 참조된 이미지만)
+        self.bin_data = {}  # binaryItemIDRef -> BinData/ 멤버 이름
+        self._images = None  # convert() 중의 ImageStore (참조 시점 추출용)
         self.template_info = {}  # 양식 보존용 메타데이터
         self.footnotes = []  # (ref_num, text) 튜플 리스트
         self.endnotes = []  # (ref_num, text) 튜플 리스트
@@ -111,49 +175,47 @@ class HwpxToMarkdown:
         with zipfile.ZipFile(self.hwpx_path, 'r') as z:
             # 0. 네임스페이스 버전 자동 감지 (인스턴스별)
             section_files_raw = [n for n in z.namelist() if n.startswith('Contents/section')]
-            if section_files_raw:
-                sample_xml = z.read(section_files_raw[0])
+            if self.document is not None:
+                self.document.use_namespace()  # 모듈 전역 NS 설정
+            elif section_files_raw:
+                # 감지에는 앞부분만 필요 — 섹션 전체를 읽지 않음
+                with z.open(section_files_raw[0]) as f:
+                    sample_xml = f.read(2000)
                 ns_version = detect_namespace_version(sample_xml)
                 NS = NS_2024.copy() if ns_version == '2024' else NS_2011.copy()
             else:
                 NS = NS_2011.copy()
 
             # 1. 헤더(스타일 정보) 파싱
-            if 'Contents/header.xml' in z.namelist():
+            if self.document is not None:
+                self.style_map = self.document.style_map
+            elif 'Contents/header.xml' in z.namelist():
                 header_bytes = z.read('Contents/header.xml')
                 self.style_map = HwpxStyleMap(header_bytes)
 
-            # 2. 이미지 추출
+            # 2. 이미지 목록 (실제 추출은 _process_image가 참조할 때 — 쓰기/재인코딩은
+            #    스레드 풀에서 섹션 변환과 동시에 진행, 반환 전에 모두 기다림)
+            self.bin_data = self._index_bin_data(z)
+            if self.build_source_map:
+                self._sources = []
+                self._source_sections = {}
             if self.extract_images:
-                self._extract_images(z)
-
-            # 3. 다중 섹션 찾기 및 정렬
-            section_files = self._find_section_files(z)
-
-            # 4. 각 섹션 변환 및 병합
-            all_md_lines = []
-            first_section = True
-
-            for section_file in section_files:
-                section_xml = z.read(section_file)
-                root = etree.fromstring(section_xml)
-
-                # 첫 섹션에서 양식 정보 저장
-                if first_section:
-                    self._save_template_info(z, root)
-                    first_section = False
-
-                # 섹션 변환
-                md_lines = self._process_section(root)
-                all_md_lines.extend(md_lines)
-
-                # 섹션 구분자 추가 (마지막 섹션 제외)
-                if section_file != section_files[-1]:
-                    all_md_lines.append('')
-                    all_md_lines.append('---')
-                    all_md_lines.append('')
+                self._images = ImageStore(z, self.images_dir, convert_bmp=self.convert_bmp,
+                                          workers=self.image_workers,
+                                          max_image_bytes=self.max_image_bytes)
+            try:
+                all_md_lines = self._convert_sections(z)
+            except BaseException:
+                if self._images is not None:
+                    self._images.close(wait_only=True)
+                raise
+            finally:
+                images, self._images = self._images, None
+            if images is not None:
+                images.close()
 
         # 5. 각주/미주 정의 추가
+
         if self.footnotes or self.endnotes:
             all_md_lines.append('')
             all_md_lines.append('')
@@ -166,42 +228,122 @@ class HwpxToMarkdown:
                 for ref_num, text in self.endnotes:
                     all_md_lines.append(f"[^e{ref_num}]: {text}")
 
-        return '\n'.join(all_md_lines)
+        md_content = '\n'.join(all_md_lines)
+        if self._sources is not None:
+            md_text_lines = md_content.split('\n')
+            header = {'version': SOURCE_MAP_VERSION, 'lines': len(md_text_lines),
+                      'sections': self._source_sections}
+            self.source_map = SourceMap(
+                header, finalize_entries(self._sources, all_md_lines, md_text_lines))
+            self._sources = self._source_sections = None
+        return md_content
+
+    def _convert_sections(self, z):
+        """모든 섹션을 순서대로 변환하여 마크다운 줄 목록 반환"""
+        # 3. 다중 섹션 찾기 및 정렬
+        section_files = self._find_section_files(z)
+
+        # 4. 각 섹션 변환 및 병합
+        all_md_lines = []
+        first_section = True
+
+        for done, section_file in enumerate(section_files):
+            if self.progress is not None:
+                self.progress(done, len(section_files), section_file)
+            first_source = len(self._sources) if self._sources is not None else 0
+            if self.streaming:
+                # 스트리밍: 최상위 문단 단위로 파싱 후 즉시 해제
+                md_lines, page_pr = self._process_section_stream(z, section_file)
+                if first_section:
+                    self._save_template_info(z, page_pr)
+                    first_section = False
+            else:
+                if self.document is not None:
+                    root = self.document.section(section_file).root
+                else:
+                    root = etree.fromstring(z.read(section_file))
+                if self._sources is not None:
+                    self._source_sections[section_file] = {
+                        'sha256': (self.document.section(section_file).digest
+                                   if self.document is not None
+                                   else zip_member_digest(z, section_file)),
+                    }
 
-    def _extract_images(self, z):
-        """BinData 폴더의 이미지를 추출"""
-        os.makedirs(self.images_dir, exist_ok=True)
+                # 첫 섹션에서 양식 정보 저장
+                if first_section:
+                    self._save_template_info(z, root.find('.//hp:pagePr', NS))
+                    first_section = False
+
+                # 섹션 변환
+                md_lines = self._process_section(root, section_file)
+            self._shift_sources(first_source, len(all_md_lines))
+            all_md_lines.extend(md_lines)
+
+            # 섹션 구분자 추가 (마지막 섹션 제외)
+            if section_file != section_files[-1]:
+                all_md_lines.append('')
+                all_md_lines.append('---')
+                all_md_lines.append('')
+
+        if self.progress is not None:
+            self.progress(len(section_files), len(section_files), '')
+        return all_md_lines
+
+    def _shift_sources(self, first, offset):
+        """self._sources[first:] 항목의 줄 목록 범위를 offset만큼 이동 (앞에 줄이 붙을 때)"""
+        if self._sources is None or not offset:
+            return
+        for entry in self._sources[first:]:
+            start, end = entry['_range']
+            entry['_range'] = (start + offset, end + offset)
+
+    def _record_sources(self, section_file, p_index, spans, ordinals, offset):
+        """최상위 문단 하나의 spans(_process_paragraph가 채움)를 소스 맵 항목으로 기록.
+
+        Args:
+            p_index: 섹션 안 최상위 hp:p 순번 (항목 path의 p[n])
+            spans: [(종류, 하위 경로, 요소, 시작, 끝), ...] — 문단 줄 목록 기준 범위
+            ordinals: {hp:t 요소: 섹션 내 텍스트 노드 번호}
+            offset: 섹션 줄 목록에서 이 문단 줄이 시작하는 위치
+        """
+        for kind, sub_path, el, start, end in spans:
+            path = f'p[{p_index}]{sub_path}'
+            if kind == 'table':
+                entry = table_entry(section_file, path, el, ordinals, NS)
+            else:
+                entry = paragraph_entry(section_file, path, el, ordinals, NS)
+                if not entry['text']:
+                    continue  # smart_replace도 빈 문단은 대조하지 않음
+            entry['_range'] = (offset + start, offset + end)
+            self._sources.append(entry)
+
+    def _index_bin_data(self, z):
+        """BinData/ 멤버를 binaryItemIDRef(확장자 없는 이름, e.g. "image1")로 색인"""
+        bin_data = {}
         for name in z.namelist():
             if name.startswith('BinData/'):
                 basename = os.path.basename(name)
-                if not basename:
-                    continue
-                # binaryItemIDRef는 확장자 없는 이름 (e.g., "image1")
-                ref_id = os.path.splitext(basename)[0]
-                ext = os.path.splitext(basename)[1]
-
-                # BMP → PNG 변환 (파일 크기 절약)
-                out_name = f"{ref_id}.png" if ext.lower() == '.bmp' else basename
-                out_path = os.path.join(self.images_dir, out_name)
-
-                img_data = z.read(name)
-                if ext.lower() == '.bmp':
-                    try:
-                        from PIL import Image
-                        import io
-                        img = Image.open(io.BytesIO(img_data))
-                        img.save(out_path, 'PNG')
-                    except ImportError:
-                        # Pillow 없으면 BMP 그대로 저장
-                        out_name = basename
-                        out_path = os.path.join(self.images_dir, out_name)
-                        with open(out_path, 'wb') as f:
-                            f.write(img_data)
-                else:
-                    with open(out_path, 'wb') as f:
-                        f.write(img_data)
+                if basename:
+                    bin_data[os.path.splitext(basename)[0]] = name
+        return bin_data
+
+    def _extract_image(self, ref_id):
+        """참조된 이미지 하나를 images/에 추출하고 파일명 반환 (없으면 None).
+
+        파일명은 내용 해시라서 같은 이미지를 여러 ID로 넣은 양식도 한 번만 저장되고,
+        같은 출력 폴더에 다시 변환하면 이미 있는 파일을 다시 쓰지 않습니다.
+        BMP는 convert_bmp=True일 때만 PNG로 재인코딩합니다 (파일 크기 절약, Pillow 필요).
+        쓰기/재인코딩은 ImageStore 스레드 풀에서 진행되고 convert() 반환 전에 끝납니다.
+        """
+        if ref_id in self.image_map:
+            return self.image_map[ref_id]
+        member = self.bin_data.get(ref_id)
+        if member is None or self._images is None:
+            return None
 
-                self.image_map[ref_id] = out_name
+        out_name = self._images.extract(member)
+        self.image_map[ref_id] = out_name
+        return out_name
 
     def _find_section_files(self, z):
         """ZIP 내부의 모든 section*.xml 파일을 찾아 정렬하여 반환"""
@@ -219,16 +361,20 @@ class HwpxToMarkdown:
         section_files.sort(key=lambda x: x[0])
         return [name for _, name in section_files]
 
-    def _save_template_info(self, z, section_root):
-        """양식 정보를 JSON으로 보존 (나중에 hwpx 복원 시 사용)"""
+    def _save_template_info(self, z, page_pr):
+        """양식 정보를 JSON으로 보존 (나중에 hwpx 복원 시 사용)
+
+        Args:
+            z: zipfile.ZipFile 객체
+            page_pr: 첫 섹션의 hp:pagePr 요소 (없으면 None)
+        """
         info = {
             'source_file': os.path.basename(self.hwpx_path),
             'files_in_hwpx': z.namelist(),
-            'images': list(self.image_map.keys()),
+            'images': list(self.bin_data.keys()),
         }
 
         # 페이지 설정 추출
-        page_pr = section_root.find('.//hp:pagePr', NS)
         if page_pr is not None:
             info['page'] = {
                 'width': page_pr.get('width'),
@@ -241,15 +387,24 @@ class HwpxToMarkdown:
 
         self.template_info = info
 
-        # JSON으로 저장
+        # JSON으로 저장 (이미지 폴더는 참조될 때만 만드므로 출력 폴더는 여기서 보장)
+        os.makedirs(self.output_dir, exist_ok=True)
         info_path = os.path.join(self.output_dir, 'template_info.json')
         with open(info_path, 'w', encoding='utf-8') as f:
             json.dump(info, f, ensure_ascii=False, indent=2)
 
-    def _collect_footnotes_endnotes(self, para):
-        """문단에서 각주/미주를 수집하고 참조 번호 부여"""
+    def _collect_footnotes_endnotes(self, para, footnotes=None, endnotes=None):
+        """문단에서 각주/미주를 수집하고 참조 번호 부여
+
+        footnotes/endnotes를 주면 (classify_descendants 결과) 서브트리를 다시 찾지 않습니다.
+        """
+        if footnotes is None:
+            footnotes = para.findall('.//hp:footnote', NS)
+        if endnotes is None:
+            endnotes = para.findall('.//hp:endnote', NS)
+
         # 각주 수집
-        for footnote in para.findall('.//hp:footnote', NS):
+        for footnote in footnotes:
             self.footnote_counter += 1
             ref_num = self.footnote_counter
 
@@ -266,7 +421,7 @@ class HwpxToMarkdown:
                 self.footnotes.append((ref_num, footnote_text))
 
         # 미주 수집
-        for endnote in para.findall('.//hp:endnote', NS):
+        for endnote in endnotes:
             self.endnote_counter += 1
             ref_num = self.endnote_counter
 
@@ -282,35 +437,141 @@ class HwpxToMarkdown:
                 endnote_text = ' '.join(endnote_texts)
                 self.endnotes.append((ref_num, endnote_text))
 
-    def _process_section(self, root):
+    def _process_section(self, root, section_file=None):
         """섹션 루트 아래의 최상위 문단들을 순회"""
         lines = []
 
         # 1. 머리글 추출
-        headers = root.findall('.//hp:header', NS)
+        lines.extend(self._header_lines(root.findall('.//hp:header', NS)))
+
+        # 2. 본문 문단 처리 (소스 맵: 텍스트 노드 번호는 섹션 전체 문서 순서)
+        ordinals = None
+        if self._sources is not None:
+            ordinals = {t: i for i, t in enumerate(root.iter(f"{{{NS['hp']}}}t"))}
+            self._source_sections[section_file]['text_nodes'] = len(ordinals)
+        for p_index, para in enumerate(root.findall('hp:p', NS)):
+            spans = [] if ordinals is not None else None
+            para_lines = self._process_paragraph(para, top_level=True, spans=spans)
+            if spans:
+                self._record_sources(section_file, p_index, spans, ordinals, len(lines))
+            lines.extend(para_lines)
+
+        # 3. 꼬리글 추출
+        lines.extend(self._footer_lines(root.findall('.//hp:footer', NS)))
+
+        return lines
+
+    def _process_section_stream(self, z, section_file):
+        """섹션 XML을 iterparse로 스트리밍하며 변환.
+
+        _process_section()과 바이트 단위로 동일한 줄을 생성하지만,
+        처리가 끝난 최상위 요소는 즉시 비우고 트리에서 떼어내므로
+        메모리 사용량이 섹션 전체가 아닌 가장 큰 최상위 문단 하나로 제한됩니다.
+
+        머리글/꼬리글은 섹션 맨 앞/뒤에 출력해야 하므로 해당 요소만 사본으로 보관하고,
+        각주 번호가 _process_section()과 같도록 머리글은 섹션 시작 시점의
+        카운터로, 꼬리글은 섹션 끝 시점의 카운터로 텍스트를 추출합니다.
+
+        Args:
+            z: zipfile.ZipFile 객체
+            section_file: 섹션 파일 경로 (예: 'Contents/section0.xml')
+
+        Returns:
+            (lines, page_pr): 마크다운 줄 목록, 섹션에서 처음 나온 hp:pagePr 사본 (없으면 None)
+        """
+        p_tag = f"{{{NS['hp']}}}p"
+        header_tag = f"{{{NS['hp']}}}header"
+        footer_tag = f"{{{NS['hp']}}}footer"
+        page_pr_tag = f"{{{NS['hp']}}}pagePr"
+        t_tag = f"{{{NS['hp']}}}t"
+
+        start_counters = (self.footnote_counter, self.endnote_counter)
+        headers = []
+        footers = []
+        body_lines = []
+        page_pr = None
+        depth = 0
+        first_source = None
+        text_nodes = 0  # 소스 맵: 앞서 처리한 최상위 요소들의 <hp:t> 수
+        p_index = 0
+        if self._sources is not None:
+            first_source = len(self._sources)
+            self._source_sections[section_file] = {
+                'sha256': zip_member_digest(z, section_file)}
+
+        with z.open(section_file) as f:
+            for event, elem in etree.iterparse(f, events=('start', 'end')):
+                if event == 'start':
+                    depth += 1
+                    continue
+
+                depth -= 1
+                if page_pr is None and elem.tag == page_pr_tag:
+                    page_pr = copy.deepcopy(elem)
+                if depth != 1:
+                    continue
+
+                # 최상위 요소 완료 — 머리글/꼬리글 보관 후 문단 변환
+                headers.extend(copy.deepcopy(h) for h in elem.iter(header_tag))
+                footers.extend(copy.deepcopy(ft) for ft in elem.iter(footer_tag))
+                ordinals = None
+                if first_source is not None:
+                    ordinals = {t: text_nodes + i for i, t in enumerate(elem.iter(t_tag))}
+                    text_nodes += len(ordinals)
+                if elem.tag == p_tag:
+                    spans = [] if ordinals is not None else None
+                    para_lines = self._process_paragraph(elem, top_level=True, spans=spans)
+                    if spans:
+                        self._record_sources(section_file, p_index, spans, ordinals,
+                                             len(body_lines))
+                    body_lines.extend(para_lines)
+                    p_index += 1
+
+                # 처리 끝난 요소 해제
+                elem.clear()
+                parent = elem.getparent()
+                while elem.getprevious() is not None:
+                    del parent[0]
+
+        end_counters = (self.footnote_counter, self.endnote_counter)
+        self.footnote_counter, self.endnote_counter = start_counters
+        lines = self._header_lines(headers)
+        self.footnote_counter, self.endnote_counter = end_counters
+        if first_source is not None:
+            self._source_sections[section_file]['text_nodes'] = text_nodes
+            self._shift_sources(first_source, len(lines))
+
+        lines.extend(body_lines)
+        lines.extend(self._footer_lines(footers))
+        return lines, page_pr
+
+    def _header_lines(self, headers):
+        """머리글 요소 목록을 마크다운 주석 줄로 변환"""
+        lines = []
         for header in headers:
             header_text = self._extract_header_footer_text(header)
             if header_text:
                 lines.append(f"<!-- 머리글: {header_text} -->")
                 lines.append('')
+        return lines
 
-        # 2. 본문 문단 처리
-        for para in root.findall('hp:p', NS):
-            para_lines = self._process_paragraph(para, top_level=True)
-            lines.extend(para_lines)
-
-        # 3. 꼬리글 추출
-        footers = root.findall('.//hp:footer', NS)
+    def _footer_lines(self, footers):
+        """꼬리글 요소 목록을 마크다운 주석 줄로 변환"""
+        lines = []
         for footer in footers:
             footer_text = self._extract_header_footer_text(footer)
             if footer_text:
                 lines.append('')
                 lines.append(f"<!-- 꼬리글: {footer_text} -->")
-
         return lines
 
-    def _process_paragraph(self, para, top_level=False):
-        """하나의 hp:p를 처리"""
+    def _process_paragraph(self, para, top_level=False, spans=None):
+        """하나의 hp:p를 처리
+
+        Args:
+            spans: 소스 맵용 목록. 주면 smart_replace가 대조하는 테이블/일반 문단 줄의
+                (종류, 하위 경로, 요소, 시작, 끝)을 반환 줄 목록 기준으로 추가.
+        """
         lines = []
         para_pr_id = para.get('paraPrIDRef', '0')
 
@@ -319,52 +580,53 @@ class HwpxToMarkdown:
         if self.style_map:
             heading_level = self.style_map.get_heading_level(para_pr_id)
 
+        # 하위 요소를 한 번의 순회로 종류별 분류
+        found = classify_descendants(para)
+
         # 각주/미주 수집
-        self._collect_footnotes_endnotes(para)
+        self._collect_footnotes_endnotes(para, found['footnote'], found['endnote'])
 
         # 테이블 감지 - 문단 내 테이블이 있으면 테이블로 처리
-        tables = para.findall('.//hp:tbl', NS)
+        tables = found['tbl']
 
         # 이미지 감지
-        pics = para.findall('.//hp:pic', NS)
+        pics = found['pic']
 
         # 수식 감지
-        equations = para.findall('.//hp:equation', NS)
+        equations = found['equation']
 
-        # 양식 개체 감지
+        # 양식 개체 감지 (종류별로 이어붙임 — 종류 순서 유지)
         form_elements = []
-        form_elements.extend(para.findall('.//hp:checkBtn', NS))
-        form_elements.extend(para.findall('.//hp:radioBtn', NS))
-        form_elements.extend(para.findall('.//hp:comboBox', NS))
-        form_elements.extend(para.findall('.//hp:btn', NS))
-        form_elements.extend(para.findall('.//hp:edit', NS))
+        for form_tag in FORM_TAGS:
+            form_elements.extend(found[form_tag])
 
         # TextArt (글맵시) 감지
-        textarts = para.findall('.//hp:textart', NS)
+        textarts = found['textart']
 
         # OLE 개체 감지
-        oles = para.findall('.//hp:ole', NS)
+        oles = found['ole']
 
         # 다단 레이아웃 감지
-        colprs = para.findall('.//hp:colPr', NS)
+        colprs = found['colPr']
 
         # 도형/글상자 감지
-        shape_tags = ['hp:rect', 'hp:ellipse', 'hp:arc', 'hp:polygon', 'hp:curve', 'hp:connectLine', 'hp:container']
         shapes_with_text = []
-        for shape_tag in shape_tags:
-            shapes = para.findall(f'.//{shape_tag}', NS)
-            for shape in shapes:
+        for shape_tag in SHAPE_TAGS:
+            for shape in found[shape_tag]:
                 shape_text = self._extract_shape_text(shape)
                 if shape_text:
                     shapes_with_text.append(shape_text)
 
         # 텍스트 추출
-        text = self._extract_paragraph_text(para)
+        text = self._extract_paragraph_text(para, found['footnote'], found['endnote'])
 
         # 테이블 처리
         if tables:
-            for tbl in tables:
+            for tbl_index, tbl in enumerate(tables):
                 tbl_lines = self._process_table(tbl)
+                if spans is not None and tbl_lines:
+                    spans.append(('table', f'/tbl[{tbl_index}]', tbl,
+                                  len(lines), len(lines) + len(tbl_lines)))
                 lines.extend(tbl_lines)
 
             # 테이블 외 텍스트가 있으면 추가
@@ -373,6 +635,9 @@ class HwpxToMarkdown:
                     lines.insert(0, f"\n{'#' * heading_level} {text.strip()}\n")
                 else:
                     lines.insert(0, text.strip())
+                if spans is not None:
+                    spans[:] = [(kind, sub, el, start + 1, end + 1)
+                                for kind, sub, el, start, end in spans]
         elif pics:
             # 이미지가 있는 문단
             for pic in pics:
@@ -401,6 +666,8 @@ class HwpxToMarkdown:
             if heading_level:
                 lines.append(f"\n{'#' * heading_level} {text.strip()}\n")
             else:
+                if spans is not None:
+                    spans.append(('paragraph', '', para, len(lines), len(lines) + 1))
                 lines.append(text.strip())
         elif top_level:
             lines.append('')  # 빈 줄 보존
@@ -429,13 +696,15 @@ class HwpxToMarkdown:
 
         return lines
 
-    def _extract_paragraph_text(self, para):
+    def _extract_paragraph_text(self, para, all_footnotes=None, all_endnotes=None):
         """문단에서 인라인 텍스트 추출 (서식 포함)"""
         parts = []
 
         # 각주/미주 요소를 미리 수집하여 인덱스 매핑 생성
-        all_footnotes = para.findall('.//hp:footnote', NS)
-        all_endnotes = para.findall('.//hp:endnote', NS)
+        if all_footnotes is None:
+            all_footnotes = para.findall('.//hp:footnote', NS)
+        if all_endnotes is None:
+            all_endnotes = para.findall('.//hp:endnote', NS)
 
         # 현재 문단에서 각주/미주의 시작 번호 계산
         footnote_start = self.footnote_counter - len(all_footnotes) + 1
@@ -668,8 +937,8 @@ class HwpxToMarkdown:
             return None
 
         ref_id = img_el.get('binaryItemIDRef', '')
-        if ref_id in self.image_map:
-            filename = self.image_map[ref_id]
+        filename = self._extract_image(ref_id) if self.extract_images else None
+        if filename:
             return f"\n![{ref_id}](images/{filename})\n"
         return f"\n![{ref_id}](images/{ref_id})\n"
 
@@ -781,24 +1050,90 @@ class HwpxToMarkdown:
         return None
 
 
-def convert_hwpx_to_md(hwpx_path, output_path=None, extract_images=True):
-    """hwpx 파일을 마크다운으로 변환하는 편의 함수"""
+def convert_with_cache(hwpx_path, output_dir, cache=None, **options):
+    """HwpxToMarkdown 변환 — cache(ConversionCache)에 같은 결과가 있으면 변환 생략.
+
+    적중하면 캐시의 이미지와 template_info.json을 output_dir에 풀어 놓습니다.
+
+    Args:
+        hwpx_path: 입력 HWPX 경로
+        output_dir: 출력 폴더 (images/, template_info.json)
+        cache: ConversionCache (None이면 항상 변환)
+        **options: HwpxToMarkdown 옵션 (extract_images, streaming, convert_bmp, document,
+            source_map, progress, ...)
+
+    Returns:
+        dict: {'md_content', 'image_map', 'template_info', 'source_map', 'images_dir', 'cached'}
+            source_map은 options의 source_map=True일 때 SourceMap, 아니면 None
+    """
+    images_dir = os.path.join(output_dir, 'images')
+    key = None
+    if cache is not None:
+        # 출력에 영향을 주는 옵션만 키에 포함 (streaming/document/스레드 수는 결과가 같음)
+        extract_images = options.get('extract_images', True)
+        convert_bmp = options.get('convert_bmp', True)
+        key = cache.key(hwpx_path, extract_images=extract_images,
+                        convert_bmp=convert_bmp and pillow_available(),
+                        max_image_bytes=options.get('max_image_bytes', DEFAULT_MAX_IMAGE_BYTES),
+                        source_map=bool(options.get('source_map', False)))
+        hit = cache.load(key, output_dir, source_file=os.path.basename(hwpx_path))
+        if hit is not None:
+            hit['images_dir'] = images_dir
+            hit['cached'] = True
+            return hit
+
+    converter = HwpxToMarkdown(hwpx_path, output_dir=output_dir, **options)
+    md_content = converter.convert()
+    if key is not None:
+        cache.store(key, md_content, converter.image_map, converter.images_dir,
+                    converter.template_info, converter.source_map)
+    return {
+        'md_content': md_content,
+        'image_map': converter.image_map,
+        'template_info': converter.template_info,
+        'source_map': converter.source_map,
+        'images_dir': images_dir,
+        'cached': False,
+    }
+
+
+def convert_hwpx_to_md(hwpx_path, output_path=None, extract_images=True, streaming=False,
+                       convert_bmp=True, image_workers=DEFAULT_WORKERS,
+                       max_image_bytes=DEFAULT_MAX_IMAGE_BYTES, use_cache=True, source_map=False):
+    """hwpx 파일을 마크다운으로 변환하는 편의 함수
+
+    streaming=True면 섹션을 iterparse로 처리하여 대용량 섹션의 메모리 사용량을 줄입니다.
+    convert_bmp=False면 BMP 이미지를 PNG로 재인코딩하지 않고 그대로 저장합니다.
+    image_workers는 이미지 쓰기/재인코딩 스레드 수(0이면 직렬), max_image_bytes보다 큰
+    이미지는 메모리에 올리지 않고 스트리밍 복사합니다 (재인코딩 생략).
+    use_cache=True면 같은 HWPX/옵션의 이전 변환 결과를 디스크 캐시에서 재사용합니다
+    (conversion_cache — HWPX_CACHE_DIR, 기본 ~/.cache/hwpx-pipeline).
+    source_map=True면 마크다운 옆에 소스 맵(<이름>.srcmap.jsonl)을 함께 씁니다
+    (smart_replace --source-map이 블록 재매칭 없이 줄 범위로 XML 위치를 찾음).
+    """
     if output_path is None:
         base = os.path.splitext(hwpx_path)[0]
         output_path = base + '.md'
 
     output_dir = os.path.dirname(output_path) or '.'
 
-    converter = HwpxToMarkdown(hwpx_path, output_dir=output_dir, extract_images=extract_images)
-    md_content = converter.convert()
+    result = convert_with_cache(hwpx_path, output_dir,
+                                cache=ConversionCache() if use_cache else None,
+                                extract_images=extract_images, streaming=streaming,
+                                convert_bmp=convert_bmp, image_workers=image_workers,
+                                max_image_bytes=max_image_bytes, source_map=source_map)
 
     with open(output_path, 'w', encoding='utf-8') as f:
-        f.write(md_content)
-
-    print(f"변환 완료: {output_path}")
-    if extract_images and converter.image_map:
-        print(f"이미지 {len(converter.image_map)}개 추출: {converter.images_dir}")
-    if converter.template_info:
+        f.write(result['md_content'])
+    if result['source_map'] is not None:
+        map_path = source_map_path(output_path)
+        result['source_map'].save(map_path)
+        print(f"소스 맵 저장: {map_path}")
+
+    print(f"변환 완료{' (캐시)' if result['cached'] else ''}: {output_path}")
+    if extract_images and result['image_map']:
+        print(f"이미지 {len(result['image_map'])}개 추출: {result['images_dir']}")
+    if result['template_info']:
         print(f"양식 정보 저장: {os.path.join(output_dir, 'template_info.json')}")
 
     return output_path
@@ -809,9 +1144,25 @@ def main():
     parser.add_argument('input', help='입력 HWPX 파일 경로')
     parser.add_argument('-o', '--output', help='출력 마크다운 파일 경로')
     parser.add_argument('--no-images', action='store_true', help='이미지 추출 안 함')
+    parser.add_argument('--stream', action='store_true',
+                        help='섹션을 스트리밍 파싱 (대용량 문서 메모리 절약)')
+    parser.add_argument('--keep-bmp', action='store_true',
+                        help='BMP 이미지를 PNG로 변환하지 않고 그대로 저장')
+    parser.add_argument('--no-cache', action='store_true',
+                        help='변환 결과 캐시를 쓰지 않고 항상 다시 변환')
+    parser.add_argument('--image-workers', type=int, default=4,
+                        help='이미지 쓰기/재인코딩 스레드 수 (기본 4, 0 = 직렬)')
+    parser.add_argument('--max-image-mb', type=float, default=64,
+                        help='이보다 큰 이미지는 스트리밍 복사, 재인코딩 생략 (기본 64)')
+    parser.add_argument('--source-map', action='store_true',
+                        help='마크다운 옆에 소스 맵(<이름>.srcmap.jsonl) 저장 (smart_replace용)')
     args = parser.parse_args()
 
-    convert_hwpx_to_md(args.input, args.output, extract_images=not args.no_images)
+    convert_hwpx_to_md(args.input, args.output, extract_images=not args.no_images,
+                       streaming=args.stream, convert_bmp=not args.keep_bmp,
+                       image_workers=args.image_workers,
+                       max_image_bytes=int(args.max_image_mb * 1024 * 1024),
+                       use_cache=not args.no_cache, source_map=args.source_map)
 
 
 if __name__ == '__main__':
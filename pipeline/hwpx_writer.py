@@ -0,0 +1,371 @@
+"""
+hwpx_writer.py - 프로세스 내 Markdown → HWPX 작성기 (reference HWPX 템플릿 기반)
+
+pypandoc-hwpx는 문서마다 pandoc + 파이썬 프로세스를 새로 띄우고, 결과 파일을 다시
+열어 _patch_hwpx로 후처리합니다. 여기서는 md_blocks의 블록 목록을 바로 OWPML
+섹션 XML 문자열로 만들고, 템플릿 HWPX의 나머지 멤버(header.xml, BinData/ 등)는
+hwpx_zip.rewrite_hwpx로 압축 스트림 그대로 복사합니다.
+
+템플릿에서 가져오는 것 (HwpxTemplate — 파일 경로/크기/수정 시각으로 캐시):
+  - 첫 섹션의 XML 선언 + 루트 시작 태그 (네임스페이스 선언 그대로), 접두사
+  - 첫 섹션의 hp:secPr (+ 바로 뒤 hp:colPr 컨트롤) — 페이지 크기/여백 유지
+  - header.xml의 개요 수준별 paraPr, 굵게/기울임/취소선 charPr
+  - 첫 셀의 borderFillIDRef (없으면 테두리가 있는 첫 borderFill)
+
+pypandoc-hwpx 후처리(section_transforms.PANDOC_FIXES)가 고치는 두 가지는
+처음부터 만들지 않습니다:
+  - 모든 hp:subList에 hp:p가 하나 이상 들어감 (빈 셀도 빈 문단)
+  - hp:tbl의 borderFillIDRef = 셀의 borderFillIDRef
+
+지원 블록: heading, paragraph(줄마다 hp:p), table, quote(1×1 표), rule/comment(생략).
+image / math / footnote는 pandoc 경로가 필요합니다 (NATIVE_UNSUPPORTED —
+md_to_hwpx의 engine='auto'는 이런 블록이 있으면 pypandoc-hwpx로 변환).
+"""
+import os
+import re
+import zipfile
+import threading
+from collections import OrderedDict
+
+from hwpx_document import HwpxDocument
+from hwpx_to_md import HwpxStyleMap, NS_2011, NS_2024
+from hwpx_zip import rewrite_hwpx
+from md_blocks import tokenize_markdown
+from text_normalize import strip_md_format, xml_escape
+
+MANIFEST_FILE = 'Contents/content.hpf'
+TEMPLATE_CACHE_SIZE = 8
+
+# pandoc 경로로만 변환할 수 있는 블록 (이미지 임베드, 수식, 각주)
+NATIVE_UNSUPPORTED = ('image', 'math', 'footnote')
+
+DEFAULT_TEXT_WIDTH = 42520  # A4 세로, 좌우 여백 30mm (HWPUNIT)
+CELL_HEIGHT = 1000
+OUT_MARGIN = 283
+CELL_MARGIN = (510, 510, 141, 141)  # left, right, top, bottom
+
+XML_DECL_ROOT_RE = re.compile(r'\s*((?:<\?xml[^>]*\?>\s*)?)(<([\w]+:)?(\w+)\b[^>]*>)')
+PAGE_WIDTH_RE = re.compile(r'<[\w]+:pagePr\b[^>]*?\swidth="(\d+)"')
+MARGIN_RE = re.compile(r'<[\w]+:margin\b[^>]*?\sleft="(\d+)"[^>]*?\sright="(\d+)"')
+TC_BORDER_FILL_ANY_RE = re.compile(r'<[\w]+:tc\b[^>]*\sborderFillIDRef="(\d+)"')
+INLINE_RE = re.compile(r'\*{3}(.+?)\*{3}|\*{2}(.+?)\*{2}|~~(.+?)~~|\*(.+?)\*')
+INLINE_STYLES = ('bold_italic', 'bold', 'strikeout', 'italic')  # INLINE_RE 그룹 순서
+
+_template_cache = OrderedDict()  # (절대 경로, 크기, 수정 시각) -> HwpxTemplate
+_template_lock = threading.Lock()  # 대시보드/일괄 변환 스레드가 캐시를 함께 씀
+
+
+class HwpxTemplate:
+    """reference HWPX에서 섹션 작성에 필요한 정보만 한 번 추출"""
+
+    def __init__(self, reference_doc):
+        self.path = reference_doc
+        document = HwpxDocument(reference_doc)
+        if not document.sections:
+            raise ValueError(f"섹션이 없는 HWPX입니다: {reference_doc}")
+        first = document.sections[0]
+        raw = first.raw_xml
+        self.section_file = first.filename
+        self.dropped_sections = [sec.filename for sec in document.sections[1:]]
+        self.manifest = None
+        if MANIFEST_FILE in document.namelist:
+            self.manifest = self._read_member(reference_doc, MANIFEST_FILE)
+
+        # 루트 시작 태그까지 그대로 복사 — 네임스페이스 선언/버전 유지
+        m = XML_DECL_ROOT_RE.match(raw)
+        if m is None:
+            raise ValueError(f"섹션 루트를 찾을 수 없습니다: {self.section_file}")
+        self.prolog = m.group(1) + m.group(2)
+        self.epilog = f'</{m.group(3) or ""}{m.group(4)}>'
+        self.hp = document.close_tag[2:-3]  # '</hp:t>' -> 'hp'
+        self.sec_pr = self._section_properties(raw)
+        self.text_width = self._text_width(self.sec_pr)
+
+        # 스타일 — header.xml의 paraPr/charPr id. document.style_map은 hwpx_to_md/smart_replace의
+        # 전역 NS를 바꾸므로 (대시보드의 다른 변환과 겹칠 수 있음) 문서 버전의 맵으로 직접 파싱
+        style_map = None
+        if document.header_bytes is not None:
+            ns = NS_2024 if document.ns_version == '2024' else NS_2011
+            style_map = HwpxStyleMap(document.header_bytes, ns=ns)
+        self.heading_para_pr = {}  # 1-based 제목 레벨 -> paraPr id
+        self.char_pr = {}          # INLINE_STYLES 이름 -> charPr id
+        if style_map is not None:
+            for pr_id, level in sorted(style_map.outline_levels.items(),
+                                       key=lambda item: int(item[0])):
+                self.heading_para_pr.setdefault(level + 1, pr_id)
+            for cp_id, props in sorted(style_map.char_props.items(),
+                                       key=lambda item: int(item[0])):
+                name = _inline_style_name(props)
+                if name is not None:
+                    self.char_pr.setdefault(name, cp_id)
+        self.para_pr = self._default_para_pr(raw)
+        self.border_fill = self._cell_border_fill(document, style_map)
+
+    @staticmethod
+    def _read_member(path, name):
+        with zipfile.ZipFile(path, 'r') as z:
+            return z.read(name).decode('utf-8')
+
+    def _section_properties(self, raw):
+        """첫 hp:secPr (+ 바로 뒤의 단 설정 컨트롤) 원문. 없으면 ''."""
+        hp = re.escape(self.hp)
+        m = re.search(rf'<{hp}:secPr\b.*?</{hp}:secPr>', raw, re.DOTALL)
+        if m is None:
+            return ''
+        col_pr = re.compile(rf'\s*<{hp}:ctrl>\s*<{hp}:colPr\b[^>]*/>\s*</{hp}:ctrl>').match(
+            raw, m.end())
+        return m.group(0) + (col_pr.group(0).strip() if col_pr else '')
+
+    @staticmethod
+    def _text_width(sec_pr):
+        """본문 폭 = 용지 폭 - 좌우 여백 (secPr가 없으면 A4 기본값)"""
+        width = PAGE_WIDTH_RE.search(sec_pr)
+        margin = MARGIN_RE.search(sec_pr)
+        if width is None:
+            return DEFAULT_TEXT_WIDTH
+        text_width = int(width.group(1))
+        if margin is not None:
+            text_width -= int(margin.group(1)) + int(margin.group(2))
+        return text_width if text_width > 0 else DEFAULT_TEXT_WIDTH
+
+    def _default_para_pr(self, raw):
+        """본문 paraPr — 템플릿 첫 문단의 값 (제목 paraPr이면 '0')"""
+        m = re.search(rf'<{re.escape(self.hp)}:p\b[^>]*\sparaPrIDRef="(\d+)"', raw)
+        if m is None or m.group(1) in self.heading_para_pr.values():
+            return '0'
+        return m.group(1)
+
+    @staticmethod
+    def _cell_border_fill(document, style_map):
+        """표/셀 borderFill — 템플릿 첫 셀의 값, 없으면 테두리가 있는 첫 borderFill"""
+        for sec in document.sections:
+            m = TC_BORDER_FILL_ANY_RE.search(sec.raw_xml)
+            if m:
+                return m.group(1)
+        if style_map is not None:
+            for bf in style_map.root.iter('{*}borderFill'):
+                left = next(bf.iter('{*}leftBorder'), None)
+                if left is not None and left.get('type', 'NONE') != 'NONE':
+                    return bf.get('id')
+        return '1'
+
+    def manifest_without_dropped(self):
+        """content.hpf에서 버린 섹션의 item/itemref 제거 (manifest가 없으면 None)"""
+        if self.manifest is None or not self.dropped_sections:
+            return None
+        manifest = self.manifest
+        for name in self.dropped_sections:
+            item = re.search(r'<[\w]+:item\b[^>]*\shref="' + re.escape(name) + r'"[^>]*/>\s*',
+                             manifest)
+            if item is None:
+                continue
+            manifest = manifest.replace(item.group(0), '', 1)
+            item_id = re.search(r'\sid="([^"]+)"', item.group(0))
+            if item_id:
+                manifest = re.sub(r'<[\w]+:itemref\b[^>]*\sidref="' + re.escape(item_id.group(1))
+                                  + r'"[^>]*/>\s*', '', manifest, count=1)
+        return manifest.encode('utf-8')
+
+
+def _inline_style_name(props):
+    """charPr 속성 → INLINE_STYLES 이름 (밑줄 등 다른 서식이 섞이면 None)"""
+    if props.get('underline'):
+        return None
+    flags = (props.get('bold'), props.get('italic'), props.get('strikeout'))
+    return {(True, True, False): 'bold_italic', (True, False, False): 'bold',
+            (False, True, False): 'italic', (False, False, True): 'strikeout'}.get(flags)
+
+
+def load_template(reference_doc):
+    """HwpxTemplate 캐시 조회 (같은 파일이면 header/섹션을 다시 파싱하지 않음)"""
+    stat = os.stat(reference_doc)
+    key = (os.path.abspath(reference_doc), stat.st_size, stat.st_mtime_ns)
+    with _template_lock:
+        template = _template_cache.get(key)
+        if template is not None:
+            _template_cache.move_to_end(key)
+            return template
+    # 파싱은 잠금 밖에서 (두 스레드가 같은 양식을 동시에 읽으면 한 번 더 파싱될 뿐)
+    template = HwpxTemplate(reference_doc)
+    with _template_lock:
+        _template_cache[key] = template
+        _template_cache.move_to_end(key)
+        while len(_template_cache) > TEMPLATE_CACHE_SIZE:
+            _template_cache.popitem(last=False)
+    return template
+
+
+def unsupported_blocks(blocks):
+    """네이티브 작성기가 지원하지 않는 블록 종류 (정렬된 목록)"""
+    return sorted({b.kind for b in blocks if b.kind in NATIVE_UNSUPPORTED})
+
+
+class SectionBuilder:
+    """블록 목록 → 섹션 XML 문자열 (템플릿 접두사/스타일 id 사용)
+
+    표 위주 양식은 문서당 셀이 수천 개이므로 셀/문단마다 같은 태그 문자열을
+    다시 포맷하지 않도록 고정 조각을 생성자에서 한 번 만들어 둡니다.
+    """
+
+    def __init__(self, template):
+        self.t = template
+        self.hp = hp = template.hp
+        self.parts = []
+        self.next_id = 1
+        self._p_open = self._p_start(template.para_pr)
+        self._p_close = f'</{hp}:p>'
+        self._run_open = f'<{hp}:run charPrIDRef="0"><{hp}:t>'
+        self._run_close = f'</{hp}:t></{hp}:run>'
+        tc_open = (f'<{hp}:tc name="" header="{{}}" hasMargin="0" protect="0" editable="0"'
+                   f' dirty="0" borderFillIDRef="{template.border_fill}">'
+                   f'<{hp}:subList id="" textDirection="HORIZONTAL" lineWrap="BREAK"'
+                   f' vertAlign="CENTER" linkListIDRef="0" linkListNextIDRef="0" textWidth="0"'
+                   f' textHeight="0" hasTextRef="0" hasNumRef="0">')
+        self._tc_open = (tc_open.format(0), tc_open.format(1))  # [본문 행, 머리 행]
+        left, right, top, bottom = CELL_MARGIN
+        self._tc_margin = (f'<{hp}:cellMargin left="{left}" right="{right}" top="{top}"'
+                           f' bottom="{bottom}"/></{hp}:tc>')
+
+    def _p_start(self, para_pr):
+        return (f'<{self.hp}:p paraPrIDRef="{para_pr}" styleIDRef="0"'
+                f' pageBreak="0" columnBreak="0" merged="0">')
+
+    def _runs(self, text):
+        """인라인 서식(굵게/기울임/취소선)을 charPr run으로. 템플릿에 없는 서식은 제거."""
+        if '*' not in text and '~~' not in text:
+            return self._run_open + xml_escape(text) + self._run_close
+        hp = self.hp
+        runs = []
+        pos = 0
+        for m in INLINE_RE.finditer(text):
+            if m.start() > pos:
+                runs.append(('0', text[pos:m.start()]))
+            style = INLINE_STYLES[m.lastindex - 1]
+            runs.append((self.t.char_pr.get(style, '0'), strip_md_format(m.group(m.lastindex))))
+            pos = m.end()
+        if pos < len(text) or not runs:
+            runs.append(('0', text[pos:]))
+        return ''.join(f'<{hp}:run charPrIDRef="{cp}"><{hp}:t>{xml_escape(t)}</{hp}:t></{hp}:run>'
+                       for cp, t in runs)
+
+    def _para(self, content, para_pr=None):
+        p_open = self._p_open if para_pr is None else self._p_start(para_pr)
+        return p_open + content + self._p_close
+
+    def paragraph(self, text, para_pr=None):
+        self.parts.append(self._para(self._runs(text), para_pr))
+
+    def heading(self, line):
+        level = len(line) - len(line.lstrip('#'))
+        text = strip_md_format(line[level:].strip())
+        self.parts.append(self._para(self._run_open + xml_escape(text) + self._run_close,
+                                     self.t.heading_para_pr.get(level)))
+
+    def _cell(self, row, col, text, width):
+        # 빈 셀도 빈 문단 하나 — 빈 hp:subList는 한글이 열지 못함
+        if '<br>' in text:
+            body = ''.join(self._para(self._runs(piece.strip())) for piece in text.split('<br>'))
+        else:
+            body = self._p_open + self._runs(text) + self._p_close
+        hp = self.hp
+        return (f'{self._tc_open[row == 0]}{body}</{hp}:subList>'
+                f'<{hp}:cellAddr colAddr="{col}" rowAddr="{row}"/>'
+                f'<{hp}:cellSpan colSpan="1" rowSpan="1"/>'
+                f'<{hp}:cellSz width="{width}" height="{CELL_HEIGHT}"/>{self._tc_margin}')
+
+    def table(self, cells):
+        """2D 셀 목록 → 표 하나를 담은 문단 (표 borderFill = 셀 borderFill)"""
+        hp = self.hp
+        rows = len(cells)
+        cols = max(len(row) for row in cells)
+        width = self.t.text_width - 2 * OUT_MARGIN
+        col_widths = [width // cols] * cols
+        col_widths[-1] += width - sum(col_widths)
+        left, right, top, bottom = CELL_MARGIN
+        parts = [
+            f'<{hp}:tbl id="{self.next_id}" zOrder="0" numberingType="TABLE"'
+            f' textWrap="TOP_AND_BOTTOM" textFlow="BOTH_SIDES" lock="0" dropcapstyle="None"'
+            f' pageBreak="CELL" repeatHeader="1" rowCnt="{rows}" colCnt="{cols}"'
+            f' cellSpacing="0" borderFillIDRef="{self.t.border_fill}" noAdjust="0">',
+            f'<{hp}:sz width="{width}" widthRelTo="ABSOLUTE" height="{CELL_HEIGHT * rows}"'
+            f' heightRelTo="ABSOLUTE" protect="0"/>',
+            f'<{hp}:pos treatAsChar="1" affectLSpacing="0" flowWithText="1" allowOverlap="0"'
+            f' holdAnchorAndSO="0" vertRelTo="PARA" horzRelTo="COLUMN" vertAlign="TOP"'
+            f' horzAlign="LEFT" vertOffset="0" horzOffset="0"/>',
+            f'<{hp}:outMargin left="{OUT_MARGIN}" right="{OUT_MARGIN}" top="{OUT_MARGIN}"'
+            f' bottom="{OUT_MARGIN}"/>',
+            f'<{hp}:inMargin left="{left}" right="{right}" top="{top}" bottom="{bottom}"/>',
+        ]
+        self.next_id += 1
+        for r, row in enumerate(cells):
+            parts.append(f'<{hp}:tr>')
+            for c in range(cols):
+                parts.append(self._cell(r, c, row[c] if c < len(row) else '', col_widths[c]))
+            parts.append(f'</{hp}:tr>')
+        parts.append(f'</{hp}:tbl>')
+        self.parts.append(self._para(
+            f'<{hp}:run charPrIDRef="0">{"".join(parts)}<{hp}:t></{hp}:t></{hp}:run>'))
+
+    def build(self):
+        """섹션 XML 문자열. 첫 문단의 첫 run 앞에 템플릿 secPr을 넣음."""
+        hp = self.hp
+        parts = self.parts or [self._para(self._run_open + self._run_close)]
+        if self.t.sec_pr:
+            first = parts[0]
+            run_start = first.index(f'<{hp}:run ')
+            run_open = first.index('>', run_start) + 1
+            parts[0] = first[:run_open] + self.t.sec_pr + first[run_open:]
+        return self.t.prolog + ''.join(parts) + self.t.epilog
+
+
+def render_section(md_text, template, blocks=None):
+    """마크다운 → 섹션 XML 문자열
+
+    Args:
+        blocks: 이미 만든 tokenize_markdown(md_text) 결과 (없으면 새로 토큰화)
+    """
+    if blocks is None:
+        blocks = tokenize_markdown(md_text)
+    lines = md_text.split('\n')
+    builder = SectionBuilder(template)
+    for block in blocks:
+        kind = block.kind
+        if kind == 'table' and block.cells:
+            builder.table(block.cells)
+        elif kind == 'quote' and block.cells is not None:
+            builder.table(block.cells)
+        elif kind == 'heading':
+            builder.heading(lines[block.start].strip())
+        elif kind in ('rule', 'comment'):
+            continue
+        else:
+            # 일반 문단은 원본 줄마다 hp:p (hwpx_to_md가 문단마다 한 줄을 쓰므로 라운드트립 유지).
+            # 지원하지 않는 블록(이미지/수식/각주)도 원문 그대로 텍스트로 남김
+            for line in lines[block.start:block.end]:
+                line = line.strip()
+                if kind == 'quote':
+                    line = line.lstrip('>').strip()
+                if line:
+                    builder.paragraph(line)
+    return builder.build()
+
+
+def write_md_hwpx(md_text, output_path, reference_doc, blocks=None):
+    """마크다운 문자열을 reference_doc 양식의 HWPX로 저장.
+
+    템플릿의 첫 섹션을 새 본문으로 바꾸고 나머지 섹션은 (content.hpf 항목과 함께)
+    제거합니다. 다른 멤버는 압축 스트림 그대로 복사됩니다.
+
+    Returns:
+        str: output_path
+    """
+    template = load_template(reference_doc)
+    section = render_section(md_text, template, blocks)
+    modified = {template.section_file: section.encode('utf-8')}
+    for name in template.dropped_sections:
+        modified[name] = None
+    manifest = template.manifest_without_dropped()
+    if manifest is not None:
+        modified[MANIFEST_FILE] = manifest
+    rewrite_hwpx(reference_doc, output_path, modified)
+    return output_path
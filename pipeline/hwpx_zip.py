@@ -0,0 +1,260 @@
+"""
+hwpx_zip.py - 변경된 멤버만 다시 압축하는 HWPX(ZIP) 재작성기
+
+smart_replace / section_transforms.transform_hwpx / 대시보드 strip_lineseg는
+섹션 XML 몇 개만 바꾸는데, zipfile의 writestr(item, z_in.read(...))로 다시 쓰면
+BinData/ 이미지까지 모든 멤버를 압축 해제 → 재압축하게 됩니다.
+
+write_hwpx()는 변경되지 않은 멤버의 압축 스트림을 원본 그대로(로컬 헤더,
+CRC, 크기 포함) 복사하고, 변경된 멤버만 deflate로 새로 압축합니다.
+ZIP64 / 암호화 / 분할 아카이브처럼 단순 복사가 안전하지 않은 입력은
+zipfile 기반 재압축 경로로 처리합니다.
+
+rewrite_hwpx()는 결과를 메모리에 모으지 않고 대상 파일 옆 임시 파일로
+스트리밍한 뒤 os.replace로 원자적으로 교체합니다 (원본 덮어쓰기도 안전).
+"""
+import os
+import struct
+import uuid
+import zipfile
+import zlib
+
+# ZIP 레코드 서명/구조 (APPNOTE.TXT 4.3)
+LOCAL_HEADER = struct.Struct('<4sHHHHHIIIHH')
+CENTRAL_HEADER = struct.Struct('<4sHHHHHHIIIHHHHHII')
+END_RECORD = struct.Struct('<4sHHHHIIH')
+LOCAL_SIG = b'PK\x03\x04'
+CENTRAL_SIG = b'PK\x01\x02'
+END_SIG = b'PK\x05\x06'
+
+FLAG_ENCRYPTED = 0x1
+FLAG_DATA_DESCRIPTOR = 0x8
+FLAG_UTF8 = 0x800
+ZIP32_LIMIT = 0xFFFFFFFF
+COPY_CHUNK = 1 << 20
+
+
+def _dos_datetime(date_time):
+    """ZipInfo.date_time → (dos_time, dos_date)"""
+    year, month, day, hour, minute, second = date_time
+    dos_date = (max(year, 1980) - 1980) << 9 | month << 5 | day
+    dos_time = hour << 11 | minute << 5 | second // 2
+    return dos_time, dos_date
+
+
+def _encoded_name(info):
+    """ZipInfo.filename을 원본 바이트로 (UTF-8 플래그가 없으면 cp437)"""
+    if info.flag_bits & FLAG_UTF8:
+        return info.filename.encode('utf-8')
+    try:
+        return info.filename.encode('cp437')
+    except UnicodeEncodeError:
+        return info.filename.encode('utf-8')
+
+
+def _can_copy_raw(z_in):
+    """모든 멤버를 압축 스트림 그대로 복사해도 되는지 (ZIP64/암호화 없음)"""
+    if len(z_in.infolist()) >= 0xFFFF:
+        return False
+    for info in z_in.infolist():
+        if info.flag_bits & FLAG_ENCRYPTED:
+            return False
+        if max(info.compress_size, info.file_size, info.header_offset) >= ZIP32_LIMIT:
+            return False
+    return True
+
+
+class _RawZipWriter:
+    """로컬 헤더/중앙 디렉터리를 직접 기록하는 최소 ZIP 작성기 (ZIP64 미지원)"""
+
+    def __init__(self, dst):
+        self.dst = dst
+        self.offset = 0
+        self.central = []
+
+    def _write(self, data):
+        self.dst.write(data)
+        self.offset += len(data)
+
+    def copy_member(self, src_fp, info):
+        """원본 멤버의 로컬 헤더 + 압축 데이터를 그대로 복사"""
+        src_fp.seek(info.header_offset)
+        header = src_fp.read(LOCAL_HEADER.size)
+        fields = LOCAL_HEADER.unpack(header)
+        if fields[0] != LOCAL_SIG:
+            raise zipfile.BadZipFile(f"로컬 헤더 손상: {info.filename}")
+        name_extra = src_fp.read(fields[9] + fields[10])
+
+        local_offset = self.offset
+        flag_bits = info.flag_bits
+        if flag_bits & FLAG_DATA_DESCRIPTOR:
+            # 데이터 디스크립터 대신 로컬 헤더에 CRC/크기를 직접 기록
+            flag_bits &= ~FLAG_DATA_DESCRIPTOR
+            name = _encoded_name(info)
+            local_extra = name_extra[fields[9]:]
+            self._write(LOCAL_HEADER.pack(
+                LOCAL_SIG, fields[1], flag_bits, fields[3], fields[4], fields[5],
+                info.CRC, info.compress_size, info.file_size, len(name), len(local_extra)))
+            self._write(name + local_extra)
+        else:
+            self._write(header + name_extra)
+
+        remaining = info.compress_size
+        while remaining > 0:
+            chunk = src_fp.read(min(COPY_CHUNK, remaining))
+            if not chunk:
+                raise zipfile.BadZipFile(f"압축 데이터가 잘렸습니다: {info.filename}")
+            self._write(chunk)
+            remaining -= len(chunk)
+
+        self.central.append((info, flag_bits, info.compress_type, info.CRC,
+                             info.compress_size, info.file_size, local_offset))
+
+    def write_member(self, info, data, compress_type):
+        """새 데이터를 압축하여 기록 (info의 이름/시각/속성 유지)"""
+        crc = zlib.crc32(data) & 0xFFFFFFFF
+        if compress_type == zipfile.ZIP_DEFLATED:
+            compressor = zlib.compressobj(zlib.Z_DEFAULT_COMPRESSION, zlib.DEFLATED, -15)
+            payload = compressor.compress(data) + compressor.flush()
+        else:
+            payload = data
+
+        name = _encoded_name(info)
+        flag_bits = info.flag_bits & FLAG_UTF8
+        dos_time, dos_date = _dos_datetime(info.date_time)
+        local_offset = self.offset
+        self._write(LOCAL_HEADER.pack(
+            LOCAL_SIG, 20, flag_bits, compress_type, dos_time, dos_date,
+            crc, len(payload), len(data), len(name), 0))
+        self._write(name)
+        self._write(payload)
+
+        self.central.append((info, flag_bits, compress_type, crc,
+                             len(payload), len(data), local_offset))
+
+    def close(self, comment=b''):
+        """중앙 디렉터리 + 종료 레코드 기록"""
+        cd_offset = self.offset
+        for info, flag_bits, compress_type, crc, csize, usize, local_offset in self.central:
+            name = _encoded_name(info)
+            dos_time, dos_date = _dos_datetime(info.date_time)
+            extra = info.extra or b''
+            comment_bytes = info.comment or b''
+            self._write(CENTRAL_HEADER.pack(
+                CENTRAL_SIG, info.create_version | (info.create_system << 8),
+                max(info.extract_version, 20) if compress_type == zipfile.ZIP_DEFLATED
+                else info.extract_version,
+                flag_bits, compress_type, dos_time, dos_date, crc, csize, usize,
+                len(name), len(extra), len(comment_bytes), 0,
+                info.internal_attr, info.external_attr, local_offset))
+            self._write(name + extra + comment_bytes)
+        cd_size = self.offset - cd_offset
+        count = len(self.central)
+        self._write(END_RECORD.pack(END_SIG, 0, 0, count, count, cd_size, cd_offset, len(comment)))
+        self._write(comment)
+
+
+def write_hwpx(src, dst, modified=None):
+    """src HWPX를 dst로 다시 쓰면서 modified 멤버만 교체/재압축.
+
+    변경되지 않은 멤버는 압축 스트림을 그대로 복사하므로 이미지가 많은 문서도
+    섹션 몇 개를 다시 압축하는 시간만 듭니다. 멤버 순서, 이름, 시각, 속성은
+    원본과 같고 mimetype은 항상 무압축(STORED)으로 기록합니다.
+
+    Args:
+        src: 원본 HWPX 경로 또는 seek 가능한 바이너리 파일 객체
+        dst: 쓰기용 바이너리 파일 객체 (처음 위치에서 시작)
+        modified: {멤버 이름: 새 바이트} — 원본에 없는 이름은 끝에 추가,
+            값이 None이면 해당 멤버를 출력에서 제거
+
+    Returns:
+        int: 다시 압축한 멤버 수
+    """
+    modified = modified or {}
+    src_fp = open(src, 'rb') if isinstance(src, (str, bytes)) or hasattr(src, '__fspath__') else src
+    try:
+        with zipfile.ZipFile(src_fp, 'r') as z_in:
+            if not _can_copy_raw(z_in):
+                return _write_hwpx_zipfile(z_in, dst, modified)
+
+            writer = _RawZipWriter(dst)
+            rewritten = 0
+            for info in z_in.infolist():
+                if info.filename in modified and modified[info.filename] is None:
+                    continue
+                if info.filename in modified:
+                    compress_type = (zipfile.ZIP_STORED if info.filename == 'mimetype'
+                                     else zipfile.ZIP_DEFLATED)
+                    writer.write_member(info, modified[info.filename], compress_type)
+                    rewritten += 1
+                elif info.filename == 'mimetype' and info.compress_type != zipfile.ZIP_STORED:
+                    writer.write_member(info, z_in.read(info), zipfile.ZIP_STORED)
+                    rewritten += 1
+                else:
+                    writer.copy_member(src_fp, info)
+
+            existing = set(z_in.namelist())
+            for name, data in modified.items():
+                if name not in existing and data is not None:
+                    info = zipfile.ZipInfo(name)
+                    if not name.isascii():
+                        info.flag_bits |= FLAG_UTF8
+                    writer.write_member(info, data, zipfile.ZIP_DEFLATED)
+                    rewritten += 1
+
+            writer.close(z_in.comment)
+            return rewritten
+    finally:
+        if src_fp is not src:
+            src_fp.close()
+
+
+def rewrite_hwpx(src_path, dst_path, modified=None):
+    """src_path HWPX를 dst_path에 다시 씀 (임시 파일 스트리밍 + 원자적 교체).
+
+    임시 파일은 dst_path와 같은 폴더에 만들어 os.replace가 같은 파일 시스템 안의
+    rename이 되도록 합니다. 원본은 경로로 열어 필요한 멤버만 읽으므로 입력/출력
+    아카이브 전체를 메모리에 올리지 않으며, 실패하면 임시 파일을 지우고
+    dst_path는 건드리지 않습니다. src_path와 dst_path가 같아도 됩니다
+    (원본은 교체 전에 닫힘 — Windows 호환).
+
+    Args:
+        src_path: 원본 HWPX 경로
+        dst_path: 출력 HWPX 경로
+        modified: write_hwpx()와 동일
+
+    Returns:
+        int: 다시 압축한 멤버 수
+    """
+    dst_dir = os.path.dirname(os.path.abspath(dst_path))
+    tmp_path = os.path.join(dst_dir, f'.{os.path.basename(dst_path)}.{uuid.uuid4().hex[:8]}.tmp')
+    try:
+        with open(tmp_path, 'xb') as f:
+            rewritten = write_hwpx(src_path, f, modified)
+        os.replace(tmp_path, dst_path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    return rewritten
+
+
+def _write_hwpx_zipfile(z_in, dst, modified):
+    """zipfile 기반 재작성 (ZIP64/암호화 등 원본 복사가 불가능한 입력용)"""
+    with zipfile.ZipFile(dst, 'w', zipfile.ZIP_DEFLATED) as z_out:
+        for item in z_in.infolist():
+            if item.filename in modified and modified[item.filename] is None:
+                continue
+            if item.filename in modified:
+                z_out.writestr(item, modified[item.filename],
+                               compress_type=(zipfile.ZIP_STORED if item.filename == 'mimetype'
+                                              else zipfile.ZIP_DEFLATED))
+            elif item.filename == 'mimetype':
+                z_out.writestr(item, z_in.read(item.filename), compress_type=zipfile.ZIP_STORED)
+            else:
+                z_out.writestr(item, z_in.read(item.filename))
+        existing = set(z_in.namelist())
+        for name, data in modified.items():
+            if name not in existing and data is not None:
+                z_out.writestr(name, data)
+    return len(z_in.infolist())
@@ -0,0 +1,161 @@
+"""
+image_store.py - HWPX BinData 이미지 추출 (내용 해시 파일명 + 스레드 풀 쓰기/재인코딩)
+
+hwpx_to_md.HwpxToMarkdown이 hp:pic 참조를 만날 때마다 extract()를 호출합니다.
+파일명(내용 해시)은 호출 즉시 정해서 마크다운 링크에 쓰고, 실제 파일 쓰기와
+BMP→PNG 재인코딩(Pillow)은 스레드 풀에 맡겨 섹션 변환과 동시에 진행합니다.
+close()가 모든 작업을 기다린 뒤 첫 오류를 다시 발생시킵니다.
+
+메모리 상한:
+  - 동시에 처리 중인 이미지는 workers × 2개까지 (그 이상이면 extract()가 대기)
+  - max_image_bytes보다 큰 이미지는 메모리에 올리지 않고 ZIP에서 청크 단위로
+    해시/복사하며, BMP여도 재인코딩하지 않습니다 (Pillow 디코딩은 전체 픽셀을 메모리에 올림)
+"""
+import io
+import os
+import shutil
+import hashlib
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+DEFAULT_WORKERS = 4
+DEFAULT_MAX_IMAGE_BYTES = 64 * 1024 * 1024
+COPY_CHUNK = 1 << 20
+
+_pillow_available = None
+
+
+def pillow_available():
+    """Pillow 설치 여부 (한 번만 확인)"""
+    global _pillow_available
+    if _pillow_available is None:
+        try:
+            import PIL.Image  # noqa: F401
+            _pillow_available = True
+        except ImportError:
+            _pillow_available = False
+    return _pillow_available
+
+
+def _write_image(z, member, data, out_path, reencode):
+    """이미지 하나를 out_path에 기록 (임시 파일 → os.replace — 중단돼도 반쪽 파일 없음).
+
+    Args:
+        z: 원본 ZipFile (data가 None일 때 스트리밍 복사용)
+        data: 이미지 바이트 (None이면 z에서 member를 청크 단위로 복사)
+        reencode: True면 Pillow로 PNG 재인코딩
+    """
+    tmp_path = f'{out_path}.{uuid.uuid4().hex[:8]}.tmp'
+    try:
+        if reencode:
+            from PIL import Image
+            with Image.open(io.BytesIO(data)) as img:
+                img.save(tmp_path, 'PNG')
+        elif data is not None:
+            with open(tmp_path, 'wb') as f:
+                f.write(data)
+        else:
+            with z.open(member) as src, open(tmp_path, 'wb') as dst:
+                shutil.copyfileobj(src, dst, COPY_CHUNK)
+        os.replace(tmp_path, out_path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+class ImageStore:
+    """BinData 멤버를 images_dir에 내용 해시 이름으로 저장"""
+
+    def __init__(self, z, images_dir, convert_bmp=True, workers=DEFAULT_WORKERS,
+                 max_image_bytes=DEFAULT_MAX_IMAGE_BYTES):
+        """
+        Args:
+            z: 열려 있는 원본 ZipFile (close()까지 열려 있어야 함)
+            images_dir: 출력 폴더 (첫 이미지를 쓸 때 생성)
+            convert_bmp: BMP를 PNG로 재인코딩 (Pillow 없으면 BMP 그대로)
+            workers: 쓰기/재인코딩 스레드 수 (0이면 extract()에서 바로 처리)
+            max_image_bytes: 이보다 큰 이미지는 스트리밍 복사, 재인코딩 생략
+        """
+        self.z = z
+        self.images_dir = images_dir
+        self.convert_bmp = convert_bmp
+        self.max_image_bytes = max_image_bytes
+        self.by_digest = {}  # 내용 해시 -> 파일명 (같은 바이트는 한 번만 저장)
+        self._futures = []
+        if workers > 0:
+            self._pool = ThreadPoolExecutor(max_workers=workers,
+                                            thread_name_prefix='hwpx-image')
+            self._slots = threading.BoundedSemaphore(workers * 2)
+        else:
+            self._pool = None
+            self._slots = None
+
+    def extract(self, member):
+        """member를 저장하도록 예약하고 파일명 반환 (파일은 close() 이후 보장)"""
+        if self._slots is not None:
+            self._slots.acquire()
+        submitted = False
+        try:
+            info = self.z.getinfo(member)
+            ext = os.path.splitext(member)[1].lower()
+            if info.file_size > self.max_image_bytes:
+                data = None
+                digest = self._hash_member(member)
+            else:
+                data = self.z.read(member)
+                digest = hashlib.sha256(data).hexdigest()[:16]
+
+            out_name = self.by_digest.get(digest)
+            if out_name is not None:
+                return out_name
+
+            reencode = (ext == '.bmp' and self.convert_bmp and data is not None
+                        and pillow_available())
+            out_name = f"{digest}.png" if reencode else f"{digest}{ext}"
+            self.by_digest[digest] = out_name
+
+            out_path = os.path.join(self.images_dir, out_name)
+            if os.path.exists(out_path):
+                return out_name  # 이전 변환에서 같은 내용을 이미 저장함
+            os.makedirs(self.images_dir, exist_ok=True)
+
+            args = (self.z, member, data, out_path, reencode)
+            if self._pool is None:
+                _write_image(*args)
+            else:
+                future = self._pool.submit(_write_image, *args)
+                future.add_done_callback(lambda _: self._slots.release())
+                self._futures.append(future)
+                submitted = True
+            return out_name
+        finally:
+            if self._slots is not None and not submitted:
+                self._slots.release()
+
+    def _hash_member(self, member):
+        """큰 멤버를 메모리에 올리지 않고 해시"""
+        h = hashlib.sha256()
+        with self.z.open(member) as f:
+            for chunk in iter(lambda: f.read(COPY_CHUNK), b''):
+                h.update(chunk)
+        return h.hexdigest()[:16]
+
+    def close(self, wait_only=False):
+        """예약된 모든 쓰기를 기다림. 실패한 작업이 있으면 첫 오류를 다시 발생.
+
+        Args:
+            wait_only: True면 오류를 무시하고 기다리기만 함 (다른 예외를 처리 중일 때)
+        """
+        if self._pool is None:
+            return
+        self._pool.shutdown(wait=True)
+        self._pool = None
+        futures, self._futures = self._futures, []
+        if wait_only:
+            return
+        for future in futures:
+            error = future.exception()
+            if error is not None:
+                raise error
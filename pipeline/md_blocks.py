@@ -0,0 +1,322 @@
+"""
+md_blocks.py - 마크다운 블록 토크나이저 (한 번의 선형 스캔)
+
+hwpx_to_md.py가 만든 마크다운을 줄 단위로 한 번만 훑어 타입이 있는 블록 목록으로
+나눕니다. smart_replace의 parse_markdown_tables / parse_markdown_paragraphs,
+convert.py auto, 대시보드 변경 분석은 모두 이 블록 목록을 소비합니다.
+
+블록 종류 (MdBlock.kind):
+  - table:     '|' 행이 이어지는 구간. 구분선(|---|)이 있으면 cells에 2D 셀 목록
+  - quote:     '>'로 시작하는 줄. '> '로 시작하면 cells = [[내용]] (1×1 테이블과 매칭)
+  - paragraph: 연속된 일반 텍스트 줄 (text = 줄들을 공백으로 이은 문자열)
+  - heading:   '#'으로 시작하는 줄
+  - image:     '!['로 시작하는 줄
+  - math:      '$$' 줄부터 다음 '$$' 줄까지
+  - footnote:  각주/미주 정의 '[^N]: ...'
+  - form:      양식 개체 '[x] ', '( ) ', '[콤보:', '[버튼:', '[입력란:'
+  - rule:      구분선 '---', '***', '___'
+  - comment:   HTML 주석 '<!-- ... -->'
+
+빈 줄은 블록을 만들지 않습니다. start/end는 0부터 시작하는 줄 번호 (end 미포함).
+
+retokenize_markdown은 편집 전 블록 목록을 재사용해 바뀐 줄 범위만 다시 스캔합니다
+(대시보드가 편집할 때마다 2MB 문서 전체를 다시 토크나이즈하지 않도록).
+"""
+import re
+from collections import namedtuple
+
+SEPARATOR_RE = re.compile(r'^\|[\s\-:|]+\|$')
+RULE_RE = re.compile(r'^[-*_]{3,}\s*$')
+FOOTNOTE_RE = re.compile(r'^\[\^.+?\]:')
+FORM_RE = re.compile(r'^(?:\[[ x]\]\s|\([ o]\)\s|\[(?:콤보|버튼|입력란):)')
+
+# 일반 텍스트 문단을 끊는 줄 시작 문자열
+PARA_BREAK_PREFIXES = ('|', '#', '>', '![', '<!--', '$$')
+
+# 셀 구분 파이프 (hwpx_to_md는 셀 안의 '|'를 '\|'로 이스케이프)
+CELL_SPLIT_RE = re.compile(r'(?<!\\)\|')
+
+
+# 마크다운 블록 하나. 튜플이라 수십만 개를 만들어도 생성/GC 추적 비용이 작음
+# (text: paragraph의 합친 텍스트, cells: table/quote의 2D 셀 목록)
+MdBlock = namedtuple('MdBlock', ['kind', 'start', 'end', 'text', 'cells'], defaults=(None, None))
+
+
+def _is_separator(stripped):
+    """테이블 구분선(|---|---|) 여부"""
+    return stripped[:1] == '|' and stripped[-1:] == '|' and SEPARATOR_RE.match(stripped) is not None
+
+
+def tokenize_markdown(md_text):
+    """마크다운을 블록 목록으로 분해 (줄마다 한 번만 검사, 선행 탐색은 다음 줄 하나).
+
+    Returns:
+        list of MdBlock (문서 순서)
+    """
+    lines = md_text.split('\n')
+    blocks, _ = _scan(lines, _strip_lines(lines), 0)
+    return blocks
+
+
+def _strip_lines(lines):
+    """앞뒤 공백을 제거한 줄 목록 + 선행 탐색용 보초 (빈 줄)"""
+    stripped_lines = list(map(str.strip, lines))
+    stripped_lines.append('')
+    return stripped_lines
+
+
+def _scan(lines, stripped_lines, i, sync_line=None, old_blocks=(), j=0, delta=0):
+    """lines[i:]를 블록으로 분해.
+
+    블록 분해는 시작 줄 이후의 줄만 보므로, sync_line 이후에서 블록이 시작되는 줄이
+    old_blocks[j:]의 블록 시작(줄 번호 + delta)과 같으면 거기서부터는 old_blocks와 같은
+    결과입니다. 그 지점에서 멈추고 해당 old_blocks 순번을 함께 돌려줍니다.
+
+    Returns:
+        (blocks, sync_index) — 끝까지 스캔했으면 sync_index는 None
+    """
+    n = len(lines)
+    blocks = []
+    append = blocks.append
+    separator_match = SEPARATOR_RE.match
+    if sync_line is None:
+        sync_line = n + 1  # 동기화 안 함 — 줄마다 정수 비교 한 번
+    n_old = len(old_blocks)
+
+    while i < n:
+        if i >= sync_line:
+            while j < n_old and old_blocks[j].start + delta < i:
+                j += 1
+            if j < n_old and old_blocks[j].start + delta == i:
+                return blocks, j
+        stripped = stripped_lines[i]
+        if not stripped:
+            i += 1
+            continue
+        first = stripped[0]
+
+        # 테이블 행 ('|'로 시작하거나, 다음 줄이 구분선인 헤더 줄부터 '|' 줄이 끝날 때까지)
+        if first == '|' or ('|' in stripped and separator_match(stripped_lines[i + 1])):
+            start = i
+            header = None
+            while stripped and '|' in stripped:
+                if header is None and separator_match(stripped_lines[i + 1]):
+                    header = i
+                i += 1
+                stripped = stripped_lines[i]
+            cells = _parse_table_lines(stripped_lines[header:i]) if header is not None else None
+            append(MdBlock('table', start, i, None, cells))
+            continue
+
+        if first == '#':
+            append(MdBlock('heading', i, i + 1))
+            i += 1
+        elif first == '>':
+            # hwpx_to_md는 1×1 테이블을 '> 내용' 한 줄로 변환
+            line = lines[i]
+            cells = [[line[2:].strip()]] if line.startswith('> ') else None
+            append(MdBlock('quote', i, i + 1, None, cells))
+            i += 1
+        elif stripped.startswith('!['):
+            append(MdBlock('image', i, i + 1))
+            i += 1
+        elif first in '-*_' and RULE_RE.match(stripped):
+            append(MdBlock('rule', i, i + 1))
+            i += 1
+        elif stripped.startswith('<!--'):
+            append(MdBlock('comment', i, i + 1))
+            i += 1
+        elif stripped.startswith('$$'):
+            # 여는 $$ 줄 ~ 닫는 $$ 줄까지 (닫는 줄이 없으면 문서 끝까지)
+            start = i
+            i += 1
+            while i < n and not stripped_lines[i].startswith('$$'):
+                i += 1
+            if i < n:
+                i += 1
+            append(MdBlock('math', start, i))
+        elif first == '[' and FOOTNOTE_RE.match(stripped):
+            append(MdBlock('footnote', i, i + 1))
+            i += 1
+        elif first in '[(' and FORM_RE.match(stripped):
+            append(MdBlock('form', i, i + 1))
+            i += 1
+        else:
+            # 일반 텍스트 — 연속된 줄을 하나의 문단으로
+            start = i
+            parts = [stripped]
+            i += 1
+            while i < n:
+                stripped = stripped_lines[i]
+                if not stripped or stripped.startswith(PARA_BREAK_PREFIXES):
+                    break
+                first = stripped[0]
+                if first == '[' and FOOTNOTE_RE.match(stripped):
+                    break
+                if first in '-*_' and RULE_RE.match(stripped):
+                    break
+                # 다음 줄이 테이블 구분선이면 현재 줄은 테이블 헤더
+                if '|' in stripped and separator_match(stripped_lines[i + 1]):
+                    break
+                parts.append(stripped)
+                i += 1
+            append(MdBlock('paragraph', start, i, ' '.join(parts)))
+
+    return blocks, None
+
+
+def _common_run(a, b, limit, from_end):
+    """두 줄 목록의 공통 앞부분(from_end면 뒷부분) 줄 수, 최대 limit.
+
+    구간을 반씩 줄여 가며 슬라이스끼리 비교하므로 줄 비교는 C 수준에서 모두 합쳐 O(n).
+    """
+    n_a, n_b = len(a), len(b)
+    lo, hi = 0, limit
+    while lo < hi:
+        mid = (lo + hi + 1) // 2
+        if from_end:
+            same = a[n_a - mid:n_a - lo] == b[n_b - mid:n_b - lo]
+        else:
+            same = a[lo:mid] == b[lo:mid]
+        if same:
+            lo = mid
+        else:
+            hi = mid - 1
+    return lo
+
+
+def retokenize_markdown(old_lines, old_blocks, new_lines):
+    """편집 전 블록을 재사용해 바뀐 줄 범위만 다시 토크나이즈.
+
+    결과는 tokenize_markdown('\n'.join(new_lines))와 같습니다. 블록 하나는 자기 줄과
+    뒤의 두 줄까지만 보고 정해지므로 (문단/테이블 끝의 선행 탐색), 처음 바뀐 줄보다
+    두 줄 이상 앞에서 끝나는 블록은 그대로 두고 그 뒤부터 스캔합니다. 바뀐 구간을 지나
+    공통 뒷부분에서 블록 시작이 편집 전 블록 시작(줄 수 차이만큼 이동)과 맞으면 스캔을
+    멈추고 나머지 블록은 줄 번호만 옮겨 이어 붙입니다.
+
+    Args:
+        old_lines: 편집 전 마크다운 줄 목록 (md_text.split('\n'))
+        old_blocks: tokenize_markdown(편집 전 마크다운) 결과
+        new_lines: 편집 후 마크다운 줄 목록
+
+    Returns:
+        list of MdBlock (편집 후 문서 순서)
+    """
+    n_old = len(old_lines)
+    n_new = len(new_lines)
+    prefix = _common_run(old_lines, new_lines, min(n_old, n_new), from_end=False)
+    if prefix == n_old == n_new:
+        return list(old_blocks)
+    suffix = _common_run(old_lines, new_lines, min(n_old, n_new) - prefix, from_end=True)
+
+    # 앞쪽에서 그대로 쓸 블록 수 (end + 1 < prefix인 블록 — 이진 탐색)
+    lo, hi = 0, len(old_blocks)
+    while lo < hi:
+        mid = (lo + hi) // 2
+        if old_blocks[mid].end + 1 < prefix:
+            lo = mid + 1
+        else:
+            hi = mid
+    keep = lo
+    restart = old_blocks[keep - 1].end if keep else 0
+
+    delta = n_new - n_old
+    scanned, sync = _scan(new_lines, _strip_lines(new_lines), restart,
+                          sync_line=n_new - suffix, old_blocks=old_blocks, j=keep, delta=delta)
+    blocks = old_blocks[:keep]
+    blocks.extend(scanned)
+    if sync is not None:
+        if delta:
+            blocks.extend(MdBlock(b.kind, b.start + delta, b.end + delta, b.text, b.cells)
+                          for b in old_blocks[sync:])
+        else:
+            blocks.extend(old_blocks[sync:])
+    return blocks
+
+
+def _parse_table_lines(table_lines):
+    """마크다운 테이블 행들(앞뒤 공백 제거된 줄)을 2D 리스트로 변환"""
+    cells = []
+    for idx, stripped in enumerate(table_lines):
+        if idx == 1 and _is_separator(stripped):
+            continue
+        if stripped[:1] == '|':
+            stripped = stripped[1:]
+        if '\\|' not in stripped:
+            if stripped[-1:] == '|':
+                stripped = stripped[:-1]
+            cells.append([c.strip() for c in stripped.split('|')])
+            continue
+        # 이스케이프된 파이프는 셀 내용 — 나머지 파이프에서만 나누고 '|'로 되돌림
+        if stripped[-1:] == '|' and stripped[-2:] != '\\|':
+            stripped = stripped[:-1]
+        cells.append([c.strip().replace('\\|', '|') for c in CELL_SPLIT_RE.split(stripped)])
+    return cells
+
+
+def markdown_tables(blocks):
+    """블록 목록에서 테이블/인용문 추출 (parse_markdown_tables 형식)
+
+    Returns:
+        list of dict: {'type': 'table'|'quote', 'cells': 2D list}
+    """
+    return [{'type': b.kind, 'cells': b.cells} for b in blocks if b.cells is not None]
+
+
+def markdown_paragraphs(blocks):
+    """블록 목록에서 일반 텍스트 문단 추출 (parse_markdown_paragraphs 형식)
+
+    Returns:
+        list of str
+    """
+    return [b.text for b in blocks if b.kind == 'paragraph']
+
+
+def changed_blocks(orig_blocks, edited_blocks):
+    """원본/편집본 블록 목록을 비교해 내용이 바뀐 테이블/문단 순번을 찾음.
+
+    공통 앞/뒤 블록을 잘라낸 가운데 구간만 비교합니다 (줄 번호는 무시 — 문단이
+    한 줄 늘어도 뒤쪽 블록은 같은 블록). 가운데 구간의 블록 종류 순서가 같으면
+    (테이블/문단 추가·삭제 없음) 같은 위치끼리 짝지어 내용이 다른 것만 돌려주고,
+    구조가 바뀌었으면 None을 돌려줍니다.
+
+    Returns:
+        (table_ordinals, paragraph_ordinals): markdown_tables() / markdown_paragraphs()
+        순번 목록 — 구조가 바뀌었으면 None
+    """
+    n = len(orig_blocks)
+    m = len(edited_blocks)
+
+    lo = 0
+    limit = min(n, m)
+    while lo < limit and _same_block(orig_blocks[lo], edited_blocks[lo]):
+        lo += 1
+    hi_o, hi_e = n, m
+    while hi_o > lo and hi_e > lo and _same_block(orig_blocks[hi_o - 1], edited_blocks[hi_e - 1]):
+        hi_o -= 1
+        hi_e -= 1
+
+    if hi_o - lo != hi_e - lo:
+        return None
+
+    table_ord = sum(1 for b in orig_blocks[:lo] if b.cells is not None)
+    para_ord = sum(1 for b in orig_blocks[:lo] if b.kind == 'paragraph')
+    tables = []
+    paragraphs = []
+    for a, b in zip(orig_blocks[lo:hi_o], edited_blocks[lo:hi_e]):
+        if a.kind != b.kind or (a.cells is None) != (b.cells is None):
+            return None
+        if a.cells is not None:
+            if a.cells != b.cells:
+                tables.append(table_ord)
+            table_ord += 1
+        elif a.kind == 'paragraph':
+            if a.text != b.text:
+                paragraphs.append(para_ord)
+            para_ord += 1
+    return tables, paragraphs
+
+
+def _same_block(a, b):
+    """줄 번호를 제외한 블록 내용 비교"""
+    return a.kind == b.kind and a.text == b.text and a.cells == b.cells
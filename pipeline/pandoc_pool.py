@@ -0,0 +1,164 @@
+"""
+pandoc_pool.py - pypandoc-hwpx 상주 워커 풀 (일괄 to-hwpx)
+
+convert_md_to_hwpx의 pandoc 경로는 문서마다 pypandoc-hwpx 프로세스를 새로 띄우므로
+일괄 변환에서는 파이썬 시작/모듈 로딩이 변환 시간보다 커집니다. 여기서는 워커
+프로세스(pandoc_worker.py) N개를 한 번 띄워 두고, 줄 단위 JSON 파이프로 마크다운
+작업을 차례로 넘깁니다.
+
+  - 워커마다 디스패처 스레드 하나: 응답을 받으면 다음 작업을 먼저 보내고
+    그 사이에 결과 파일을 _patch_hwpx로 후처리 (변환과 후처리가 겹침)
+  - 워커가 죽으면 해당 작업만 실패로 기록하고 새 워커를 띄워 계속 진행
+  - command로 다른 워커 스크립트를 지정 가능 (pandoc 없이 테스트하는 대역 워커 등)
+
+사용 예:
+    with PandocWorkerPool(workers=4) as pool:
+        results = pool.run([{'input': 'a.md', 'output': 'a.hwpx', 'reference_doc': None}])
+"""
+import os
+import sys
+import json
+import queue
+import threading
+import subprocess
+
+from md_to_hwpx import _patch_hwpx
+
+WORKER_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'pandoc_worker.py')
+CLOSE_TIMEOUT = 10
+
+
+class PandocWorkerPool:
+    """상주 pypandoc-hwpx 워커 N개에 마크다운 변환 작업을 분배"""
+
+    def __init__(self, workers=2, command=None, patch=True):
+        """
+        Args:
+            workers: 워커 프로세스 수
+            command: 워커 실행 명령 목록 (기본: 현재 인터프리터로 pandoc_worker.py)
+            patch: True면 성공한 출력에 _patch_hwpx 적용
+        """
+        self.workers = max(1, workers)
+        self.command = list(command) if command else [sys.executable, WORKER_SCRIPT]
+        self.patch = patch
+        self.restarts = 0  # 비정상 종료로 다시 띄운 워커 수
+        self._procs = []
+        self._lock = threading.Lock()
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _spawn(self):
+        return subprocess.Popen(self.command, stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+                                encoding='utf-8', bufsize=1)
+
+    def start(self):
+        """워커 프로세스 시작 (이미 시작했으면 아무것도 안 함)"""
+        while len(self._procs) < self.workers:
+            self._procs.append(self._spawn())
+
+    def close(self):
+        """표준 입력을 닫아 워커를 종료시키고 기다림 (응답이 없으면 강제 종료)"""
+        procs, self._procs = self._procs, []
+        for proc in procs:
+            try:
+                proc.stdin.close()
+            except OSError:
+                pass
+        for proc in procs:
+            try:
+                proc.wait(timeout=CLOSE_TIMEOUT)
+            except subprocess.TimeoutExpired:
+                proc.kill()
+                proc.wait()
+            proc.stdout.close()
+
+    def run(self, jobs, callback=None):
+        """작업 목록을 워커들에 나눠 실행.
+
+        Args:
+            jobs: [{'input': md, 'output': hwpx, 'reference_doc': hwpx|None}, ...]
+            callback: callback(index, result) — 작업이 끝날 때마다 (한 번에 한 스레드만 호출)
+
+        Returns:
+            list of dict (jobs와 같은 순서): {'ok', 'error', 'log', 'patched', 'pid'}
+        """
+        self.start()
+        pending = queue.Queue()
+        for item in enumerate(jobs):
+            pending.put(item)
+        results = [None] * len(jobs)
+        threads = [threading.Thread(target=self._drive, args=(slot, pending, results, callback),
+                                    daemon=True)
+                   for slot in range(min(self.workers, len(jobs)))]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return results
+
+    @staticmethod
+    def _next(pending):
+        try:
+            return pending.get_nowait()
+        except queue.Empty:
+            return None
+
+    @staticmethod
+    def _send(proc, item):
+        index, job = item
+        request = {'id': index, 'input': job['input'], 'output': job['output'],
+                   'reference_doc': job.get('reference_doc')}
+        try:
+            proc.stdin.write(json.dumps(request, ensure_ascii=False) + '\n')
+            proc.stdin.flush()
+        except OSError:
+            pass  # 워커가 이미 죽음 — readline()이 EOF를 돌려주면 실패로 처리
+
+    def _drive(self, slot, pending, results, callback):
+        """워커 하나 담당: 작업 전송 → 응답 수신 → 다음 작업 전송 → 후처리"""
+        current = self._next(pending)
+        if current is not None:
+            self._send(self._procs[slot], current)
+        while current is not None:
+            index, job = current
+            proc = self._procs[slot]
+            line = proc.stdout.readline()
+            if not line:
+                code = proc.wait()
+                proc.stdout.close()
+                with self._lock:
+                    self._procs[slot] = self._spawn()
+                    self.restarts += 1
+                result = {'ok': False, 'error': f"워커가 비정상 종료됨 (exit code: {code})",
+                          'log': '', 'patched': False, 'pid': proc.pid}
+                upcoming = self._next(pending)
+                if upcoming is not None:
+                    self._send(self._procs[slot], upcoming)
+            else:
+                response = json.loads(line)
+                upcoming = self._next(pending)
+                if upcoming is not None:
+                    self._send(proc, upcoming)  # 워커는 다음 변환 시작, 여기서는 후처리
+                result = self._finish(job, response)
+            results[index] = result
+            if callback is not None:
+                with self._lock:
+                    callback(index, result)
+            current = upcoming
+
+    def _finish(self, job, response):
+        """워커 응답 → 결과 dict (성공 시 _patch_hwpx 후처리)"""
+        result = {'ok': response.get('ok', False), 'error': response.get('error', ''),
+                  'log': response.get('log', ''), 'patched': False, 'pid': response.get('pid')}
+        if result['ok'] and self.patch:
+            try:
+                result['patched'] = _patch_hwpx(job['output'])
+            except Exception as e:
+                result['ok'] = False
+                result['error'] = f"후처리 실패 — {type(e).__name__}: {e}"
+        return result
@@ -0,0 +1,106 @@
+"""
+pandoc_worker.py - pypandoc-hwpx 상주 워커 (pandoc_pool.PandocWorkerPool이 실행)
+
+표준 입력으로 작업을 한 줄에 하나씩(JSON) 받아 변환하고, 결과를 표준 출력에
+한 줄씩(JSON) 돌려줍니다. 프로세스를 문서마다 새로 띄우지 않으므로 파이썬 시작과
+pypandoc / pypandoc-hwpx import 비용은 워커당 한 번만 듭니다.
+
+프로토콜 (줄 단위 JSON, UTF-8):
+    요청: {"id": 3, "input": "a.md", "output": "a.hwpx", "reference_doc": "양식.hwpx"|null}
+    응답: {"id": 3, "ok": true|false, "error": "...", "log": "...", "pid": 1234}
+표준 입력이 닫히면 종료합니다.
+
+변환은 pypandoc-hwpx 콘솔 스크립트의 진입점 함수를 이 프로세스 안에서 호출합니다.
+진입점을 찾지 못하면 외부 명령(pypandoc-hwpx)을 작업마다 실행합니다.
+테스트용 대역 워커는 serve()에 변환 함수를 넘겨 같은 프로토콜을 구현합니다.
+"""
+import io
+import os
+import sys
+import json
+import contextlib
+import subprocess
+import traceback
+
+PANDOC_COMMAND = 'pypandoc-hwpx'
+
+
+def _entry_point():
+    """pypandoc-hwpx 콘솔 스크립트 진입점 함수 (없으면 None)"""
+    try:
+        from importlib.metadata import entry_points
+        for ep in entry_points(group='console_scripts'):
+            if ep.name == PANDOC_COMMAND:
+                return ep.load()
+    except Exception:
+        return None
+    return None
+
+
+def make_converter():
+    """convert(input_path, output_path, reference_doc) 함수 생성 (진입점을 한 번만 로드)"""
+    main = _entry_point()
+
+    def convert(input_path, output_path, reference_doc):
+        argv = [input_path, '-o', output_path]
+        if reference_doc:
+            argv.extend(['--reference-doc', reference_doc])
+        if main is None:
+            result = subprocess.run([PANDOC_COMMAND] + argv, capture_output=True, text=True)
+            print(result.stdout, end='')
+            print(result.stderr, end='', file=sys.stderr)
+            if result.returncode != 0:
+                raise RuntimeError(f"{PANDOC_COMMAND} 실패 (exit code: {result.returncode})")
+            return
+        saved_argv = sys.argv
+        sys.argv = [PANDOC_COMMAND] + argv
+        try:
+            code = main()
+        except SystemExit as e:
+            code = e.code
+        finally:
+            sys.argv = saved_argv
+        if code not in (None, 0):
+            raise RuntimeError(f"{PANDOC_COMMAND} 실패 (exit code: {code})")
+
+    return convert
+
+
+def serve(convert, stdin=None):
+    """작업 루프. 변환 중 출력은 응답의 'log'로 모으고 프로토콜 채널과 섞이지 않게 함.
+
+    Args:
+        convert: convert(input_path, output_path, reference_doc) — 실패 시 예외
+        stdin: 요청을 읽을 텍스트 스트림 (기본 sys.stdin)
+    """
+    stdin = stdin or io.TextIOWrapper(sys.stdin.buffer, encoding='utf-8')
+    # 프로토콜용 stdout을 따로 복제하고 fd 1은 stderr로 — 변환기가 하위 프로세스를
+    # 띄우거나 fd에 직접 써도 응답 줄이 깨지지 않음
+    sys.stdout.flush()
+    channel = os.fdopen(os.dup(1), 'w', encoding='utf-8', buffering=1)
+    os.dup2(2, 1)
+    pid = os.getpid()
+    for line in stdin:
+        if not line.strip():
+            continue
+        request = json.loads(line)
+        log = io.StringIO()
+        response = {'id': request.get('id'), 'ok': True, 'error': '', 'log': '', 'pid': pid}
+        try:
+            with contextlib.redirect_stdout(log), contextlib.redirect_stderr(log):
+                convert(request['input'], request['output'], request.get('reference_doc'))
+        except (Exception, SystemExit) as e:
+            response['ok'] = False
+            response['error'] = f"{type(e).__name__}: {e}"
+            log.write(traceback.format_exc())
+        response['log'] = log.getvalue()
+        channel.write(json.dumps(response, ensure_ascii=False) + '\n')
+    channel.close()
+
+
+def main():
+    serve(make_converter())
+
+
+if __name__ == '__main__':
+    main()
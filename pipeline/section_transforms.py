@@ -0,0 +1,243 @@
+"""
+section_transforms.py - 섹션 XML 변환 단계 (HWPX 재작성 시 함께 적용)
+
+섹션 XML 문자열을 받아 수정된 문자열을 돌려주는 함수(raw_xml → raw_xml)를
+"변환 단계"로 정의합니다. smart_replace는 텍스트 교체 직후 같은 섹션에 변환
+단계를 이어서 적용하므로, linesegarray 제거 같은 후처리를 위해 결과 HWPX를
+다시 읽고 다시 쓸 필요가 없습니다 (아카이브 재작성 1회).
+
+변환 함수는 모듈 최상위 함수여야 합니다 (smart_replace --jobs 프로세스 풀에서 pickle).
+
+제공 변환:
+  - strip_linesegarray:      linesegarray 제거 (한글이 줄 나눔을 재계산, 접두사 무관,
+                             스트림용 iter_strip_linesegarray / strip_linesegarray_stream)
+  - fill_empty_sublists:     빈 hp:subList에 빈 paragraph 주입 (pypandoc-hwpx 버그)
+  - unify_table_border_fill: hp:tbl의 borderFillIDRef를 첫 셀과 통일 (pypandoc-hwpx 버그)
+"""
+import re
+import zipfile
+
+from hwpx_zip import rewrite_hwpx
+
+SECTION_RE = re.compile(r'^Contents/section(\d+)\.xml$')
+
+# linesegarray 요소 하나 (접두사 P는 섹션에서 실제로 쓰인 것 — hp:, hp10:, 기본 네임스페이스 등).
+# 내용은 lineseg 자식 태그뿐이므로 '</'가 처음 나오는 곳이 곧 닫는 태그여야 하고, 자식이
+# 또 다른 linesegarray 여는 태그일 수도 없습니다. 그래서 .*? DOTALL처럼 닫는 태그를 찾아
+# 섹션 끝까지 훑지 않고, 닫히지 않은 요소가 많아도 요소마다 바로 다음 태그 근처에서
+# 실패하므로 전체가 선형입니다. 자기 닫힘형은 '>' 앞의 '/'로 구분합니다 (lookbehind).
+# 패턴이 리터럴 '<P:linesegarray'로 시작하므로 정규식 엔진이 모든 '<'에서 매칭을
+# 시도하지 않고 리터럴 검색으로 후보 위치만 찾습니다.
+_LINESEG_PATTERN = (r'<{p}linesegarray(?=[\s/>])[^>]*'
+                    r'(?:(?<=/)>|(?<!/)>[^<]*(?:<(?!{p}linesegarray[\s/>])[^/<][^<]*)*'
+                    r'</{p}linesegarray>)')
+PREFIX_RE = re.compile(r'(?:[\w.\-]+:)?$')
+_lineseg_patterns = {}
+STREAM_CHUNK = 1 << 20
+
+EMPTY_SUBLIST_RE = re.compile(r'(<hp:subList[^>]*>)(</hp:subList>)')
+FIRST_PARA_PR_RE = re.compile(r'<hp:p\s+paraPrIDRef="(\d+)"')
+# hp:tbl 시작 태그(그룹 1~3: 앞부분, borderFillIDRef 값, 뒷부분) 또는 hp:tc의 borderFillIDRef
+# (그룹 4) — 문서 순서로 한 번 훑으며 표와 그 첫 셀을 짝지음
+TABLE_BORDER_FILL_RE = re.compile(r'(<hp:tbl[^>]*?)borderFillIDRef="(\d+)"([^>]*>)'
+                                  r'|<hp:tc[^>]*borderFillIDRef="(\d+)"')
+
+
+# ============================================================
+# 변환 단계
+# ============================================================
+
+def _lineseg_pattern(prefix, is_bytes):
+    """접두사별 linesegarray 패턴 (컴파일 결과 캐시)"""
+    key = (prefix, is_bytes)
+    pattern = _lineseg_patterns.get(key)
+    if pattern is None:
+        source = _LINESEG_PATTERN.format(p=re.escape(prefix))
+        pattern = re.compile(source.encode('utf-8') if is_bytes else source)
+        _lineseg_patterns[key] = pattern
+    return pattern
+
+
+def strip_linesegarray(raw_xml):
+    """linesegarray 요소 제거 (내용 포함 형태 + 자기 닫힘 형태, 모든 네임스페이스 접두사).
+
+    linesegarray는 줄 나눔 정보를 담고 있으나, 텍스트 변경 시 무효화되어
+    한글에서 렌더링 오류를 유발할 수 있습니다. 제거 시 한글이 자동으로 재계산합니다.
+
+    'linesegarray'가 처음 나오는 태그에서 접두사를 읽어 그 접두사 패턴으로 섹션을
+    한 번 훑고, 다른 접두사가 남아 있으면 그 접두사로 반복합니다 (보통 1회).
+    str과 bytes(UTF-8) 모두 받습니다. 닫히지 않은 요소는 그대로 둡니다.
+    """
+    is_bytes = isinstance(raw_xml, bytes)
+    if is_bytes:
+        name, lt, slash = b'linesegarray', b'<', b'/'
+    else:
+        name, lt, slash = 'linesegarray', '<', '/'
+
+    done = set()
+    pos = raw_xml.find(name)
+    while pos >= 0:
+        tag_start = raw_xml.rfind(lt, 0, pos)
+        prefix = raw_xml[tag_start + 1:pos]
+        if prefix[:1] == slash:
+            prefix = prefix[1:]
+        if is_bytes:
+            prefix = prefix.decode('utf-8', 'replace')
+        if tag_start >= 0 and prefix not in done and PREFIX_RE.match(prefix):
+            done.add(prefix)
+            raw_xml = _lineseg_pattern(prefix, is_bytes).sub(raw_xml[:0], raw_xml)
+            pos = raw_xml.find(name)
+        else:
+            # 이미 처리한 접두사의 닫히지 않은 요소, 또는 텍스트 속 단어
+            pos = raw_xml.find(name, pos + len(name))
+    return raw_xml
+
+
+def _lineseg_safe_cut(buf):
+    """청크 buf에서 이 위치 앞까지는 linesegarray 요소가 잘리지 않는 지점.
+
+    마지막 '<' 이후는 잘린 태그일 수 있으므로 그 앞에서 자르고, 그 앞부분에서
+    마지막으로 언급된 linesegarray가 여는 태그라면 닫는 태그가 아직 오지 않았을 수
+    있으므로 여는 태그 앞에서 자릅니다 (속성값에는 '<'가 올 수 없음).
+    """
+    if isinstance(buf, bytes):
+        lt, slash, name = b'<', b'/', b'linesegarray'
+    else:
+        lt, slash, name = '<', '/', 'linesegarray'
+    cut = buf.rfind(lt)
+    if cut < 0:
+        return len(buf)
+    last_name = buf.rfind(name, 0, cut)
+    if last_name >= 0:
+        tag_start = buf.rfind(lt, 0, last_name)
+        if tag_start >= 0 and buf[tag_start + 1:tag_start + 2] != slash:
+            cut = tag_start
+    return cut
+
+
+def iter_strip_linesegarray(chunks):
+    """청크(str 또는 bytes) 이터러블에서 linesegarray를 제거하며 조각을 내보냄.
+
+    청크 경계에 걸친 요소는 다음 청크와 합쳐 처리하므로, 한 번에 메모리에 두는 양은
+    청크 하나 + 경계에 걸린 요소 하나입니다.
+    """
+    rest = None
+    for chunk in chunks:
+        buf = chunk if rest is None else rest + chunk
+        cut = _lineseg_safe_cut(buf)
+        if cut:
+            yield strip_linesegarray(buf[:cut])
+        rest = buf[cut:]
+    if rest:
+        yield strip_linesegarray(rest)
+
+
+def strip_linesegarray_stream(src, dst, chunk_size=STREAM_CHUNK):
+    """바이너리 스트림 src(예: ZipFile.open)를 읽어 linesegarray를 제거한 결과를 dst에 씀.
+
+    UTF-8 다중 바이트 문자는 ASCII 바이트를 포함하지 않으므로 디코딩 없이
+    바이트 단위로 처리합니다.
+
+    Returns:
+        int: dst에 쓴 바이트 수
+    """
+    written = 0
+    for piece in iter_strip_linesegarray(iter(lambda: src.read(chunk_size), b'')):
+        dst.write(piece)
+        written += len(piece)
+    return written
+
+
+def fill_empty_sublists(raw_xml):
+    """빈 hp:subList에 빈 paragraph 주입 (한글이 빈 subList에서 크래시)"""
+    if not EMPTY_SUBLIST_RE.search(raw_xml):
+        return raw_xml
+    # 문서에서 사용하는 paraPrIDRef 찾기 (첫 번째 hp:p에서 추출)
+    para_pr_match = FIRST_PARA_PR_RE.search(raw_xml)
+    para_pr_id = para_pr_match.group(1) if para_pr_match else "0"
+
+    empty_para = (
+        f'<hp:p paraPrIDRef="{para_pr_id}" styleIDRef="0"'
+        f' pageBreak="0" columnBreak="0" merged="0">'
+        f'<hp:run charPrIDRef="0"><hp:t></hp:t></hp:run></hp:p>'
+    )
+    return EMPTY_SUBLIST_RE.sub(r'\1' + empty_para + r'\2', raw_xml)
+
+
+def unify_table_border_fill(raw_xml):
+    """hp:tbl의 borderFillIDRef를 첫 번째 hp:tc의 값과 동일하게 교체.
+
+    pypandoc-hwpx가 "3"으로 하드코딩하지만 reference-doc 사용 시
+    ID 3이 테이블 보더가 아닌 다른 용도의 borderFill일 수 있음.
+
+    표 시작 태그와 셀 태그를 문서 순서로 한 번만 훑어, 아직 첫 셀을 만나지 않은
+    표들을 다음 셀의 값으로 확정하고 조각 목록으로 출력을 만듭니다 (표마다 섹션
+    나머지를 잘라 다시 검색/치환하지 않으므로 표 수에 대해 선형).
+    """
+    if '<hp:tbl' not in raw_xml:
+        return raw_xml
+    out = []
+    pending = []  # 첫 셀을 기다리는 표 — (out 인덱스, 표 태그 매치)
+    pos = 0
+    changed = False
+    for m in TABLE_BORDER_FILL_RE.finditer(raw_xml):
+        cell_bf_id = m.group(4)
+        if cell_bf_id is None:
+            out.append(raw_xml[pos:m.start()])
+            out.append(m.group(0))
+            pending.append((len(out) - 1, m))
+            pos = m.end()
+            continue
+        for index, tbl in pending:
+            if tbl.group(2) != cell_bf_id:
+                out[index] = f'{tbl.group(1)}borderFillIDRef="{cell_bf_id}"{tbl.group(3)}'
+                changed = True
+        pending.clear()
+    if not changed:
+        return raw_xml
+    out.append(raw_xml[pos:])
+    return ''.join(out)
+
+
+# pypandoc-hwpx 출력 후처리 (md_to_hwpx._patch_hwpx)
+PANDOC_FIXES = (fill_empty_sublists, unify_table_border_fill)
+
+
+# ============================================================
+# 적용
+# ============================================================
+
+def apply_transforms(raw_xml, transforms):
+    """변환 단계를 순서대로 적용"""
+    for transform in transforms:
+        raw_xml = transform(raw_xml)
+    return raw_xml
+
+
+def transform_hwpx(src_path, dst_path, transforms):
+    """HWPX의 모든 섹션에 변환 단계를 적용해 dst_path에 씀.
+
+    바뀐 섹션만 다시 압축하고 나머지 멤버는 압축 스트림 그대로 복사합니다
+    (hwpx_zip.rewrite_hwpx). 바뀐 섹션이 없고 src_path == dst_path이면 쓰지 않습니다.
+
+    Args:
+        src_path: 원본 HWPX 경로
+        dst_path: 출력 HWPX 경로 (src_path와 같아도 됨)
+        transforms: 변환 함수 목록
+
+    Returns:
+        list of str: 변경된 섹션 파일명
+    """
+    modified = {}
+    with zipfile.ZipFile(src_path, 'r') as z_in:
+        for name in z_in.namelist():
+            if not SECTION_RE.match(name):
+                continue
+            raw_xml = z_in.read(name).decode('utf-8')
+            new_xml = apply_transforms(raw_xml, transforms)
+            if new_xml != raw_xml:
+                modified[name] = new_xml.encode('utf-8')
+
+    if modified or src_path != dst_path:
+        rewrite_hwpx(src_path, dst_path, modified)
+    return list(modified)
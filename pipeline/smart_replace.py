@@ -21,10 +21,14 @@ import os
 import re
 import sys
 import argparse
-import zipfile
-import io
-import difflib
+from concurrent.futures import ProcessPoolExecutor
 from lxml import etree
+from text_nodes import TextNodeIndex, TextEditor
+from md_blocks import tokenize_markdown, markdown_tables, markdown_paragraphs, changed_blocks
+from hwpx_zip import rewrite_hwpx
+from section_transforms import apply_transforms
+from text_normalize import strip_md_format, normalize, xml_escape
+from text_diff import diff_opcodes
 
 
 # HWPX XML 네임스페이스 — 2011 (한컴) / 2024 (OWPML 표준) 자동 감지
@@ -76,205 +80,78 @@ def detect_close_tag(raw_xml):
 # 마크다운 파서
 # ============================================================
 
-def parse_markdown_tables(md_text):
+def parse_markdown_tables(md_text, blocks=None):
     """마크다운에서 테이블만 순서대로 추출 (인용문 포함).
 
+    Args:
+        blocks: 이미 만든 tokenize_markdown() 결과 (None이면 md_text를 토크나이즈)
+
     Returns:
         list of dict: {'type': 'table'|'quote', 'cells': 2D list}
     """
-    tables = []
-    lines = md_text.split('\n')
-    i = 0
-
-    while i < len(lines):
-        line = lines[i]
-
-        # 인용문 (hwpx_to_md에서 1×1 테이블을 인용문으로 변환)
-        if line.startswith('> '):
-            tables.append({
-                'type': 'quote',
-                'cells': [[line[2:].strip()]],
-            })
-            i += 1
-            continue
-
-        # 테이블 감지
-        if '|' in line:
-            next_i = i + 1
-            if next_i < len(lines) and re.match(r'^\|[\s\-:|]+\|$', lines[next_i].strip()):
-                table_lines = []
-                while i < len(lines) and lines[i].strip() and '|' in lines[i]:
-                    table_lines.append(lines[i])
-                    i += 1
-                cells = _parse_table_lines(table_lines)
-                tables.append({
-                    'type': 'table',
-                    'cells': cells,
-                })
-                continue
-
-        i += 1
-
-    return tables
-
-
-def _parse_table_lines(table_lines):
-    """마크다운 테이블 행들을 2D 리스트로 변환"""
-    cells = []
-    for idx, line in enumerate(table_lines):
-        if idx == 1 and re.match(r'^\|[\s\-:|]+\|$', line.strip()):
-            continue
-        stripped = line.strip()
-        if stripped.startswith('|'):
-            stripped = stripped[1:]
-        if stripped.endswith('|'):
-            stripped = stripped[:-1]
-        row = [c.strip() for c in stripped.split('|')]
-        cells.append(row)
-    return cells
+    if blocks is None:
+        blocks = tokenize_markdown(md_text)
+    return markdown_tables(blocks)
 
 
-def parse_markdown_paragraphs(md_text):
+def parse_markdown_paragraphs(md_text, blocks=None):
     """마크다운에서 일반 텍스트 문단만 순서대로 추출.
 
     테이블 행, 제목, 이미지, 인용문, 빈 줄, 구분선, HTML 주석 등을 제외하고
     연속된 일반 텍스트 줄을 하나의 문단으로 합칩니다.
 
+    Args:
+        blocks: 이미 만든 tokenize_markdown() 결과 (None이면 md_text를 토크나이즈)
+
     Returns:
         list of str: 문단 텍스트 목록
     """
-    paragraphs = []
-    lines = md_text.split('\n')
-    i = 0
-    in_table = False
-
-    while i < len(lines):
-        line = lines[i]
-        stripped = line.strip()
-
-        # 빈 줄 — 현재 문단 종료
-        if not stripped:
-            in_table = False
-            i += 1
-            continue
-
-        # 테이블 행 (|로 시작하거나 구분선 |---|)
-        if stripped.startswith('|') or (in_table and '|' in stripped):
-            in_table = True
-            i += 1
-            continue
-
-        # 테이블 시작 감지 (다음 줄이 구분선)
-        if '|' in stripped and i + 1 < len(lines):
-            next_stripped = lines[i + 1].strip()
-            if re.match(r'^\|[\s\-:|]+\|$', next_stripped):
-                in_table = True
-                i += 1
-                continue
-
-        in_table = False
-
-        # 제목 (#으로 시작)
-        if stripped.startswith('#'):
-            i += 1
-            continue
-
-        # 인용문 (>로 시작)
-        if stripped.startswith('>'):
-            i += 1
-            continue
-
-        # 이미지 (![으로 시작)
-        if stripped.startswith('!['):
-            i += 1
-            continue
+    if blocks is None:
+        blocks = tokenize_markdown(md_text)
+    return markdown_paragraphs(blocks)
 
-        # 구분선 (---, ***, ___)
-        if re.match(r'^[-*_]{3,}\s*$', stripped):
-            i += 1
-            continue
-
-        # HTML 주석 (<!-- -->)
-        if stripped.startswith('<!--'):
-            i += 1
-            continue
-
-        # 수식 블록 ($$ ... $$) — 시작~끝 모두 건너뜀
-        if stripped.startswith('$$'):
-            i += 1
-            # $$ 내부 줄도 건너뛰기
-            while i < len(lines) and not lines[i].strip().startswith('$$'):
-                i += 1
-            if i < len(lines):
-                i += 1  # 닫는 $$ 줄도 건너뜀
-            continue
 
-        # 각주/미주 정의 ([^N]: ...)
-        if re.match(r'^\[\^.+?\]:', stripped):
-            i += 1
-            continue
+# ============================================================
+# XML 분석 (lxml — 읽기 전용, 직렬화 안 함)
+# ============================================================
 
-        # 양식 개체 패턴 ([x], [ ], (o), ( ), [콤보:, [버튼:, [입력란:)
-        if re.match(r'^\[[ x]\]\s', stripped) or re.match(r'^\([ o]\)\s', stripped):
-            i += 1
-            continue
-        if re.match(r'^\[(콤보|버튼|입력란):', stripped):
-            i += 1
-            continue
+def text_node_ordinals(section_root):
+    """섹션의 모든 <hp:t> 요소 → 문서 순서 번호.
 
-        # 일반 텍스트 줄 — 연속된 줄을 하나의 문단으로 합침
-        para_lines = []
-        while i < len(lines):
-            line = lines[i]
-            stripped = line.strip()
-            if not stripped:
-                break
-            if stripped.startswith('|') or stripped.startswith('#') or \
-               stripped.startswith('>') or stripped.startswith('![') or \
-               stripped.startswith('<!--') or stripped.startswith('$$'):
-                break
-            if re.match(r'^\[\^.+?\]:', stripped):
-                break
-            if re.match(r'^[-*_]{3,}\s*$', stripped):
-                break
-            # 다음 줄이 테이블 구분선이면 현재 줄은 테이블 헤더
-            if '|' in stripped and i + 1 < len(lines):
-                next_stripped = lines[i + 1].strip()
-                if re.match(r'^\|[\s\-:|]+\|$', next_stripped):
-                    break
-            para_lines.append(stripped)
-            i += 1
-
-        if para_lines:
-            paragraphs.append(' '.join(para_lines))
-
-    return paragraphs
+    원본 문자열에서 <prefix:t>가 등장하는 순서와 같으므로
+    text_nodes.TextNodeIndex의 노드 id로 그대로 쓸 수 있습니다.
 
+    Returns:
+        dict: {t 요소: 노드 번호}
+    """
+    return {t: i for i, t in enumerate(section_root.iter(f'{{{NS["hp"]}}}t'))}
 
-# ============================================================
-# XML 분석 (lxml — 읽기 전용, 직렬화 안 함)
-# ============================================================
 
-def extract_xml_tables(section_root):
+def extract_xml_tables(section_root, ordinals=None):
     """section0.xml에서 테이블 정보 추출 (인용문=1×1 테이블 포함).
 
     hwpx_to_md.py와 동일한 순서로 순회하여 마크다운 테이블과 1:1 매칭.
 
+    Args:
+        ordinals: text_node_ordinals() 결과. 주면 셀별 텍스트 노드 번호를 함께 기록.
+
     Returns:
-        list of dict: {'type', 'row_cnt', 'col_cnt', 'cells': 2D list}
+        list of dict: {'type', 'row_cnt', 'col_cnt', 'cells': 2D list,
+                       'cell_nodes': 2D list of tuple (ordinals 없으면 None)}
     """
     tables = []
     for para in section_root.findall('hp:p', NS):
         for tbl in para.findall('.//hp:tbl', NS):
             row_cnt = int(tbl.get('rowCnt', 0))
             col_cnt = int(tbl.get('colCnt', 0))
-            cells = _get_table_cells(tbl, row_cnt, col_cnt)
+            cells, cell_nodes = _get_table_cells(tbl, row_cnt, col_cnt, ordinals)
             is_quote = (row_cnt == 1 and col_cnt == 1)
             tables.append({
                 'type': 'quote' if is_quote else 'table',
                 'row_cnt': row_cnt,
                 'col_cnt': col_cnt,
                 'cells': cells,
+                'cell_nodes': cell_nodes,
             })
     return tables
 
@@ -303,16 +180,19 @@ def _is_heading_para(para):
     return False
 
 
-def extract_xml_paragraphs(section_root):
-    """section XML에서 테이블/이미지/제목을 제외한 최상위 문단 텍스트 추출.
+def extract_xml_paragraph_entries(section_root, ordinals=None):
+    """section XML에서 테이블/이미지/제목을 제외한 최상위 문단 추출.
 
     hwpx_to_md.py의 _process_section()과 동일한 순서로 순회하여
     마크다운 문단과 1:1 매칭할 수 있도록 합니다.
 
+    Args:
+        ordinals: text_node_ordinals() 결과. 주면 문단의 텍스트 노드 번호를 함께 기록.
+
     Returns:
-        list of str: 비어있지 않은 순수 텍스트 문단 목록
+        list of dict: {'text': 순수 텍스트, 'nodes': 노드 번호 tuple (ordinals 없으면 None)}
     """
-    paragraphs = []
+    entries = []
     for para in section_root.findall('hp:p', NS):
         # 테이블을 포함한 문단은 건너뜀 (이미 테이블로 처리)
         if para.findall('.//hp:tbl', NS):
@@ -326,14 +206,26 @@ def extract_xml_paragraphs(section_root):
         text = _get_para_text(para)
         if not text.strip():
             continue
-        paragraphs.append(text.strip())
-    return paragraphs
+        nodes = None
+        if ordinals is not None:
+            nodes = tuple(ordinals[t] for t in para.findall('hp:run/hp:t', NS))
+        entries.append({'text': text.strip(), 'nodes': nodes})
+    return entries
 
 
-def _get_para_text(para):
-    """hp:p에서 순수 텍스트 추출"""
+def extract_xml_paragraphs(section_root):
+    """section XML에서 테이블/이미지/제목을 제외한 최상위 문단 텍스트 추출.
+
+    Returns:
+        list of str: 비어있지 않은 순수 텍스트 문단 목록
+    """
+    return [entry['text'] for entry in extract_xml_paragraph_entries(section_root)]
+
+
+def _get_para_text(para, ns=None):
+    """hp:p에서 순수 텍스트 추출 (ns: 네임스페이스 맵, None이면 모듈 NS)"""
     parts = []
-    for run in para.findall('hp:run', NS):
+    for run in para.findall('hp:run', ns or NS):
         for child in run:
             tag = etree.QName(child.tag).localname
             if tag == 't':
@@ -348,59 +240,52 @@ def _get_para_text(para):
     return ''.join(parts)
 
 
-def _get_table_cells(tbl, row_cnt, col_cnt):
-    """hp:tbl에서 셀 텍스트를 2D 리스트로 추출"""
+def _get_table_cells(tbl, row_cnt, col_cnt, ordinals=None, ns=None):
+    """hp:tbl에서 셀 텍스트를 2D 리스트로 추출
+
+    Args:
+        ns: 네임스페이스 맵 (None이면 모듈 NS — hwpx_to_md의 소스 맵은 자기 NS를 넘김)
+
+    Returns:
+        (grid, node_grid): node_grid는 셀별 텍스트 노드 번호 tuple (ordinals 없으면 None)
+    """
+    ns = ns or NS
     grid = [['' for _ in range(col_cnt)] for _ in range(row_cnt)]
+    node_grid = None
+    if ordinals is not None:
+        node_grid = [[() for _ in range(col_cnt)] for _ in range(row_cnt)]
 
-    for tr in tbl.findall('.//hp:tr', NS):
-        for tc in tr.findall('hp:tc', NS):
-            addr = tc.find('hp:cellAddr', NS)
+    for tr in tbl.findall('.//hp:tr', ns):
+        for tc in tr.findall('hp:tc', ns):
+            addr = tc.find('hp:cellAddr', ns)
             if addr is None:
                 continue
             col = int(addr.get('colAddr', 0))
             row = int(addr.get('rowAddr', 0))
 
             cell_texts = []
-            for p in tc.findall('.//hp:p', NS):
-                text = _get_para_text(p)
+            for p in tc.findall('.//hp:p', ns):
+                text = _get_para_text(p, ns)
                 if text.strip():
                     cell_texts.append(text.strip())
 
             if row < row_cnt and col < col_cnt:
                 grid[row][col] = ' '.join(cell_texts)
+                if node_grid is not None:
+                    node_grid[row][col] = tuple(
+                        ordinals[t] for t in tc.iter(f'{{{ns["hp"]}}}t'))
 
-    return grid
+    return grid, node_grid
 
 
 # ============================================================
 # 텍스트 정규화 & 비교
 # ============================================================
 
-def _strip_md_format(text):
-    """마크다운 인라인 서식 제거"""
-    text = re.sub(r'\*{3}(.+?)\*{3}', r'\1', text)
-    text = re.sub(r'\*{2}(.+?)\*{2}', r'\1', text)
-    text = re.sub(r'\*(.+?)\*', r'\1', text)
-    text = re.sub(r'~~(.+?)~~', r'\1', text)
-    text = text.replace('<br>', ' ')
-    text = text.replace('\\|', '|')
-    return text
-
-
-def _normalize(text):
-    """비교용 정규화 — 공백/줄바꿈 차이 + 마크다운 라운드트립 아티팩트 무시"""
-    text = re.sub(r'\s+', ' ', text).strip()
-    # * 각주 마커는 마크다운 라운드트립에서 소실되므로 비교 시 무시
-    text = text.replace('*', '')
-    return text
-
-
-def _xml_escape(text):
-    """XML 텍스트 노드용 이스케이프"""
-    text = text.replace('&', '&amp;')
-    text = text.replace('<', '&lt;')
-    text = text.replace('>', '&gt;')
-    return text
+# text_normalize의 컴파일된 패턴/빠른 경로/메모이제이션 구현 (기존 이름 유지)
+_strip_md_format = strip_md_format
+_normalize = normalize
+_xml_escape = xml_escape
 
 
 # ============================================================
@@ -410,82 +295,40 @@ def _xml_escape(text):
 def _compute_text_diffs(old_text, new_text):
     """두 텍스트 간 구체적 변경 조각 계산 (replace 연산만).
 
+    text_diff.diff_opcodes — 공통 접두사/접미사 제거 후 Myers diff, 편집 수 상한을
+    넘으면 가운데 전체를 조각 하나로 (긴 서술형 셀에서도 시간 상한 보장).
+
     Returns:
         list of (old_fragment, new_fragment) tuples
     """
     changes = []
-    sm = difflib.SequenceMatcher(None, old_text, new_text)
-    for op, i1, i2, j1, j2 in sm.get_opcodes():
+    for op, i1, i2, j1, j2 in diff_opcodes(old_text, new_text):
         if op == 'replace':
             changes.append((old_text[i1:i2], new_text[j1:j2]))
     return changes
 
 
-def _replace_in_text_node(raw_xml, old_frag, new_frag):
-    """텍스트 노드(> ... <) 내부에서만 프래그먼트를 교체.
-
-    XML 속성값이나 태그 이름이 아닌, 실제 텍스트 콘텐츠 안에서만
-    교체가 일어나도록 보장합니다.
-
-    Returns:
-        (modified_xml, success: bool)
-    """
-    start = 0
-    while True:
-        idx = raw_xml.find(old_frag, start)
-        if idx == -1:
-            return raw_xml, False
-
-        # 이 위치가 텍스트 노드 내부인지 확인
-        # 조건: idx 앞의 마지막 '>'와 idx 사이에 '<'가 없어야 함
-        last_gt = raw_xml.rfind('>', 0, idx)
-        if last_gt == -1:
-            start = idx + 1
-            continue
-
-        between = raw_xml[last_gt + 1:idx]
-        if '<' in between:
-            start = idx + 1
-            continue
-
-        # 프래그먼트가 태그 경계를 넘지 않는지 확인
-        frag_end = idx + len(old_frag)
-        next_lt = raw_xml.find('<', idx)
-        if next_lt != -1 and next_lt < frag_end:
-            start = idx + 1
-            continue
-
-        # 안전 — 텍스트 노드 내부에서 교체
-        raw_xml = raw_xml[:idx] + new_frag + raw_xml[frag_end:]
-        return raw_xml, True
-
-
-def apply_cell_replacements(raw_xml, replacements, close_tag='</hp:t>'):
-    """원본 XML 문자열에서 테이블 셀 텍스트를 직접 치환.
+def _apply_cell_edits(editor, replacements):
+    """TextEditor에 테이블 셀 교체를 기록.
 
     두 가지 전략을 순차적으로 시도:
       1. 전체 셀 텍스트 매칭 (단일 텍스트 태그 셀)
       2. 프래그먼트 레벨 diff (멀티런 셀 — 텍스트 노드 안에서만 교체)
 
     Args:
-        raw_xml: 원본 section XML 문자열
-        replacements: [(old_text, new_text), ...] — XML 이스케이프된 텍스트
-        close_tag: 텍스트 태그 닫기 패턴 (예: '</hp:t>', '</p:t>')
+        replacements: [(old_text, new_text, nodes), ...] — nodes는 셀의 텍스트 노드 번호.
+            nodes가 있으면 그 셀 안에서만 찾고, None이면 섹션 전체의 첫 매치를 사용.
 
     Returns:
-        (modified_xml, applied_count)
+        int: 적용된 셀 수
     """
     applied = 0
-    for old_text, new_text in replacements:
+    for old_text, new_text, nodes in replacements:
         if not old_text or old_text == new_text:
             continue
 
-        # 전략 1: 전체 텍스트 매칭 (단일 run/t 태그 셀)
-        old_pattern = f'>{old_text}{close_tag}'
-        new_pattern = f'>{new_text}{close_tag}'
-
-        if old_pattern in raw_xml:
-            raw_xml = raw_xml.replace(old_pattern, new_pattern, 1)
+        # 전략 1: 전체 텍스트 매칭 (단일 run/t 태그 셀) — '>{old}</hp:t>'와 같은 대상
+        if editor.replace_tail(old_text, new_text, nodes):
             applied += 1
             continue
 
@@ -496,13 +339,49 @@ def apply_cell_replacements(raw_xml, replacements, close_tag='</hp:t>'):
         for old_frag, new_frag in changes:
             if not old_frag or len(old_frag) < 2:
                 continue
-            raw_xml, ok = _replace_in_text_node(raw_xml, old_frag, new_frag)
-            if ok:
+            if editor.replace_fragment(old_frag, new_frag, nodes):
                 sub_applied += 1
         if sub_applied > 0:
             applied += 1
 
-    return raw_xml, applied
+    return applied
+
+
+def _apply_para_edits(editor, replacements):
+    """TextEditor에 문단 교체를 기록 (전체 텍스트 매칭만 — 프래그먼트 diff 금지).
+
+    Args:
+        replacements: [(old_text, new_text, nodes), ...] — _apply_cell_edits와 동일
+
+    Returns:
+        int: 적용된 문단 수
+    """
+    applied = 0
+    for old_text, new_text, nodes in replacements:
+        if not old_text or old_text == new_text:
+            continue
+        if editor.replace_tail(old_text, new_text, nodes):
+            applied += 1
+    return applied
+
+
+def apply_cell_replacements(raw_xml, replacements, close_tag='</hp:t>'):
+    """원본 XML 문자열에서 테이블 셀 텍스트를 직접 치환.
+
+    섹션을 한 번 훑어 텍스트 노드 인덱스를 만든 뒤 모든 교체를 위치로 기록하고,
+    결과 문자열은 마지막에 한 번만 만듭니다 (text_nodes.TextEditor).
+
+    Args:
+        raw_xml: 원본 section XML 문자열
+        replacements: [(old_text, new_text), ...] — XML 이스케이프된 텍스트
+        close_tag: 텍스트 태그 닫기 패턴 (예: '</hp:t>', '</p:t>')
+
+    Returns:
+        (modified_xml, applied_count)
+    """
+    editor = TextEditor(TextNodeIndex(raw_xml, close_tag))
+    applied = _apply_cell_edits(editor, [(old, new, None) for old, new in replacements])
+    return editor.render(), applied
 
 
 def apply_para_replacements(raw_xml, replacements, close_tag='</hp:t>'):
@@ -519,26 +398,89 @@ def apply_para_replacements(raw_xml, replacements, close_tag='</hp:t>'):
     Returns:
         (modified_xml, applied_count)
     """
-    applied = 0
-    for old_text, new_text in replacements:
-        if not old_text or old_text == new_text:
-            continue
-
-        # 전체 텍스트 매칭만 사용 (프래그먼트 diff 금지 — XML 구조 보호)
-        old_pattern = f'>{old_text}{close_tag}'
-        new_pattern = f'>{new_text}{close_tag}'
-
-        if old_pattern in raw_xml:
-            raw_xml = raw_xml.replace(old_pattern, new_pattern, 1)
-            applied += 1
-
-    return raw_xml, applied
+    editor = TextEditor(TextNodeIndex(raw_xml, close_tag))
+    applied = _apply_para_edits(editor, [(old, new, None) for old, new in replacements])
+    return editor.render(), applied
 
 
 # ============================================================
 # 메인 함수
 # ============================================================
 
+def rewrite_section(raw_xml, close_tag, cell_replacements, para_replacements,
+                    text_node_count=None, transforms=(), index=None):
+    """섹션 하나에 셀/문단 교체를 적용 (직렬 실행과 프로세스 풀 공용).
+
+    Args:
+        raw_xml: 원본 section XML 문자열
+        close_tag: 텍스트 태그 닫기 패턴
+        cell_replacements / para_replacements: [(old_escaped, new_escaped, nodes), ...]
+        text_node_count: 분석 시 lxml로 센 <hp:t> 수. 문자열 스캔 결과와 다르면
+            (접두사 혼용 등) 노드 번호를 신뢰할 수 없으므로 섹션 전체 첫 매치 방식으로 대체.
+        transforms: 교체 후 이어서 적용할 section_transforms 변환 단계
+        index: raw_xml의 TextNodeIndex (None이면 새로 생성 — HwpxSection.text_index()의
+            캐시된 인덱스를 넘기면 반복 저장 시 섹션을 다시 훑지 않음)
+
+    Returns:
+        (modified_bytes, cell_applied, para_applied, anchored)
+        교체도 변환도 내용을 바꾸지 않았으면 modified_bytes는 None
+    """
+    if not cell_replacements and not para_replacements:
+        # 변환 단계만 적용 (텍스트 노드 인덱스 불필요)
+        modified_xml = apply_transforms(raw_xml, transforms)
+        if modified_xml == raw_xml:
+            return None, 0, 0, True
+        return modified_xml.encode('utf-8'), 0, 0, True
+
+    # 섹션당 텍스트 노드 인덱스 1회 생성 → 셀/문단 교체 기록 → 결과 1회 생성
+    if index is None:
+        index = TextNodeIndex(raw_xml, close_tag)
+    editor = TextEditor(index)
+
+    anchored = text_node_count is not None and len(index) == text_node_count
+    if not anchored:
+        cell_replacements = [(old, new, None) for old, new, _ in cell_replacements]
+        para_replacements = [(old, new, None) for old, new, _ in para_replacements]
+
+    # 테이블 셀 교체
+    cell_applied = _apply_cell_edits(editor, cell_replacements)
+    # 문단 텍스트 교체 (전체 매칭만 — 프래그먼트 diff 금지)
+    para_applied = _apply_para_edits(editor, para_replacements)
+
+    return (apply_transforms(editor.render(), transforms).encode('utf-8'),
+            cell_applied, para_applied, anchored)
+
+
+def _rewrite_section_job(job):
+    """프로세스 풀 작업: rewrite_section(*job)"""
+    return rewrite_section(*job)
+
+
+def _run_jobs(fn, payloads, jobs=1, callback=None):
+    """payloads 각각에 fn 적용. jobs > 1이면 프로세스 풀에서 실행.
+
+    결과는 항상 payloads 순서대로 반환되므로 직렬 실행과 동일합니다.
+    fn은 모듈 최상위 함수여야 합니다 (pickle).
+    callback(i, result)은 결과가 나올 때마다 순서대로 호출됩니다 (진행률 보고용 —
+    예외를 던지면 남은 작업을 기다리지 않고 중단).
+    """
+    if jobs > 1 and len(payloads) > 1:
+        with ProcessPoolExecutor(max_workers=min(jobs, len(payloads))) as pool:
+            return _collect(pool.map(fn, payloads), callback)
+    return _collect((fn(payload) for payload in payloads), callback)
+
+
+def _collect(results, callback):
+    """결과 이터레이터를 리스트로 모으며 callback(i, result) 호출"""
+    if callback is None:
+        return list(results)
+    collected = []
+    for result in results:
+        callback(len(collected), result)
+        collected.append(result)
+    return collected
+
+
 def _find_section_files(z):
     """ZIP 내부의 모든 Contents/section*.xml 파일을 찾아 숫자순 정렬.
 
@@ -558,141 +500,116 @@ def _find_section_files(z):
     return section_files
 
 
-def smart_replace(original_hwpx, edited_md, output_hwpx=None):
-    """원본 HWPX 구조를 보존하며 편집된 마크다운의 텍스트를 반영.
+def _table_replacements(xt, mt):
+    """XML 테이블 xt와 마크다운 테이블 mt의 셀을 비교해 바뀐 셀의 교체 목록 생성.
 
-    테이블 셀 텍스트와 일반 문단 텍스트를 모두 교체합니다.
-    다중 섹션(section0.xml, section1.xml, ...)을 모두 처리합니다.
-    원본 XML 바이트를 직접 조작하여 lxml 직렬화를 우회합니다.
-    """
-    if output_hwpx is None:
-        base = os.path.splitext(edited_md)[0]
-        output_hwpx = base + '_smart.hwpx'
+    Args:
+        xt: {'type', 'row_cnt', 'col_cnt', 'cells', 'cell_nodes'} (extract_xml_tables 항목)
+        mt: {'type', 'cells'} (markdown_tables 항목)
 
-    print(f"스마트 교체 시작:")
-    print(f"  원본 HWPX: {original_hwpx}")
-    print(f"  편집된 MD: {edited_md}")
-    print(f"  출력 HWPX: {output_hwpx}")
+    Returns:
+        list of (old_escaped, new_escaped, nodes) — 종류가 맞지 않으면 None
+    """
+    # 타입 확인 (table↔table, quote↔quote)
+    if xt['type'] == 'table' and mt['type'] != 'table':
+        return None
+    if xt['type'] == 'quote' and mt['type'] not in ('quote', 'table'):
+        return None
+
+    replacements = []
+    for row_idx in range(min(xt['row_cnt'], len(mt['cells']))):
+        for col_idx in range(min(xt['col_cnt'], len(mt['cells'][row_idx]))):
+            old_text = xt['cells'][row_idx][col_idx] if row_idx < len(xt['cells']) else ''
+            new_text = _strip_md_format(mt['cells'][row_idx][col_idx])
+
+            if not old_text and not new_text:
+                continue
 
-    # 1. 마크다운에서 테이블 + 문단 추출
-    with open(edited_md, 'r', encoding='utf-8') as f:
-        md_text = f.read()
-    md_tables = parse_markdown_tables(md_text)
-    md_paragraphs = parse_markdown_paragraphs(md_text)
-    print(f"  마크다운 테이블: {len(md_tables)}개, 문단: {len(md_paragraphs)}개")
+            # 정규화 비교 — 실제 내용이 다를 때만 교체
+            if _normalize(old_text) != _normalize(new_text):
+                # XML 이스케이프
+                old_escaped = _xml_escape(old_text)
+                new_escaped = _xml_escape(new_text)
+                nodes = xt['cell_nodes'][row_idx][col_idx]
+                replacements.append((old_escaped, new_escaped, nodes))
+    return replacements
 
-    # 2. 원본 HWPX에서 모든 section*.xml 찾기 (숫자순 정렬)
-    with open(original_hwpx, 'rb') as f:
-        hwpx_bytes = f.read()
 
-    z_in = zipfile.ZipFile(io.BytesIO(hwpx_bytes), 'r')
+def _block_replacements(document, md_text, section_files, original_md=None, jobs=1):
+    """블록 순번 매칭: 마크다운 n번째 테이블/문단 ↔ XML n번째 테이블/문단.
 
-    section_files = _find_section_files(z_in)
-    if not section_files:
-        print("오류: Contents/section*.xml을 찾을 수 없습니다.", file=sys.stderr)
-        z_in.close()
-        sys.exit(1)
+    Returns:
+        (per_section_replacements, per_section_para_replacements)
+        — {섹션 파일: [(old_escaped, new_escaped, nodes), ...]}
+    """
+    # 1. 마크다운에서 테이블 + 문단 추출
+    blocks = tokenize_markdown(md_text)
+    md_tables = markdown_tables(blocks)
+    md_paragraphs = markdown_paragraphs(blocks)
+    print(f"  마크다운 테이블: {len(md_tables)}개, 문단: {len(md_paragraphs)}개")
 
-    if len(section_files) > 1:
-        print(f"  섹션 파일: {len(section_files)}개 ({', '.join(f for _, f in section_files)})")
+    # 1.5. 편집 전 마크다운이 있으면 바뀐 블록만 대조 (증분 비교)
+    changed = None
+    if original_md is not None:
+        with open(original_md, 'r', encoding='utf-8') as f:
+            changed = changed_blocks(tokenize_markdown(f.read()), blocks)
+        if changed is None:
+            print("  블록 구조 변경 (테이블/문단 추가·삭제) — 전체 비교")
+        else:
+            print(f"  증분 비교: 바뀐 테이블 {len(changed[0])}개, 문단 {len(changed[1])}개")
 
-    # 3. 각 섹션 읽기 및 테이블 추출 (네임스페이스는 첫 섹션에서 감지)
-    global NS
-    close_tag = '</hp:t>'  # 기본값 — 첫 섹션에서 감지하여 교체
+    # 2. 각 섹션 테이블/문단 추출 (네임스페이스/닫기 태그는 첫 섹션 기준으로 감지됨)
+    document.analyze(jobs=jobs)
 
-    # 섹션별 데이터: {filename: {'raw_xml': str, 'xml_tables': list, 'xml_paragraphs': list, 'table_offset': int, 'para_offset': int}}
-    section_data = {}
     all_xml_tables = []  # 전체 테이블 (섹션 순서대로 이어붙임)
     all_xml_paragraphs = []  # 전체 문단 (섹션 순서대로 이어붙임)
     table_to_section = []  # 각 테이블이 속한 섹션 파일명
     para_to_section = []  # 각 문단이 속한 섹션 파일명
+    all_para_nodes = []  # 각 문단의 텍스트 노드 번호 (all_xml_paragraphs와 같은 순서)
 
-    for idx, (sec_num, sec_filename) in enumerate(section_files):
-        sec_xml_bytes = z_in.read(sec_filename)
-        raw_xml = sec_xml_bytes.decode('utf-8')
-
-        # 첫 번째 섹션에서 네임스페이스 + 닫기 태그 감지
-        if idx == 0:
-            ns_ver = detect_namespace_version(sec_xml_bytes)
-            NS = NS_2024.copy() if ns_ver == '2024' else NS_2011.copy()
-            if ns_ver == '2024':
-                print(f"  네임스페이스: OWPML 2024 감지")
-            close_tag = detect_close_tag(raw_xml)
-
-        # lxml으로 분석만 수행 (직렬화 안 함)
-        section_root = etree.fromstring(sec_xml_bytes)
-        xml_tables = extract_xml_tables(section_root)
-        xml_paragraphs = extract_xml_paragraphs(section_root)
-
-        table_offset = len(all_xml_tables)
-        para_offset = len(all_xml_paragraphs)
-        section_data[sec_filename] = {
-            'raw_xml': raw_xml,
-            'xml_tables': xml_tables,
-            'xml_paragraphs': xml_paragraphs,
-            'table_offset': table_offset,
-            'para_offset': para_offset,
-        }
-
-        for xt in xml_tables:
+    for sec in document.sections:
+        for xt in sec.tables:
             all_xml_tables.append(xt)
-            table_to_section.append(sec_filename)
+            table_to_section.append(sec.filename)
 
-        for xp in xml_paragraphs:
+        for xp, nodes in zip(sec.paragraphs, sec.para_nodes):
             all_xml_paragraphs.append(xp)
-            para_to_section.append(sec_filename)
+            para_to_section.append(sec.filename)
+            all_para_nodes.append(nodes)
 
     print(f"  XML 테이블: {len(all_xml_tables)}개, 문단: {len(all_xml_paragraphs)}개")
 
-    # 4. 테이블 매칭 및 섹션별 교체 목록 생성
-    # per_section_replacements: {filename: [(old_escaped, new_escaped), ...]}
+    # 3. 테이블 매칭 및 섹션별 교체 목록 생성
+    # per_section_replacements: {filename: [(old_escaped, new_escaped, nodes), ...]}
+    # nodes: 원본 셀/문단의 텍스트 노드 번호 — 같은 값이 반복돼도 정확한 위치에 교체
     per_section_replacements = {f: [] for _, f in section_files}
     matched = 0
     skipped = 0
 
     min_count = min(len(all_xml_tables), len(md_tables))
-    for i in range(min_count):
-        xt = all_xml_tables[i]
-        mt = md_tables[i]
-
-        # 타입 확인 (table↔table, quote↔quote)
-        if xt['type'] == 'table' and mt['type'] != 'table':
+    table_indices = (range(min_count) if changed is None
+                     else [i for i in changed[0] if i < min_count])
+    for i in table_indices:
+        replacements = _table_replacements(all_xml_tables[i], md_tables[i])
+        if replacements is None:
             skipped += 1
             continue
-        if xt['type'] == 'quote' and mt['type'] not in ('quote', 'table'):
-            skipped += 1
-            continue
-
         matched += 1
-        sec_filename = table_to_section[i]
-
-        # 각 셀 비교
-        for row_idx in range(min(xt['row_cnt'], len(mt['cells']))):
-            for col_idx in range(min(xt['col_cnt'], len(mt['cells'][row_idx]))):
-                old_text = xt['cells'][row_idx][col_idx] if row_idx < len(xt['cells']) else ''
-                new_text = _strip_md_format(mt['cells'][row_idx][col_idx])
-
-                if not old_text and not new_text:
-                    continue
-
-                # 정규화 비교 — 실제 내용이 다를 때만 교체
-                if _normalize(old_text) != _normalize(new_text):
-                    # XML 이스케이프
-                    old_escaped = _xml_escape(old_text)
-                    new_escaped = _xml_escape(new_text)
-                    per_section_replacements[sec_filename].append((old_escaped, new_escaped))
+        per_section_replacements[table_to_section[i]].extend(replacements)
 
     print(f"  테이블 매칭: {matched}개, 건너뜀: {skipped}개")
     total_replacements = sum(len(v) for v in per_section_replacements.values())
     print(f"  교체 대상 셀: {total_replacements}개")
 
-    # 4.5. 문단 매칭 및 섹션별 교체 목록 생성
+    # 3.5. 문단 매칭 및 섹션별 교체 목록 생성
     per_section_para_replacements = {f: [] for _, f in section_files}
     para_matched = 0
     para_changed = 0
 
     min_para_count = min(len(all_xml_paragraphs), len(md_paragraphs))
-    for i in range(min_para_count):
+    para_indices = (range(min_para_count) if changed is None
+                    else [i for i in changed[1] if i < min_para_count])
+    for i in para_indices:
         xml_para_text = all_xml_paragraphs[i]
         md_para_text = _strip_md_format(md_paragraphs[i])
 
@@ -708,41 +625,210 @@ def smart_replace(original_hwpx, edited_md, output_hwpx=None):
         # XML 이스케이프
         old_escaped = _xml_escape(xml_para_text)
         new_escaped = _xml_escape(md_para_text)
-        per_section_para_replacements[sec_filename].append((old_escaped, new_escaped))
+        per_section_para_replacements[sec_filename].append(
+            (old_escaped, new_escaped, all_para_nodes[i]))
 
     total_para_replacements = sum(len(v) for v in per_section_para_replacements.values())
     print(f"  문단 매칭: {para_matched}개, 변경: {para_changed}개")
     if total_para_replacements > 0:
         print(f"  교체 대상 문단: {total_para_replacements}개")
 
-    # 5. 섹션별 원본 XML 문자열에 직접 치환 (테이블 + 문단)
+    return per_section_replacements, per_section_para_replacements
+
+
+def _load_source_map(source_map, document, md_text):
+    """smart_replace에 넘긴 소스 맵(경로 또는 SourceMap)을 쓸 수 있으면 반환, 아니면 None.
+
+    원본 HWPX 섹션이 맵을 만들 때와 다르거나 편집본의 줄 수가 달라졌으면
+    (줄 추가·삭제 — 줄 범위를 신뢰할 수 없음) 쓰지 않습니다.
+    """
+    from source_map import SourceMap
+    if not isinstance(source_map, SourceMap):
+        try:
+            source_map = SourceMap.load(source_map)
+        except (OSError, ValueError) as e:
+            print(f"  소스 맵을 읽을 수 없음 ({e}) — 블록 순번 매칭")
+            return None
+    if not source_map.matches(document):
+        print(f"  소스 맵이 원본 HWPX와 다름 — 블록 순번 매칭")
+        return None
+    if source_map.header.get('lines') != md_text.count('\n') + 1:
+        print(f"  마크다운 줄 수 변경 (소스 맵 범위 불일치) — 블록 순번 매칭")
+        return None
+    return source_map
+
+
+def _source_map_replacements(source_map, md_text, section_files):
+    """소스 맵 항목의 줄 범위로 편집된 마크다운과 원본 XML을 직접 대조.
+
+    줄 내용 해시가 맵과 같은 항목(편집 안 됨)은 건너뛰고, 바뀐 범위만 토크나이즈해
+    항목에 기록된 XML 셀/문단 텍스트·텍스트 노드 번호와 비교합니다.
+    바뀐 범위가 더 이상 테이블 하나/문단 하나가 아니면 (구조 변경) 그 항목은 건너뜁니다.
+
+    Returns:
+        (per_section_replacements, per_section_para_replacements) — _block_replacements와 동일
+    """
+    from source_map import md_digest
+    md_lines = md_text.split('\n')
+    per_section_replacements = {f: [] for _, f in section_files}
+    per_section_para_replacements = {f: [] for _, f in section_files}
+    edited = 0
+    skipped = 0
+
+    for entry in source_map.entries:
+        start, end = entry['lines']
+        text = '\n'.join(md_lines[start:end])
+        if md_digest(text) == entry['md']:
+            continue
+        edited += 1
+        blocks = tokenize_markdown(text)
+
+        if entry['kind'] == 'paragraph':
+            if len(blocks) != 1 or blocks[0].kind != 'paragraph':
+                skipped += 1
+                continue
+            xml_para_text = entry['text']
+            md_para_text = _strip_md_format(blocks[0].text)
+            if _normalize(xml_para_text) != _normalize(md_para_text):
+                per_section_para_replacements[entry['section']].append(
+                    (_xml_escape(xml_para_text), _xml_escape(md_para_text), entry['nodes']))
+            continue
+
+        md_tables = markdown_tables(blocks)
+        xt = {
+            'type': entry['kind'],
+            'row_cnt': entry['row_cnt'],
+            'col_cnt': entry['col_cnt'],
+            'cells': entry['cells'],
+            'cell_nodes': entry['cell_nodes'],
+        }
+        replacements = _table_replacements(xt, md_tables[0]) if len(md_tables) == 1 else None
+        if replacements is None:
+            skipped += 1
+            continue
+        per_section_replacements[entry['section']].extend(replacements)
+
+    total_replacements = sum(len(v) for v in per_section_replacements.values())
+    total_para_replacements = sum(len(v) for v in per_section_para_replacements.values())
+    print(f"  소스 맵: 항목 {len(source_map.entries)}개, 편집된 항목 {edited}개, 건너뜀 {skipped}개")
+    print(f"  교체 대상 셀: {total_replacements}개, 문단: {total_para_replacements}개")
+    return per_section_replacements, per_section_para_replacements
+
+
+def smart_replace(original_hwpx, edited_md, output_hwpx=None, document=None, jobs=1,
+                  transforms=(), original_md=None, source_map=None, progress=None):
+    """원본 HWPX 구조를 보존하며 편집된 마크다운의 텍스트를 반영.
+
+    테이블 셀 텍스트와 일반 문단 텍스트를 모두 교체합니다.
+    다중 섹션(section0.xml, section1.xml, ...)을 모두 처리합니다.
+    원본 XML 바이트를 직접 조작하여 lxml 직렬화를 우회합니다.
+
+    Args:
+        document: 이미 파싱한 HwpxDocument (None이면 original_hwpx를 새로 읽음).
+            같은 문서를 여러 번 처리할 때 넘기면 섹션을 다시 파싱하지 않습니다.
+        jobs: 2 이상이면 섹션별 파싱/추출과 문자열 치환을 프로세스 풀에서 병렬 수행.
+            테이블/문단 순번은 부모에서 섹션 순서대로 합치므로 결과는 직렬 실행과 동일합니다.
+        transforms: 모든 섹션에 교체 후 적용할 변환 단계 (예: section_transforms.strip_linesegarray).
+            같은 재작성 단계에서 적용되므로 출력 HWPX는 한 번만 씁니다.
+        original_md: to-md가 만든 (편집 전) 마크다운 파일 경로. 주면 편집본과 블록 단위로
+            비교해 바뀐 테이블/문단만 XML과 대조합니다 (나머지 셀/문단은 정규화·비교 생략).
+            테이블/문단이 추가·삭제되어 블록 구조가 다르면 전체 비교로 돌아갑니다.
+        source_map: to-md --source-map이 만든 소스 맵 (경로 또는 source_map.SourceMap).
+            원본 HWPX와 편집본 줄 수가 맵과 맞으면 블록 순번 매칭과 섹션 분석(lxml 파싱) 없이
+            맵의 줄 범위로 XML 위치를 찾습니다 (연속 문단이 마크다운에서 한 문단으로 합쳐져도
+            문단별로 대조). 맞지 않으면 original_md/블록 순번 매칭으로 돌아갑니다.
+        progress: progress(done, total, message) — 대조 시작, 섹션 치환마다, ZIP 저장 전에
+            호출 (total = 섹션 수 + 1). 예외를 던지면 출력 HWPX를 쓰기 전에 중단합니다.
+    """
+    if output_hwpx is None:
+        base = os.path.splitext(edited_md)[0]
+        output_hwpx = base + '_smart.hwpx'
+
+    print(f"스마트 교체 시작:")
+    print(f"  원본 HWPX: {original_hwpx}")
+    print(f"  편집된 MD: {edited_md}")
+    print(f"  출력 HWPX: {output_hwpx}")
+
+    # 1. 편집된 마크다운
+    with open(edited_md, 'r', encoding='utf-8') as f:
+        md_text = f.read()
+
+    # 2. 원본 HWPX 문서 모델 (섹션은 숫자순 정렬, 파싱은 한 번만)
+    if document is None:
+        from hwpx_document import HwpxDocument
+        document = HwpxDocument(original_hwpx)
+
+    section_files = [(idx, sec.filename) for idx, sec in enumerate(document.sections)]
+    if not section_files:
+        print("오류: Contents/section*.xml을 찾을 수 없습니다.", file=sys.stderr)
+        sys.exit(1)
+
+    if len(section_files) > 1:
+        print(f"  섹션 파일: {len(section_files)}개 ({', '.join(f for _, f in section_files)})")
+    if document.ns_version == '2024':
+        print(f"  네임스페이스: OWPML 2024 감지")
+    close_tag = document.close_tag
+    steps = len(section_files) + 1
+    if progress is not None:
+        progress(0, steps, '변경 대조')
+
+    # 3. 교체 목록 — 소스 맵이 맞으면 줄 범위로 직접, 아니면 블록 순번 매칭
+    if source_map is not None:
+        source_map = _load_source_map(source_map, document, md_text)
+    if source_map is not None:
+        per_section_replacements, per_section_para_replacements = _source_map_replacements(
+            source_map, md_text, section_files)
+        text_node_counts = {f: source_map.text_node_count(f) for _, f in section_files}
+    else:
+        per_section_replacements, per_section_para_replacements = _block_replacements(
+            document, md_text, section_files, original_md, jobs)
+        text_node_counts = {sec.filename: sec.text_node_count for sec in document.sections}
+
+    # 4. 섹션별 원본 XML 문자열에 직접 치환 (테이블 + 문단)
     # modified_sections: {filename: modified_bytes} — 변경된 섹션만 포함
     modified_sections = {}
     total_applied = 0
     total_para_applied = 0
 
+    # 변경이 있는 섹션만 치환 작업으로 모아 직렬 또는 프로세스 풀에서 실행
+    # (변환 단계가 있으면 모든 섹션이 대상 — 교체 직후 같은 작업에서 변환)
+    transforms = tuple(transforms)
+    rewrite_files = []
+    rewrite_jobs = []
     for _, sec_filename in section_files:
         cell_replacements = per_section_replacements[sec_filename]
         para_replacements = per_section_para_replacements[sec_filename]
 
-        if not cell_replacements and not para_replacements:
+        if not cell_replacements and not para_replacements and not transforms:
             continue
 
-        raw_xml = section_data[sec_filename]['raw_xml']
+        # 직렬 실행이면 캐시된 텍스트 노드 인덱스 재사용 (프로세스 풀에는 pickle 비용 때문에 넘기지 않음)
+        sec = document.section(sec_filename)
+        index = None
+        if jobs <= 1 and (cell_replacements or para_replacements):
+            index = sec.text_index(close_tag)
+        rewrite_jobs.append((sec.raw_xml, close_tag, cell_replacements, para_replacements,
+                             text_node_counts[sec_filename], transforms, index))
+        rewrite_files.append(sec_filename)
 
-        # 테이블 셀 교체
-        cell_applied = 0
-        if cell_replacements:
-            raw_xml, cell_applied = apply_cell_replacements(raw_xml, cell_replacements, close_tag)
-            total_applied += cell_applied
+    positions = {f: i for i, (_, f) in enumerate(section_files)}
 
-        # 문단 텍스트 교체 (전체 매칭만 — 프래그먼트 diff 금지)
-        para_applied = 0
-        if para_replacements:
-            raw_xml, para_applied = apply_para_replacements(raw_xml, para_replacements, close_tag)
-            total_para_applied += para_applied
+    def report_section(i, _result):
+        progress(positions[rewrite_files[i]] + 1, steps, rewrite_files[i])
 
-        modified_sections[sec_filename] = raw_xml.encode('utf-8')
+    results = _run_jobs(_rewrite_section_job, rewrite_jobs, jobs,
+                        report_section if progress is not None else None)
+
+    for sec_filename, result in zip(rewrite_files, results):
+        modified_xml, cell_applied, para_applied, anchored = result
+        if modified_xml is None:
+            continue
+        modified_sections[sec_filename] = modified_xml
+        total_applied += cell_applied
+        total_para_applied += para_applied
+
+        if not anchored:
+            print(f"    {sec_filename}: 텍스트 노드 위치 불일치 — 첫 매치 방식으로 교체")
 
         if len(section_files) > 1:
             parts = []
@@ -763,21 +849,12 @@ def smart_replace(original_hwpx, edited_md, output_hwpx=None):
     else:
         print(f"  변경 사항 없음 — 원본 그대로 복사")
 
-    # 6. HWPX ZIP 재구성 (원본 파일 그대로 + 변경된 섹션만 교체)
-    buf = io.BytesIO()
-    with zipfile.ZipFile(buf, 'w', zipfile.ZIP_DEFLATED) as z_out:
-        for item in z_in.infolist():
-            if item.filename in modified_sections:
-                z_out.writestr(item.filename, modified_sections[item.filename])
-            elif item.filename == 'mimetype':
-                z_out.writestr(item, z_in.read(item.filename),
-                               compress_type=zipfile.ZIP_STORED)
-            else:
-                z_out.writestr(item, z_in.read(item.filename))
-    z_in.close()
-
-    with open(output_hwpx, 'wb') as f:
-        f.write(buf.getvalue())
+    if progress is not None:
+        progress(len(section_files), steps, 'HWPX 저장')
+
+    # 5. HWPX ZIP 재구성 (변경되지 않은 멤버는 압축 스트림 그대로 복사, 변경된 섹션만 재압축)
+    # 출력 옆 임시 파일로 스트리밍 후 원자적 교체 — 원본을 메모리에 통째로 올리지 않음
+    rewrite_hwpx(original_hwpx, output_hwpx, modified_sections)
 
     print(f"스마트 교체 완료: {output_hwpx}")
     return output_hwpx
@@ -795,14 +872,24 @@ def main():
 사용 예시:
   python smart_replace.py 원본.hwpx 편집된.md
   python smart_replace.py 원본.hwpx 편집된.md -o 최종본.hwpx
+  python smart_replace.py 원본.hwpx 편집된.md --jobs 4   # 섹션 병렬 처리
+  python smart_replace.py 원본.hwpx 편집된.md --original-md 원본.md   # 바뀐 블록만 대조
+  python smart_replace.py 원본.hwpx 편집된.md --source-map 원본.srcmap.jsonl
         """
     )
     parser.add_argument('original', help='원본 HWPX 파일 경로')
     parser.add_argument('markdown', help='편집된 마크다운 파일 경로')
     parser.add_argument('-o', '--output', help='출력 HWPX 파일 경로')
+    parser.add_argument('-j', '--jobs', type=int, default=1,
+                        help='섹션 병렬 처리 프로세스 수 (기본 1 = 직렬)')
+    parser.add_argument('--original-md',
+                        help='to-md가 만든 편집 전 마크다운 (주면 바뀐 블록만 대조)')
+    parser.add_argument('--source-map',
+                        help='to-md --source-map이 만든 소스 맵 (.srcmap.jsonl — 줄 범위로 XML 위치 대조)')
     args = parser.parse_args()
 
-    smart_replace(args.original, args.markdown, args.output)
+    smart_replace(args.original, args.markdown, args.output, jobs=args.jobs,
+                  original_md=args.original_md, source_map=args.source_map)
 
 
 if __name__ == '__main__':
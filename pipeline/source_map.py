@@ -0,0 +1,143 @@
+"""
+source_map.py - 마크다운 줄 ↔ HWPX XML 위치 대응표 (사이드카)
+
+hwpx_to_md가 변환하면서 마크다운의 어느 줄이 어느 섹션의 어느 요소에서 나왔는지
+기록합니다. smart_replace는 이 표가 있으면 편집된 마크다운의 같은 줄 범위에서
+교체 대상(섹션, 텍스트 노드 번호, 원본 XML 텍스트)을 바로 찾으므로, 마크다운
+문단/테이블과 XML 문단/테이블을 순번으로 다시 짝짓거나 섹션을 lxml로 다시
+파싱하지 않습니다. 줄 내용 해시가 같은 항목은 비교 자체를 건너뜁니다.
+
+파일 형식 (JSON Lines, 마크다운 옆 <이름>.srcmap.jsonl):
+  1행 헤더: {"version": 1, "lines": 마크다운 줄 수,
+             "sections": {섹션 파일: {"sha256": 섹션 바이트 해시, "text_nodes": <hp:t> 수}}}
+  이후 항목 (마크다운 순서, lines는 0부터 시작하는 [시작, 끝) 줄 번호):
+    {"kind": "paragraph", "lines": [s, e], "section": ..., "path": "p[3]", "md": 줄 해시,
+     "text": XML 텍스트, "nodes": [텍스트 노드 번호, ...]}
+    {"kind": "table"|"quote", "lines": [s, e], "section": ..., "path": "p[5]/tbl[0]", "md": ...,
+     "row_cnt": R, "col_cnt": C, "cells": [[XML 셀 텍스트]], "cell_nodes": [[[노드 번호]]]}
+
+텍스트 노드 번호는 섹션 안 <hp:t>의 문서 순서 번호로, text_nodes.TextNodeIndex의
+노드 id와 같습니다. 헤더의 섹션 해시가 원본 HWPX와 다르면 쓰지 않습니다.
+"""
+import os
+import json
+import hashlib
+
+from smart_replace import _get_para_text, _get_table_cells
+
+SOURCE_MAP_VERSION = 1
+SOURCE_MAP_SUFFIX = '.srcmap.jsonl'
+HASH_CHUNK = 1 << 20
+
+
+def source_map_path(md_path):
+    """마크다운 경로 → 사이드카 경로 (문서.md → 문서.srcmap.jsonl)"""
+    return os.path.splitext(md_path)[0] + SOURCE_MAP_SUFFIX
+
+
+def md_digest(text):
+    """마크다운 줄 범위 내용 해시 (변경 여부 판별용)"""
+    return hashlib.sha1(text.encode('utf-8')).hexdigest()[:16]
+
+
+def zip_member_digest(z, name):
+    """ZIP 멤버 바이트의 SHA-256 (청크 단위 — 스트리밍 변환에서도 섹션 전체를 올리지 않음)"""
+    h = hashlib.sha256()
+    with z.open(name) as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK), b''):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def paragraph_entry(section_file, path, para, ordinals, ns):
+    """최상위 일반 문단 항목 (smart_replace 문단 추출과 같은 텍스트/노드)"""
+    return {
+        'kind': 'paragraph',
+        'section': section_file,
+        'path': path,
+        'text': _get_para_text(para, ns).strip(),
+        'nodes': [ordinals[t] for t in para.findall('hp:run/hp:t', ns)],
+    }
+
+
+def table_entry(section_file, path, tbl, ordinals, ns):
+    """테이블(1×1이면 인용문) 항목 (smart_replace 테이블 추출과 같은 셀/노드)"""
+    row_cnt = int(tbl.get('rowCnt', 0))
+    col_cnt = int(tbl.get('colCnt', 0))
+    cells, cell_nodes = _get_table_cells(tbl, row_cnt, col_cnt, ordinals, ns)
+    return {
+        'kind': 'quote' if row_cnt == 1 and col_cnt == 1 else 'table',
+        'section': section_file,
+        'path': path,
+        'row_cnt': row_cnt,
+        'col_cnt': col_cnt,
+        'cells': cells,
+        'cell_nodes': [[list(nodes) for nodes in row] for row in cell_nodes],
+    }
+
+
+def finalize_entries(entries, md_lines, md_text_lines):
+    """항목의 md_lines 목록 범위('_range')를 실제 마크다운 줄 번호로 바꾸고 해시 기록.
+
+    hwpx_to_md의 줄 목록 원소 하나에 줄바꿈이 들어 있을 수 있으므로 (제목 등)
+    원소마다 시작 줄 번호를 누적해 변환하고, 앞뒤 빈 줄은 범위에서 뺍니다.
+
+    Args:
+        entries: '_range': (시작 원소, 끝 원소)를 가진 항목 목록
+        md_lines: '\\n'.join 하기 전의 줄 목록
+        md_text_lines: 최종 마크다운을 '\\n'으로 나눈 줄 목록
+    """
+    starts = []
+    line = 0
+    for item in md_lines:
+        starts.append(line)
+        line += item.count('\n') + 1
+
+    for entry in entries:
+        first, last = entry.pop('_range')
+        start = starts[first]
+        end = starts[last - 1] + md_lines[last - 1].count('\n') + 1
+        while start < end and not md_text_lines[start].strip():
+            start += 1
+        while end > start and not md_text_lines[end - 1].strip():
+            end -= 1
+        entry['lines'] = [start, end]
+        entry['md'] = md_digest('\n'.join(md_text_lines[start:end]))
+    return [{'kind': entry.pop('kind'), 'lines': entry.pop('lines'), **entry} for entry in entries]
+
+
+class SourceMap:
+    """소스 맵 (헤더 + 항목 목록)"""
+
+    def __init__(self, header, entries):
+        self.header = header
+        self.entries = entries
+
+    @classmethod
+    def load(cls, path):
+        """JSON Lines 파일에서 읽기"""
+        with open(path, 'r', encoding='utf-8') as f:
+            header = json.loads(f.readline())
+            if header.get('version') != SOURCE_MAP_VERSION:
+                raise ValueError(f"지원하지 않는 소스 맵 버전: {header.get('version')}")
+            entries = [json.loads(line) for line in f if line.strip()]
+        return cls(header, entries)
+
+    def save(self, path):
+        """JSON Lines 파일로 쓰기 (항목당 한 줄)"""
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(json.dumps(self.header, ensure_ascii=False, separators=(',', ':')) + '\n')
+            for entry in self.entries:
+                f.write(json.dumps(entry, ensure_ascii=False, separators=(',', ':')) + '\n')
+
+    def matches(self, document):
+        """document(HwpxDocument)의 섹션이 맵을 만들 때와 같은 내용인지"""
+        sections = self.header.get('sections', {})
+        if len(sections) != len(document.sections):
+            return False
+        return all(sections.get(sec.filename, {}).get('sha256') == sec.digest
+                   for sec in document.sections)
+
+    def text_node_count(self, section_file):
+        """맵을 만들 때 센 섹션의 <hp:t> 수"""
+        return self.header['sections'][section_file]['text_nodes']
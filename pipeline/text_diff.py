@@ -0,0 +1,163 @@
+"""
+text_diff.py - 셀 텍스트 조각 diff (smart_replace 프래그먼트 교체용)
+
+difflib.SequenceMatcher는 최악의 경우 제곱 시간이고, autojunk 휴리스틱이 같은 음절이
+반복되는 긴 한글 셀(수천 자 서술형 답변)에서 엉뚱한 정렬을 만들어 diff 한 번에
+수 초가 걸릴 수 있습니다. 여기서는:
+
+  1. 공통 접두사/접미사를 먼저 잘라냄 (슬라이스 비교 이진 탐색 — C 수준 비교)
+  2. 남은 가운데만 Myers O(ND) 최소 편집 diff (D = 편집 수)
+  3. 편집 수가 max_edits를 넘으면 가운데 전체를 replace 하나로 대체 (시간 상한)
+  4. 한 글자짜리 같은 구간을 사이에 둔 변경은 하나로 합침 — 한 글자 조각은
+     smart_replace가 모호해서 적용하지 않으므로, 합치면 더 많은 편집이 반영됨
+
+결과 형식은 SequenceMatcher.get_opcodes()와 같은 (tag, i1, i2, j1, j2) 목록입니다.
+"""
+
+DIFF_MAX_EDITS = 500
+MERGE_EQUAL_BELOW = 2  # 이보다 짧은 equal 구간 양쪽의 변경은 하나의 replace로 합침
+
+
+def common_prefix_length(a, b):
+    """a, b의 공통 접두사 길이"""
+    lo, hi = 0, min(len(a), len(b))
+    while lo < hi:
+        mid = (lo + hi + 1) // 2
+        if a[lo:mid] == b[lo:mid]:
+            lo = mid
+        else:
+            hi = mid - 1
+    return lo
+
+
+def common_suffix_length(a, b, limit=None):
+    """a, b의 공통 접미사 길이 (limit 이하 — 접두사와 겹치지 않게)"""
+    n, m = len(a), len(b)
+    lo, hi = 0, min(n, m) if limit is None else min(n, m, limit)
+    while lo < hi:
+        mid = (lo + hi + 1) // 2
+        if a[n - mid:n - lo] == b[m - mid:m - lo]:
+            lo = mid
+        else:
+            hi = mid - 1
+    return lo
+
+
+def _myers(a, b, max_edits):
+    """a → b 최소 편집 경로를 (tag, i1, i2, j1, j2) 구간 목록으로 (편집 수가 넘치면 None)
+
+    tag는 'equal' / 'delete' / 'insert' — 인접한 같은 tag는 합쳐져 있음.
+    """
+    n, m = len(a), len(b)
+    max_d = min(n + m, max_edits)
+    v = {1: 0}
+    trace = []
+    for d in range(max_d + 1):
+        trace.append(dict(v))
+        for k in range(-d, d + 1, 2):
+            if k == -d or (k != d and v[k - 1] < v[k + 1]):
+                x = v[k + 1]  # 아래로 (b에서 삽입)
+            else:
+                x = v[k - 1] + 1  # 오른쪽으로 (a에서 삭제)
+            y = x - k
+            while x < n and y < m and a[x] == b[y]:
+                x += 1
+                y += 1
+            v[k] = x
+            if x >= n and y >= m:
+                return _backtrack(trace, n, m)
+    return None
+
+
+def _backtrack(trace, n, m):
+    """_myers의 단계별 V 기록으로 경로를 거꾸로 따라가 구간 목록 생성"""
+    spans = []
+
+    def add(tag, i1, i2, j1, j2):
+        if spans and spans[-1][0] == tag:
+            _, pi1, pi2, pj1, pj2 = spans[-1]
+            spans[-1] = (tag, i1, pi2, j1, pj2)  # 거꾸로 쌓으므로 앞쪽으로 확장
+        else:
+            spans.append((tag, i1, i2, j1, j2))
+
+    x, y = n, m
+    for d in range(len(trace) - 1, -1, -1):
+        v = trace[d]
+        k = x - y
+        if d == 0:
+            prev_x = prev_y = mid_x = 0
+        else:
+            inserted = k == -d or (k != d and v[k - 1] < v[k + 1])
+            prev_k = k + 1 if inserted else k - 1
+            prev_x = v[prev_k]
+            prev_y = prev_x - prev_k
+            mid_x = prev_x if inserted else prev_x + 1  # 편집 한 번 직후 위치
+        if x > mid_x:
+            add('equal', mid_x, x, y - (x - mid_x), y)  # 대각선(같은 글자) 구간
+        if d > 0:
+            if inserted:
+                add('insert', prev_x, prev_x, prev_y, prev_y + 1)
+            else:
+                add('delete', prev_x, prev_x + 1, prev_y, prev_y)
+        x, y = prev_x, prev_y
+    spans.reverse()
+    return spans
+
+
+def _group(spans):
+    """equal이 아닌 인접 구간(delete/insert)을 difflib처럼 replace로 묶고,
+    MERGE_EQUAL_BELOW보다 짧은 equal 구간 양쪽의 변경도 하나로 합침"""
+    ops = []
+    for tag, i1, i2, j1, j2 in spans:
+        if (tag != 'equal' and ops and ops[-1][0] != 'equal'):
+            _, pi1, _, pj1, _ = ops.pop()
+            ops.append(('change', pi1, i2, pj1, j2))
+        else:
+            ops.append(('change' if tag != 'equal' else 'equal', i1, i2, j1, j2))
+
+    merged = []
+    for op in ops:
+        if (op[0] == 'change' and len(merged) >= 2 and merged[-1][0] == 'equal'
+                and merged[-1][2] - merged[-1][1] < MERGE_EQUAL_BELOW
+                and merged[-2][0] == 'change'):
+            merged.pop()
+            _, pi1, _, pj1, _ = merged.pop()
+            merged.append(('change', pi1, op[2], pj1, op[4]))
+        else:
+            merged.append(op)
+
+    result = []
+    for tag, i1, i2, j1, j2 in merged:
+        if tag == 'change':
+            tag = 'replace' if i1 < i2 and j1 < j2 else ('delete' if i1 < i2 else 'insert')
+        result.append((tag, i1, i2, j1, j2))
+    return result
+
+
+def diff_opcodes(a, b, max_edits=DIFF_MAX_EDITS):
+    """a → b 변경 구간 (SequenceMatcher.get_opcodes() 형식).
+
+    Args:
+        max_edits: Myers diff 편집 수 상한. 넘으면 접두사/접미사를 뺀 가운데 전체를
+            replace 하나로 보고함 (최악의 경우에도 O((N+M) × max_edits))
+
+    Returns:
+        list of (tag, i1, i2, j1, j2) — tag: 'equal' / 'replace' / 'delete' / 'insert'
+    """
+    n, m = len(a), len(b)
+    prefix = common_prefix_length(a, b)
+    suffix = common_suffix_length(a, b, min(n, m) - prefix)
+
+    spans = []
+    if prefix:
+        spans.append(('equal', 0, prefix, 0, prefix))
+    a_mid, b_mid = a[prefix:n - suffix], b[prefix:m - suffix]
+    if a_mid or b_mid:
+        middle = _myers(a_mid, b_mid, max_edits) if a_mid and b_mid else None
+        if middle is None:
+            middle = [('change', 0, len(a_mid), 0, len(b_mid))]
+        for tag, i1, i2, j1, j2 in middle:
+            spans.append((tag, prefix + i1, prefix + i2, prefix + j1, prefix + j2))
+    if suffix:
+        spans.append(('equal', n - suffix, n, m - suffix, m))
+    return _group(spans)
@@ -0,0 +1,253 @@
+"""
+text_nodes.py - 텍스트 노드 인덱스 기반 XML 문자열 치환 엔진
+
+smart_replace는 lxml 직렬화 없이 원본 섹션 XML 문자열을 직접 치환합니다.
+교체마다 섹션 전체를 `in` / `str.replace` / 슬라이싱으로 다시 훑고 새 문자열을
+만들면 교체 수 × 섹션 크기만큼 시간과 메모리가 들기 때문에,
+섹션을 한 번 훑어 모든 <prefix:t> 텍스트 노드의 위치를 인덱스로 만들고
+교체는 위치(편집 목록)로만 기록한 뒤 마지막에 한 번의 join으로 결과를 만듭니다.
+
+편집되지 않은 구간은 원본 문자열 조각을 그대로 이어붙이므로
+CRLF, 속성 순서, 네임스페이스 선언 등이 바이트 단위로 보존됩니다.
+
+용어:
+  - 노드(node): <prefix:t>...</prefix:t> 하나. 내용에 lineBreak 등 하위 요소가 있을 수 있음
+  - 런(run): 노드 내용 중 태그가 아닌 순수 텍스트 구간
+  - 꼬리 런(tail run): 노드 내용의 마지막 하위 요소 뒤 텍스트 (하위 요소가 없으면 내용 전체)
+    기존 '>{old}</hp:t>' 패턴 매칭은 꼬리 런이 old와 같은지와 동일합니다.
+"""
+import bisect
+import re
+
+
+def close_tag_prefix(close_tag):
+    """'</hp:t>' → 'hp'"""
+    m = re.match(r'</([\w]+):t>$', close_tag)
+    return m.group(1) if m else 'hp'
+
+
+class TextNodeIndex:
+    """섹션 XML 문자열의 <prefix:t> 텍스트 노드 위치 인덱스 (읽기 전용).
+
+    한 번 만들면 여러 TextEditor가 공유할 수 있습니다.
+
+    Attributes:
+        raw_xml: 원본 섹션 XML 문자열
+        runs: [(start, end), ...] — 모든 노드의 순수 텍스트 구간 (문서 순서, 빈 구간 제외)
+        node_runs: 노드별 런 id 범위 [(first_run, last_run_exclusive), ...]
+        node_tail: 노드별 꼬리 런 id (꼬리 텍스트가 비어 있으면 -1)
+    """
+
+    def __init__(self, raw_xml, close_tag='</hp:t>'):
+        self.raw_xml = raw_xml
+        self.close_tag = close_tag
+        self.runs = []
+        self.node_runs = []
+        self.node_tail = []
+        self._tail_lookup = None
+        self._joined = None
+        self._joined_starts = None
+        self._build(close_tag_prefix(close_tag))
+
+    def _build(self, prefix):
+        raw = self.raw_xml
+        close_tag = self.close_tag
+        runs = self.runs
+        open_pattern = re.compile(r'<' + re.escape(prefix) + r':t(?=[\s/>])')
+
+        pos = 0
+        while True:
+            m = open_pattern.search(raw, pos)
+            if m is None:
+                break
+            gt = raw.find('>', m.end())
+            if gt == -1:
+                break
+            first_run = len(runs)
+            tail = -1
+
+            if raw[gt - 1] == '/':
+                # <hp:t/> — 내용 없음
+                pos = gt + 1
+            else:
+                content_end = raw.find(close_tag, gt + 1)
+                if content_end == -1:
+                    break
+                cur = gt + 1
+                while True:
+                    lt = raw.find('<', cur, content_end)
+                    if lt == -1:
+                        if cur < content_end:
+                            runs.append((cur, content_end))
+                            tail = len(runs) - 1
+                        break
+                    if lt > cur:
+                        runs.append((cur, lt))
+                    cur = raw.find('>', lt, content_end) + 1
+                    if cur == 0:
+                        break
+                pos = content_end + len(close_tag)
+
+            self.node_runs.append((first_run, len(runs)))
+            self.node_tail.append(tail)
+
+    def __len__(self):
+        return len(self.node_runs)
+
+    def run_text(self, run_id):
+        start, end = self.runs[run_id]
+        return self.raw_xml[start:end]
+
+    def tail_nodes(self, text):
+        """꼬리 런이 text와 정확히 같은 노드 id 목록 (문서 순서)"""
+        if self._tail_lookup is None:
+            lookup = {}
+            for node_id, run_id in enumerate(self.node_tail):
+                if run_id >= 0:
+                    lookup.setdefault(self.run_text(run_id), []).append(node_id)
+            self._tail_lookup = lookup
+        return self._tail_lookup.get(text, ())
+
+    def find_in_runs(self, fragment):
+        """fragment가 처음 등장하는 위치를 런 단위로 탐색하는 제너레이터.
+
+        모든 런을 '\\x00'(XML에 나올 수 없는 문자)으로 이어붙인 문자열에서
+        str.find로 찾으므로 매치가 런(=태그) 경계를 넘지 않습니다.
+
+        Yields:
+            (run_id, raw_start): 매치가 속한 런과 원본 XML 기준 시작 위치
+        """
+        if self._joined is None:
+            raw = self.raw_xml
+            starts = []
+            total = 0
+            for start, end in self.runs:
+                starts.append(total)
+                total += end - start + 1
+            self._joined = '\x00'.join(raw[start:end] for start, end in self.runs)
+            self._joined_starts = starts
+        joined = self._joined
+        starts = self._joined_starts
+        idx = joined.find(fragment)
+        while idx != -1:
+            run_id = bisect.bisect_right(starts, idx) - 1
+            yield run_id, self.runs[run_id][0] + (idx - starts[run_id])
+            idx = joined.find(fragment, idx + 1)
+
+
+class TextEditor:
+    """TextNodeIndex 위에 교체 내용을 위치로 기록하고 한 번에 결과를 만드는 편집기.
+
+    교체 검색은 원본 텍스트 기준이며, 이미 편집된 구간과 겹치는 위치는 건너뜁니다.
+    (기존 구현은 앞선 교체로 바뀐 문자열을 다시 검색했으므로, 한 교체 결과가
+    다음 교체의 검색 대상이 되는 일이 더 이상 생기지 않습니다.)
+    """
+
+    def __init__(self, index):
+        self.index = index
+        self._edits = []          # [(raw_start, raw_end, new_text), ...]
+        self._run_edits = {}      # run_id -> [(raw_start, raw_end), ...]
+        self._tail_cursor = {}    # old_text -> 다음에 검사할 tail_nodes 위치
+
+    @property
+    def edit_count(self):
+        return len(self._edits)
+
+    def _overlaps(self, run_id, start, end):
+        for s, e in self._run_edits.get(run_id, ()):
+            if start < e and s < end:
+                return True
+        return False
+
+    def _record(self, run_id, start, end, new_text):
+        self._edits.append((start, end, new_text))
+        self._run_edits.setdefault(run_id, []).append((start, end))
+
+    def replace_tail(self, old_text, new_text, nodes=None):
+        """꼬리 런 전체가 old_text인 첫 번째 미편집 노드를 new_text로 교체.
+
+        기존 '>{old}</hp:t>' → '>{new}</hp:t>' 첫 매치 교체와 같은 대상입니다.
+
+        Args:
+            nodes: 후보 노드 id 목록 (셀/문단의 텍스트 노드). 주면 그 안에서만 찾고,
+                None이면 섹션 전체에서 첫 번째 미편집 노드를 찾습니다.
+
+        Returns:
+            bool: 교체 여부
+        """
+        index = self.index
+        if nodes is not None:
+            for node_id in nodes:
+                run_id = index.node_tail[node_id]
+                if run_id < 0 or run_id in self._run_edits:
+                    continue
+                if index.run_text(run_id) == old_text:
+                    start, end = index.runs[run_id]
+                    self._record(run_id, start, end, new_text)
+                    return True
+            return False
+
+        candidates = index.tail_nodes(old_text)
+        cursor = self._tail_cursor.get(old_text, 0)
+
+        while cursor < len(candidates):
+            run_id = index.node_tail[candidates[cursor]]
+            cursor += 1
+            if run_id in self._run_edits:
+                continue
+            start, end = index.runs[run_id]
+            self._record(run_id, start, end, new_text)
+            self._tail_cursor[old_text] = cursor
+            return True
+
+        self._tail_cursor[old_text] = cursor
+        return False
+
+    def replace_fragment(self, old_frag, new_frag, nodes=None):
+        """텍스트 런 내부에서 old_frag의 첫 번째 (미편집) 위치를 new_frag로 교체.
+
+        태그 이름/속성값에는 절대 매치하지 않으며, 매치가 태그 경계를 넘지 않습니다.
+
+        Args:
+            nodes: 후보 노드 id 목록. 주면 그 노드들의 런에서만 찾습니다.
+
+        Returns:
+            bool: 교체 여부
+        """
+        if nodes is None:
+            matches = self.index.find_in_runs(old_frag)
+        else:
+            matches = self._find_in_nodes(old_frag, nodes)
+        for run_id, start in matches:
+            end = start + len(old_frag)
+            if not self._overlaps(run_id, start, end):
+                self._record(run_id, start, end, new_frag)
+                return True
+        return False
+
+    def _find_in_nodes(self, fragment, nodes):
+        """nodes의 런 안에서 fragment 위치를 문서 순서로 생성"""
+        index = self.index
+        raw = index.raw_xml
+        for node_id in nodes:
+            first, last = index.node_runs[node_id]
+            for run_id in range(first, last):
+                start, end = index.runs[run_id]
+                idx = raw.find(fragment, start, end)
+                while idx != -1:
+                    yield run_id, idx
+                    idx = raw.find(fragment, idx + 1, end)
+
+    def render(self):
+        """기록된 편집을 적용한 XML 문자열 (편집 없으면 원본 그대로)"""
+        raw = self.index.raw_xml
+        if not self._edits:
+            return raw
+        parts = []
+        pos = 0
+        for start, end, new_text in sorted(self._edits):
+            parts.append(raw[pos:start])
+            parts.append(new_text)
+            pos = end
+        parts.append(raw[pos:])
+        return ''.join(parts)
@@ -0,0 +1,65 @@
+"""
+text_normalize.py - 셀/문단 텍스트 정규화 (smart_replace 비교용)
+
+smart_replace는 모든 테이블 셀과 문단에서 XML 쪽/마크다운 쪽 텍스트를
+strip_md_format → normalize로 비교하고, 바뀐 것만 xml_escape 합니다.
+호출 횟수가 셀 수에 비례하므로:
+
+  - 정규식은 모듈 로드 시 한 번만 컴파일
+  - 대상 문자('*', '~~', '<br>', '\\|')가 없으면 해당 치환을 건너뜀 (대부분의 셀)
+  - 공백 정리는 str.split()/join (re의 \\s와 같은 유니코드 공백 정의)
+  - 양식 문서에 반복되는 셀 값('', '해당없음', '○' 등)은 결과를 메모이제이션
+
+출력은 이전 re.sub/str.replace 구현과 문자 단위로 같습니다
+(tests: test_text_normalize_matches_reference).
+"""
+import re
+from functools import lru_cache
+
+NORMALIZE_CACHE_SIZE = 8192
+
+_BOLD_ITALIC_RE = re.compile(r'\*{3}(.+?)\*{3}')
+_BOLD_RE = re.compile(r'\*{2}(.+?)\*{2}')
+_ITALIC_RE = re.compile(r'\*(.+?)\*')
+_STRIKE_RE = re.compile(r'~~(.+?)~~')
+
+
+@lru_cache(maxsize=NORMALIZE_CACHE_SIZE)
+def strip_md_format(text):
+    """마크다운 인라인 서식 제거 (굵게/기울임/취소선, <br>, 이스케이프된 파이프)"""
+    if '*' in text:
+        text = _BOLD_ITALIC_RE.sub(r'\1', text)
+        text = _BOLD_RE.sub(r'\1', text)
+        text = _ITALIC_RE.sub(r'\1', text)
+    if '~~' in text:
+        text = _STRIKE_RE.sub(r'\1', text)
+    if '<br>' in text:
+        text = text.replace('<br>', ' ')
+    if '\\|' in text:
+        text = text.replace('\\|', '|')
+    return text
+
+
+@lru_cache(maxsize=NORMALIZE_CACHE_SIZE)
+def normalize(text):
+    """비교용 정규화 — 공백/줄바꿈 차이 + 마크다운 라운드트립 아티팩트 무시"""
+    text = ' '.join(text.split())
+    # * 각주 마커는 마크다운 라운드트립에서 소실되므로 비교 시 무시
+    if '*' in text:
+        text = text.replace('*', '')
+    return text
+
+
+def xml_escape(text):
+    """XML 텍스트 노드용 이스케이프 (&, <, >)
+
+    str.replace 세 번이 str.translate(한 번 순회)보다 빠름 — 각각 C 수준 검색이고
+    대상 문자가 없으면 복사하지 않음 (benchmarks/bench_normalize.py).
+    """
+    return text.replace('&', '&amp;').replace('<', '&lt;').replace('>', '&gt;')
+
+
+def clear_normalize_cache():
+    """메모이제이션 캐시 비우기 (메모리 회수/측정용)"""
+    strip_md_format.cache_clear()
+    normalize.cache_clear()